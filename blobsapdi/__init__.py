@@ -1,3 +1,3 @@
-__usage__ = f"Usage: python \"{__file__}\" [auth_api] [-d db] [-p port] [-l listening] [-s storage]"
+__usage__ = f"Usage: python \"{__file__}\" [auth_api] [-d db] [-p port] [-l listening] [-s storage] [-w workers] [-t threads]"
 __app__ = "APDI"
 __version__ = "v1"
@@ -0,0 +1,124 @@
+"""
+This module provides the parsing of the bodies of the batch endpoints of APDI and
+the building of their per-item results, shared by the WSGI and ASGI applications.
+
+Every batch endpoint takes a JSON body with a "blobs" list of up to _MAX_ITEMS
+items. Invalid items get a 400 result and the rest are applied together.
+"""
+
+from typing import Any, Callable, Generic, Iterable, TypeVar
+
+from blobsapdi.enums import Visibility
+
+
+_MAX_ITEMS = 1000
+
+_T = TypeVar("_T")
+
+def _parse_create(item: Any) -> Visibility:
+    if not isinstance(item, dict):
+        raise ValueError("Item must be an object")
+
+    try:
+        return Visibility(item.get("visibility", Visibility.PRIVATE))
+    except ValueError as e:
+        raise ValueError("Invalid visibility value") from e
+
+def _parse_id(item: Any) -> str:
+    if not isinstance(item, str):
+        raise ValueError("Item must be a blob ID")
+
+    return item
+
+def _parse_visibility(item: Any) -> tuple[str, Visibility]:
+    if not isinstance(item, dict) or not isinstance(item.get("blobId"), str):
+        raise ValueError("Item must be an object with a 'blobId' key")
+
+    try:
+        return item["blobId"], Visibility(item.get("visibility"))
+    except ValueError as e:
+        raise ValueError("Invalid visibility value") from e
+
+def _parse_acl(item: Any) -> tuple[str, set[str]]:
+    if not isinstance(item, dict) or not isinstance(item.get("blobId"), str):
+        raise ValueError("Item must be an object with a 'blobId' key")
+
+    _acl = item.get("acl")
+
+    if not isinstance(_acl, list) or not all(isinstance(_u, str) for _u in _acl):
+        raise ValueError("Missing 'acl' list of usernames")
+
+    return item["blobId"], set(_acl)
+
+class _Batch(Generic[_T]):
+    """
+    The items of the body of a batch request, parsed one by one.
+    """
+
+    def __init__(self, body: Any, parse: Callable[[Any], _T]) -> None:
+        """
+        Initializes a new instance of the _Batch class.
+
+        Args:
+            body: The JSON body of the request.
+            parse: A callable that parses an item, raising ValueError if it is invalid.
+
+        Raises:
+            ValueError: If the body has no list of items or it has too many items.
+        """
+        _items = body.get("blobs") if isinstance(body, dict) else None
+
+        if not isinstance(_items, list):
+            raise ValueError("Missing 'blobs' list in JSON body")
+
+        if len(_items) > _MAX_ITEMS:
+            raise ValueError(f"Batches are limited to {_MAX_ITEMS} items")
+
+        self._results: list[dict | None] = []
+        self.valid: list[_T] = []
+
+        for _item in _items:
+            try:
+                self.valid.append(parse(_item))
+                self._results.append(None)
+            except ValueError as e:
+                self._results.append({"status": 400, "error": str(e)})
+
+    def results(self, applied: Iterable[dict]) -> list[dict]:
+        """
+        Merges the results of the valid items with the ones of the invalid items.
+
+        Args:
+            applied: The result of every valid item, in the same order.
+
+        Returns:
+            The result of every item of the request, in the same order.
+        """
+        _applied = iter(applied)
+
+        return [next(_applied) if _r is None else _r for _r in self._results]
+
+def _created(blob_ids: list[str], endpoint: str) -> list[dict]:
+    """
+    Returns the results of the created blobs.
+    """
+    return [{
+        "status": 201,
+        "blobId": _id,
+        "URL": f"{endpoint}/blobs/{_id}"
+    } for _id in blob_ids]
+
+def _updated(blob_ids: Iterable[str], done: set[str]) -> list[dict]:
+    """
+    Returns the results of the blobs that had to be updated, 404 for the ones not updated.
+    """
+    return [{
+        "status": 204,
+        "blobId": _id
+    } if _id in done else {
+        "status": 404,
+        "blobId": _id,
+        "error": f"Blob {_id} not found"
+    } for _id in blob_ids]
+
+__export__ = (_Batch, _parse_create, _parse_id, _parse_visibility, _parse_acl, _created, _updated)
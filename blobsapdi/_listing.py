@@ -0,0 +1,154 @@
+"""
+This module provides the parsing of the query of the blob listing endpoint of APDI
+and the encoding of its bodies, shared by the WSGI and ASGI applications.
+
+Without a limit nor a cursor every blob is listed, streamed as a single JSON
+document or as NDJSON, one blob per line. With them a page of up to _MAX_LIMIT
+blobs is returned along the cursor of the next one.
+"""
+
+import base64
+import binascii
+import json
+
+from collections.abc import Iterable, Iterator, Mapping
+from itertools import islice
+from typing import NamedTuple
+
+
+_DEFAULT_LIMIT = 100
+_MAX_LIMIT = 1000
+_NDJSON = "application/x-ndjson"
+_CHUNK_ITEMS = 256
+
+def _encode_cursor(blob_id: str) -> str:
+    """
+    Returns the opaque cursor of the page following a blob.
+    """
+    return base64.urlsafe_b64encode(blob_id.encode()).rstrip(b"=").decode()
+
+def _decode_cursor(cursor: str) -> str:
+    """
+    Returns the ID of the blob a cursor follows.
+
+    Raises:
+        ValueError: If the cursor is not valid.
+    """
+    try:
+        _id = base64.b64decode(
+            cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not _id:
+        raise ValueError("Invalid cursor")
+
+    return _id
+
+class _Listing(NamedTuple):
+    """
+    The options of a blob listing request.
+    """
+    limit: int | None
+    after: str | None
+    ndjson: bool
+
+    @property
+    def paged(self) -> bool:
+        """
+        Whether a single page is requested instead of every blob.
+        """
+        return not self.ndjson and (self.limit is not None or self.after is not None)
+
+    @classmethod
+    def parse(cls, args: Mapping[str, str], accept: str) -> '_Listing':
+        """
+        Parses the query parameters and the Accept header of a listing request.
+
+        Args:
+            args: The query parameters, which may have 'limit', 'cursor' and 'format'.
+            accept: The Accept header of the request.
+
+        Raises:
+            ValueError: If a parameter is not valid.
+        """
+        _limit = args.get("limit")
+
+        if _limit is not None:
+            try:
+                _limit = int(_limit)
+            except ValueError as e:
+                raise ValueError("Invalid limit value") from e
+
+            if not 0 < _limit <= _MAX_LIMIT:
+                raise ValueError(f"Limit must be between 1 and {_MAX_LIMIT}")
+
+        _cursor = args.get("cursor")
+        _after = _decode_cursor(_cursor) if _cursor is not None else None
+
+        _format = args.get("format")
+
+        if _format not in (None, "json", "ndjson"):
+            raise ValueError("Invalid format, must be 'json' or 'ndjson'")
+
+        _ndjson = _format == "ndjson" or (
+            _format is None and _NDJSON in (_m.split(";")[0].strip() for _m in accept.split(",")))
+
+        return cls(_limit, _after, _ndjson)
+
+    def page(self, blob_ids: list[str], last: str | None, url: str) -> dict:
+        """
+        Returns the body of a page of blobs.
+
+        Args:
+            blob_ids: The IDs of the blobs of the page.
+            last: The last ID of the page, None if it is the last page.
+            url: The URL of the blobs collection.
+        """
+        return {
+            "blobs": [_item(_id, url) for _id in blob_ids],
+            "nextCursor": _encode_cursor(last) if last is not None else None
+        }
+
+    def stream(self, blob_ids: Iterable[str], url: str) -> Iterator[str]:
+        """
+        Encodes every blob as the chunks of a streamed body.
+
+        Args:
+            blob_ids: The IDs of the blobs, read while streaming.
+            url: The URL of the blobs collection.
+        """
+        _ids = iter(blob_ids) if self.limit is None else islice(blob_ids, self.limit)
+
+        if self.ndjson:
+            while _chunk := list(islice(_ids, _CHUNK_ITEMS)):
+                yield "".join(json.dumps(_item(_id, url)) + "\n" for _id in _chunk)
+            return
+
+        yield '{"blobs": ['
+
+        _sep = ""
+
+        while _chunk := list(islice(_ids, _CHUNK_ITEMS)):
+            yield _sep + ", ".join(json.dumps(_item(_id, url)) for _id in _chunk)
+            _sep = ", "
+
+        yield "]}"
+
+    @property
+    def media_type(self) -> str:
+        """
+        The media type of the streamed body.
+        """
+        return _NDJSON if self.ndjson else "application/json"
+
+def _item(blob_id: str, url: str) -> dict:
+    """
+    Returns the listing entry of a blob.
+    """
+    return {
+        "blobId": blob_id,
+        "URL": f"{url}/{blob_id}"
+    }
+
+__export__ = (_Listing, _encode_cursor, _decode_cursor)
@@ -0,0 +1,85 @@
+"""
+This module provides a production WSGI server for APDI, backed by gunicorn.
+"""
+
+import logging
+
+from typing import Callable
+
+import flask
+
+from gunicorn.app.base import BaseApplication
+
+
+logger = logging.getLogger("APDI")
+
+class _WSGIServer(BaseApplication):
+    """
+    A pre-fork gunicorn server that builds the application inside every worker.
+
+    Building the application after the fork gives every worker its own database
+    connections, and a HUP signal gracefully replaces the workers with new ones.
+    """
+
+    def __init__(
+            self,
+            app_factory: Callable[[], flask.Flask],
+            on_exit: Callable[[], None],
+            options: dict) -> None:
+        """
+        Initializes a new instance of the _WSGIServer class.
+
+        Args:
+            app_factory: A callable run in every worker that connects to the database
+                and returns the application.
+            on_exit: A callable run in every worker when it exits.
+            options: The gunicorn settings.
+        """
+        self._app_factory = app_factory
+        self._on_exit = on_exit
+        self._options = options
+
+        super().__init__()
+
+    def load_config(self) -> None:
+        for _key, _value in self._options.items():
+            self.cfg.set(_key, _value)
+
+        self.cfg.set("worker_exit", lambda _server, _worker: self._on_exit())
+
+    def load(self) -> flask.Flask:
+        return self._app_factory()
+
+def _serve(
+        app_factory: Callable[[], flask.Flask],
+        on_exit: Callable[[], None],
+        host: str,
+        port: int,
+        workers: int,
+        threads: int,
+        timeout: int) -> None:
+    """
+    Runs the application under gunicorn until the master process is stopped.
+
+    Args:
+        app_factory: A callable run in every worker that returns the application.
+        on_exit: A callable run in every worker when it exits.
+        host: The address to listen on.
+        port: The port to listen on.
+        workers: The number of worker processes.
+        threads: The number of threads of every worker.
+        timeout: The seconds a silent worker is allowed to run before being restarted.
+    """
+    logger.info("Starting %d workers with %d threads on %s:%d", workers, threads, host, port)
+
+    _WSGIServer(app_factory, on_exit, {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread" if threads > 1 else "sync",
+        "timeout": timeout,
+        "graceful_timeout": timeout,
+        "preload_app": False
+    }).run()
+
+__export__ = (_WSGIServer, _serve)
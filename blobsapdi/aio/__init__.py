@@ -0,0 +1,8 @@
+"""
+This package contains the asynchronous service layer and ASGI application of APDI.
+"""
+
+from blobsapdi.aio.server import create_app
+
+
+__all__ = ['create_app']
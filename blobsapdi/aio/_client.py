@@ -0,0 +1,107 @@
+"""
+This module contains the _AsyncAuthClient class, a non-blocking client of the authentication API.
+"""
+
+import httpx
+
+from blobsapdi import exceptions
+from blobsapdi.entities.client import Client
+from blobsapdi.objects import _AuthProtocol
+
+
+class _AsyncAuthClient:
+    """
+    A client of the authentication API that resolves tokens without blocking the event loop.
+
+    Resolved tokens are shared with the synchronous Client through the same token cache,
+    and requests are made and read through the same _AuthProtocol as its session.
+    """
+
+    def __init__(
+            self,
+            auth_api: str,
+            pool_size: int = 10,
+            connect_timeout: float = 1,
+            read_timeout: float = 5,
+            failure_threshold: int = 5,
+            reset_timeout: float = 30) -> None:
+        """
+        Initializes a new instance of the _AsyncAuthClient class.
+
+        Args:
+            auth_api: The root URL of the authentication API.
+            pool_size: The maximum number of kept-alive connections to the API.
+            connect_timeout: The number of seconds connecting to the API may take.
+            read_timeout: The number of seconds the API may take to answer.
+            failure_threshold: The consecutive failures that open the circuit, 0 never opens it.
+            reset_timeout: The number of seconds the circuit stays open.
+        """
+        self._protocol = _AuthProtocol(auth_api, failure_threshold, reset_timeout)
+        self.breaker = self._protocol.breaker
+
+        self._http = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size))
+
+    async def service_up(self) -> bool:
+        """
+        Checks the connection to the authentication API.
+
+        Returns:
+            A boolean representing the connection status.
+        """
+        try:
+            return (await self._get(_AuthProtocol.STATUS_PATH)).status_code == 200
+        except exceptions.adiauth.ServiceError:
+            return False
+
+    async def _get(self, path: str) -> httpx.Response:
+        _url = self._protocol.url(path)
+
+        try:
+            _response = await self._http.get(_url)
+        except httpx.HTTPError as e:
+            raise self._protocol.failed(e) from e
+
+        self._protocol.answered(_response.status_code)
+
+        return _response
+
+    async def token_owner(self, token: str) -> str:
+        """
+        Resolves the owner of a token.
+
+        Args:
+            token: The token of the user.
+
+        Returns:
+            The username of the token owner.
+
+        Raises:
+            UserNotExists: If the token is invalid.
+            ServiceError: If the authentication API failed or the circuit is open.
+        """
+        username = Client.cached_owner(token)
+
+        if username is None:
+            _response = await self._get(_AuthProtocol.token_path(token))
+
+            try:
+                username = _AuthProtocol.token_owner(
+                    token, _response.status_code, _response.json)
+            except exceptions.adiauth.UserNotExists:
+                Client.cache_owner(token, None)
+                raise
+
+            Client.cache_owner(token, username)
+
+        return username
+
+    async def close(self) -> None:
+        """
+        Closes the connections to the authentication API.
+        """
+        await self._http.aclose()
+
+__export__ = (_AsyncAuthClient,)
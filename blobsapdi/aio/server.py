@@ -0,0 +1,714 @@
+"""
+This module provides the asynchronous variant of the APDI application, an ASGI
+application with the same REST surface as the one in blobsapdi.server.
+"""
+
+import asyncio
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, BinaryIO
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.types import Receive, Scope, Send
+
+from blobsapdi import exceptions
+from blobsapdi import enums
+from blobsapdi import db
+from blobsapdi import entities
+from blobsapdi.aio import services
+from blobsapdi._batch import (
+    _Batch, _created, _parse_acl, _parse_create, _parse_id, _parse_visibility, _updated)
+from blobsapdi._listing import _DEFAULT_LIMIT, _Listing
+from blobsapdi.objects._signer import _URL_TTL
+
+from blobsapdi import __app__, __version__
+
+
+logger = logging.getLogger("APDI")
+
+_CHUNK_SIZE = 1024 * 1024
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """
+    Checks the conditional headers of a request against the current version of a blob.
+
+    Args:
+        request: The request.
+        etag: The entity tag of the blob.
+        mtime: The modification time of the blob.
+
+    Returns:
+        Whether the client already has the current version of the blob.
+    """
+    if_none_match = request.headers.get("if-none-match")
+
+    if if_none_match is not None:
+        tags = {_tag.strip().removeprefix("W/").strip('"') for _tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+
+    if if_modified_since is not None:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+def _accepts_encoding(request: Request, encoding: str) -> bool:
+    """
+    Checks whether the Accept-Encoding header of a request accepts a content coding.
+
+    Args:
+        request: The request.
+        encoding: The content coding.
+
+    Returns:
+        Whether the coding is listed, or matched by '*', with a quality above zero.
+    """
+    for _item in request.headers.get("accept-encoding", "").split(","):
+        _name, _, _params = _item.partition(";")
+
+        if _name.strip().lower() not in (encoding, "*"):
+            continue
+
+        _quality = _params.strip().removeprefix("q=")
+
+        try:
+            return not _quality or float(_quality) > 0
+        except ValueError:
+            return False
+
+    return False
+
+def _requested_range(request: Request, etag: str, size: int) -> tuple[int, int] | None:
+    """
+    Parses the Range header of a request, of which only single byte ranges are served.
+
+    Args:
+        request: The request.
+        etag: The entity tag of the blob, which an If-Range header must match.
+        size: The size of the contents of the blob.
+
+    Returns:
+        The first and past the last positions of the range, None to send the whole contents.
+
+    Raises:
+        ValueError: If the range starts past the end of the contents.
+    """
+    header = request.headers.get("range", "")
+
+    if not header.startswith("bytes=") or "," in header:
+        return None
+
+    if_range = request.headers.get("if-range")
+
+    if if_range is not None and if_range.strip().removeprefix("W/").strip('"') != etag:
+        return None
+
+    first, _, last = header.removeprefix("bytes=").strip().partition("-")
+
+    if not all(_p.isascii() and _p.isdigit() for _p in (first, last) if _p) or not first + last:
+        return None
+
+    if first:
+        start, end = int(first), int(last) + 1 if last else size
+
+        if last and end <= start:
+            return None
+    else:
+        start, end = size - int(last), size
+
+    if start >= size or end <= 0:
+        raise ValueError(f"Range {header} not satisfiable")
+
+    return max(start, 0), min(end, size)
+
+async def _iter_blob(blob: BinaryIO, start: int = 0, length: int = None) -> AsyncIterator[bytes]:
+    """
+    Reads the contents of a blob in a worker thread.
+
+    Args:
+        blob: The open blob.
+        start: The position of the first byte to send.
+        length: The number of bytes to send, None to send up to the end.
+
+    Yields:
+        The chunks of the contents.
+    """
+    if start:
+        await asyncio.to_thread(blob.seek, start)
+
+    while length is None or length > 0:
+        chunk = await asyncio.to_thread(
+            blob.read, _CHUNK_SIZE if length is None else min(_CHUNK_SIZE, length))
+
+        if not chunk:
+            break
+
+        if length is not None:
+            length -= len(chunk)
+
+        yield chunk
+
+class _BlobResponse(StreamingResponse):
+    """
+    A response streaming the contents of a blob, which is closed once the response
+    ends, even if the client disconnected before its body was sent.
+    """
+
+    def __init__(
+            self,
+            blob: BinaryIO,
+            start: int = 0,
+            length: int = None,
+            status_code: int = 200,
+            headers: dict[str, str] = None) -> None:
+        """
+        Initializes a new instance of the _BlobResponse class.
+
+        Args:
+            blob: The open blob, which the response closes.
+            start: The position of the first byte to send.
+            length: The number of bytes to send, None to send up to the end.
+            status_code: The status code of the response.
+            headers: The headers of the response.
+        """
+        super().__init__(
+            _iter_blob(blob, start, length),
+            status_code=status_code,
+            headers=headers,
+            media_type="application/octet-stream")
+
+        self._blob = blob
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await asyncio.to_thread(self._blob.close)
+
+async def _json(request: Request) -> dict:
+    try:
+        return await request.json() or {}
+    except ValueError:
+        return {}
+
+def _routes() -> list[Route]:
+    endpoint = f"/api/{__version__}"
+
+    async def get_status(_request: Request) -> Response:
+        return JSONResponse({
+            "message": f"API {__app__} {__version__} up and running"
+        })
+
+    async def get_metrics(_request: Request) -> Response:
+        return JSONResponse({
+            "token_cache": entities.Client.cache_stats(),
+            "auth": services.auth_stats(),
+            "readers": entities.Blob.reader_stats(),
+            "content_cache": entities.Blob.content_cache_stats(),
+            "db": db.stats()
+        })
+
+    async def get_blob(request: Request) -> Response:
+        token = request.headers.get("DownloadToken")
+        signature = request.query_params.get("signature")
+
+        if signature is not None:
+            blob_ = await services.get_blob_by_signature(
+                request.path_params["blob"], request.query_params.get("expires", ""), signature)
+        elif token is not None:
+            blob_ = await services.get_blob_by_token(request.path_params["blob"], token)
+        else:
+            blob_ = await services.open_blob(
+                request.path_params["blob"], request.headers.get("AuthToken"))
+
+        # Compressed contents are sent as they are stored to clients accepting their codec
+        encoding = blob_.encoding
+        encoded = encoding is not None and _accepts_encoding(request, encoding)
+
+        body = blob_ if encoding is None or encoded else blob_.decoded()
+
+        # The contents are streamed from the reader of the blob, which stays
+        # open for the next requests instead of opening the file for each one
+        try:
+            etag, stat = blob_.etag, await asyncio.to_thread(body.stat)
+        except BaseException:
+            await asyncio.to_thread(body.close)
+            raise
+
+        if encoded:
+            etag = f"{etag}-{encoding}"
+
+        headers = {
+            "etag": f'"{etag}"',
+            "cache-control": "no-cache"
+        }
+
+        if encoding is not None:
+            headers["vary"] = "Accept-Encoding"
+
+        if encoded:
+            headers["content-encoding"] = encoding
+
+        if _not_modified(request, etag, stat.st_mtime):
+            body.close()
+            return Response(status_code=304, headers=headers)
+
+        headers["accept-ranges"] = "bytes"
+        headers["last-modified"] = formatdate(stat.st_mtime, usegmt=True)
+
+        try:
+            requested = _requested_range(request, etag, stat.st_size)
+        except ValueError:
+            body.close()
+            headers["content-range"] = f"bytes */{stat.st_size}"
+            return Response(status_code=416, headers=headers)
+
+        if requested is None:
+            headers["content-length"] = str(stat.st_size)
+
+            return _BlobResponse(body, headers=headers)
+
+        start, end = requested
+
+        headers["content-length"] = str(end - start)
+        headers["content-range"] = f"bytes {start}-{end - 1}/{stat.st_size}"
+
+        return _BlobResponse(body, start, end - start, status_code=206, headers=headers)
+
+    async def post_download_token(request: Request) -> Response:
+        token, expires = await services.create_download_token(
+            request.path_params["blob"], request.headers.get("AuthToken"))
+
+        return JSONResponse({
+            "token": token,
+            "expires": expires
+        }, 201)
+
+    async def post_presigned_url(request: Request) -> Response:
+        body = await _json(request)
+        ttl = body.get("expiresIn", _URL_TTL) if isinstance(body, dict) else _URL_TTL
+
+        if type(ttl) is not int:
+            return JSONResponse({
+                "error": "Invalid 'expiresIn' number of seconds"
+            }, 400)
+
+        blob = request.path_params["blob"]
+
+        try:
+            expires, signature = await services.create_presigned_url(
+                blob, request.headers.get("AuthToken"), ttl)
+        except ValueError as e:
+            return JSONResponse({
+                "error": str(e)
+            }, 400)
+
+        return JSONResponse({
+            "URL": f"{endpoint}/blobs/{blob}?expires={expires}&signature={signature}",
+            "expires": expires
+        }, 201)
+
+    async def get_blobs(request: Request) -> Response:
+        try:
+            listing = _Listing.parse(request.query_params, request.headers.get("Accept", ""))
+        except ValueError as e:
+            return JSONResponse({
+                "error": str(e)
+            }, 400)
+
+        url = f"{str(request.base_url).rstrip('/')}/{endpoint.lstrip('/')}/blobs"
+
+        if listing.paged:
+            blob_ids, last = await services.get_user_blobs_page(
+                request.headers.get("AuthToken"), listing.limit or _DEFAULT_LIMIT, listing.after)
+
+            return JSONResponse(listing.page(blob_ids, last, url))
+
+        blob_ids = await services.iter_user_blobs(request.headers.get("AuthToken"), listing.after)
+
+        # The iterator reads the database, so Starlette consumes it in a worker thread
+        return StreamingResponse(listing.stream(blob_ids, url), media_type=listing.media_type)
+
+    async def post_blob(request: Request) -> Response:
+        _v = (await _json(request)).get('visibility', enums.Visibility.PRIVATE)
+
+        try:
+            visibility = enums.Visibility(_v)
+        except ValueError:
+            return JSONResponse({
+                "error": "Invalid visibility value"
+            }, 400)
+
+        blob_ = await services.create_blob(request.headers.get("AuthToken"), visibility)
+
+        return JSONResponse({
+            "blobId": blob_.id_,
+            "URL": f"{endpoint}/blobs/{blob_.id_}"
+        }, 201)
+
+    async def put_blob(request: Request) -> Response:
+        blob_ = await services.update_blob(
+            request.path_params["blob"], request.headers.get("AuthToken"), request.stream())
+
+        blob_.close()
+
+        return Response(status_code=204)
+
+    async def post_upload(request: Request) -> Response:
+        blob = request.path_params["blob"]
+
+        upload_id = await services.create_upload(blob, request.headers.get("AuthToken"))
+
+        return JSONResponse({
+            "uploadId": upload_id,
+            "URL": f"{endpoint}/blobs/{blob}/uploads/{upload_id}"
+        }, 201)
+
+    async def put_upload_part(request: Request) -> Response:
+        part = request.path_params["part"]
+
+        try:
+            size = await services.upload_part(
+                request.path_params["blob"],
+                request.path_params["upload"],
+                part,
+                request.headers.get("AuthToken"),
+                request.stream())
+        except ValueError as e:
+            return JSONResponse({
+                "error": str(e)
+            }, 400)
+
+        return JSONResponse({
+            "partNumber": part,
+            "size": size
+        })
+
+    async def get_upload(request: Request) -> Response:
+        parts = await services.get_upload_parts(
+            request.path_params["blob"],
+            request.path_params["upload"],
+            request.headers.get("AuthToken"))
+
+        return JSONResponse({
+            "parts": [{"partNumber": _n, "size": _s} for _n, _s in parts.items()]
+        })
+
+    async def post_upload_complete(request: Request) -> Response:
+        body = await _json(request)
+        parts = body.get("parts") if isinstance(body, dict) else None
+
+        if parts is not None and (
+                not isinstance(parts, list) or not all(type(_p) is int for _p in parts)):
+            return JSONResponse({
+                "error": "Invalid 'parts' list of part numbers"
+            }, 400)
+
+        try:
+            blob_ = await services.complete_upload(
+                request.path_params["blob"],
+                request.path_params["upload"],
+                request.headers.get("AuthToken"),
+                parts)
+        except ValueError as e:
+            return JSONResponse({
+                "error": str(e)
+            }, 400)
+
+        blob_.close()
+
+        return Response(status_code=204)
+
+    async def delete_upload(request: Request) -> Response:
+        await services.abort_upload(
+            request.path_params["blob"],
+            request.path_params["upload"],
+            request.headers.get("AuthToken"))
+
+        return Response(status_code=204)
+
+    async def delete_blob(request: Request) -> Response:
+        await services.delete_blob(request.path_params["blob"], request.headers.get("AuthToken"))
+
+        return Response(status_code=204)
+
+    async def get_blob_hashes(request: Request) -> Response:
+        hash_type = request.query_params.get("type", "md5")
+
+        hash_list = hash_type.split(",")
+
+        try:
+            _hashes = await services.get_hash_blob(
+                request.path_params["blob"], request.headers.get("AuthToken"), hash_list)
+        except ValueError as e:
+            return JSONResponse({
+                "error": str(e)
+            }, 400)
+
+        return JSONResponse(_hashes)
+
+    async def delete_acl(request: Request) -> Response:
+        await services.remove_read_permission(
+            request.path_params["blob"],
+            request.headers.get("AuthToken"),
+            request.path_params["user"])
+
+        return Response(status_code=204)
+
+    async def get_acl(request: Request) -> Response:
+        perms = await services.get_read_permissions(
+            request.path_params["blob"], request.headers.get("AuthToken"))
+
+        if perms is None:
+            return Response(status_code=204)
+
+        return JSONResponse({
+            "allowed_users": perms
+        })
+
+    async def put_acl(request: Request) -> Response:
+        new_perms = (await _json(request)).get("acl")
+
+        if new_perms is None:
+            return JSONResponse({
+                "error": "Missing 'acl' key in JSON body"
+            }, 400)
+
+        await services.put_read_permissions(
+            request.path_params["blob"], request.headers.get("AuthToken"), set(new_perms))
+
+        return Response(status_code=204)
+
+    async def patch_acl(request: Request) -> Response:
+        new_perms = (await _json(request)).get("acl")
+
+        if new_perms is None:
+            return JSONResponse({
+                "error": "Missing 'acl' key in JSON body"
+            }, 400)
+
+        await services.patch_read_permissions(
+            request.path_params["blob"], request.headers.get("AuthToken"), set(new_perms))
+
+        return Response(status_code=204)
+
+    async def put_visibility(request: Request) -> Response:
+        visibility = (await _json(request)).get("visibility")
+
+        if visibility is None:
+            return JSONResponse({
+                "error": "Missing 'visibility' key in JSON body"
+            }, 400)
+
+        try:
+            visibility = enums.Visibility(visibility)
+        except ValueError:
+            return JSONResponse({
+                "error": "Invalid visibility value"
+            }, 400)
+
+        await services.update_blob_visibility(
+            request.path_params["blob"], request.headers.get("AuthToken"), visibility)
+
+        return Response(status_code=204)
+
+    async def get_visibility(request: Request) -> Response:
+        visibility = await services.get_blob_visibility(
+            request.path_params["blob"], request.headers.get("AuthToken"))
+
+        return JSONResponse({
+            "visibility": visibility.value
+        })
+
+    async def batch_create(request: Request) -> Response:
+        try:
+            batch = _Batch(await _json(request), _parse_create)
+        except ValueError as e:
+            return JSONResponse({
+                "error": str(e)
+            }, 400)
+
+        blob_ids = await services.create_blobs(request.headers.get("AuthToken"), batch.valid)
+
+        return JSONResponse({
+            "results": batch.results(_created(blob_ids, endpoint))
+        })
+
+    async def batch_delete(request: Request) -> Response:
+        try:
+            batch = _Batch(await _json(request), _parse_id)
+        except ValueError as e:
+            return JSONResponse({
+                "error": str(e)
+            }, 400)
+
+        deleted = await services.delete_blobs(request.headers.get("AuthToken"), batch.valid)
+
+        return JSONResponse({
+            "results": batch.results(_updated(batch.valid, deleted))
+        })
+
+    async def batch_visibility(request: Request) -> Response:
+        try:
+            batch = _Batch(await _json(request), _parse_visibility)
+        except ValueError as e:
+            return JSONResponse({
+                "error": str(e)
+            }, 400)
+
+        updated = await services.update_blobs_visibility(
+            request.headers.get("AuthToken"), batch.valid)
+
+        return JSONResponse({
+            "results": batch.results(_updated((_id for _id, _ in batch.valid), updated))
+        })
+
+    async def batch_acl(request: Request) -> Response:
+        body = await _json(request)
+        mode = body.get("mode", "put") if isinstance(body, dict) else "put"
+
+        if mode not in ("put", "patch"):
+            return JSONResponse({
+                "error": "Invalid mode, must be 'put' or 'patch'"
+            }, 400)
+
+        try:
+            batch = _Batch(body, _parse_acl)
+        except ValueError as e:
+            return JSONResponse({
+                "error": str(e)
+            }, 400)
+
+        updated = await services.update_blobs_permissions(
+            request.headers.get("AuthToken"), batch.valid, replace=mode == "put")
+
+        return JSONResponse({
+            "results": batch.results(_updated((_id for _id, _ in batch.valid), updated))
+        })
+
+    return [
+        Route("/", get_status, methods=["GET"]),
+        Route(f"{endpoint}/status/", get_status, methods=["GET"]),
+        Route(f"{endpoint}/metrics/", get_metrics, methods=["GET"]),
+        Route(f"{endpoint}/blobs/{{blob}}", get_blob, methods=["GET"]),
+        Route(
+            f"{endpoint}/blobs/{{blob}}/download-token", post_download_token, methods=["POST"]),
+        Route(
+            f"{endpoint}/blobs/{{blob}}/presigned-url", post_presigned_url, methods=["POST"]),
+        Route(f"{endpoint}/blobs/", get_blobs, methods=["GET"]),
+        Route(f"{endpoint}/blobs/", post_blob, methods=["POST"]),
+        Route(f"{endpoint}/blobs/{{blob}}", put_blob, methods=["PUT"]),
+        Route(f"{endpoint}/blobs/{{blob}}/uploads", post_upload, methods=["POST"]),
+        Route(
+            f"{endpoint}/blobs/{{blob}}/uploads/{{upload}}/parts/{{part:int}}",
+            put_upload_part,
+            methods=["PUT"]),
+        Route(f"{endpoint}/blobs/{{blob}}/uploads/{{upload}}", get_upload, methods=["GET"]),
+        Route(
+            f"{endpoint}/blobs/{{blob}}/uploads/{{upload}}", post_upload_complete, methods=["POST"]),
+        Route(f"{endpoint}/blobs/{{blob}}/uploads/{{upload}}", delete_upload, methods=["DELETE"]),
+        Route(f"{endpoint}/blobs/{{blob}}", delete_blob, methods=["DELETE"]),
+        Route(f"{endpoint}/blobs/{{blob}}/hash", get_blob_hashes, methods=["GET"]),
+        Route(f"{endpoint}/blobs/{{blob}}/acl/{{user}}", delete_acl, methods=["DELETE"]),
+        Route(f"{endpoint}/blobs/{{blob}}/acl", get_acl, methods=["GET"]),
+        Route(f"{endpoint}/blobs/{{blob}}/acl", put_acl, methods=["PUT"]),
+        Route(f"{endpoint}/blobs/{{blob}}/acl", patch_acl, methods=["PATCH"]),
+        Route(f"{endpoint}/blobs/{{blob}}/visibility", put_visibility, methods=["PUT"]),
+        Route(f"{endpoint}/blobs/{{blob}}/visibility", get_visibility, methods=["GET"]),
+        Route(f"{endpoint}/batch/create", batch_create, methods=["POST"]),
+        Route(f"{endpoint}/batch/delete", batch_delete, methods=["POST"]),
+        Route(f"{endpoint}/batch/visibility", batch_visibility, methods=["POST"]),
+        Route(f"{endpoint}/batch/acl", batch_acl, methods=["POST"])
+    ]
+
+async def _handle_server_error(_request: Request, error: Exception) -> Response:
+    logger.exception(error)
+    return JSONResponse({
+        "error": str(error)
+        }, 500)
+
+async def _handle_user_not_exists(_request: Request, error: Exception) -> Response:
+    return JSONResponse({
+        "error": str(error)
+        }, 401)
+
+async def _handle_service_error(_request: Request, error: Exception) -> Response:
+    logger.warning("Auth API unavailable: %s", error)
+    return JSONResponse({
+        "error": str(error)
+        }, 503)
+
+async def _handle_blob_not_found(_request: Request, error: Exception) -> Response:
+    return JSONResponse({
+        "error": str(error)
+        }, 404)
+
+async def _handle_invalid_token(_request: Request, error: Exception) -> Response:
+    return JSONResponse({
+        "error": str(error)
+        }, 403)
+
+async def _handle_upload_not_found(_request: Request, error: Exception) -> Response:
+    return JSONResponse({
+        "error": str(error)
+        }, 404)
+
+def create_app(
+        auth_api: str,
+        db_path: str = "pyblob.db",
+        db_pool_size: int = 0,
+        db_synchronous: str = None,
+        threads: int = 0) -> Starlette:
+    """
+    Creates the asynchronous APDI application with all its routes.
+
+    The database and the authentication client are opened when the application
+    starts and closed when it stops.
+
+    Args:
+        auth_api: The root URL of the authentication API.
+        db_path: The path of the database.
+        db_pool_size: The number of pooled database connections, 0 to share a single one.
+        db_synchronous: The SQLite synchronous level, None to keep the default.
+        threads: The number of threads running database and file work,
+            0 to keep the default of the event loop.
+
+    Returns:
+        The APDI application.
+    """
+    @asynccontextmanager
+    async def lifespan(_app: Starlette):
+        if threads > 0:
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(threads, thread_name_prefix="apdi"))
+
+        db.connect(db_path, db_pool_size, db_synchronous)
+        await services.start(auth_api)
+
+        try:
+            yield
+        finally:
+            await services.stop()
+            db.close()
+
+    return Starlette(
+        routes=_routes(),
+        exception_handlers={
+            exceptions.adiauth.UserNotExists: _handle_user_not_exists,
+            exceptions.adiauth.ServiceError: _handle_service_error,
+            exceptions.BlobNotFoundError: _handle_blob_not_found,
+            exceptions.UploadNotFoundError: _handle_upload_not_found,
+            exceptions.InvalidTokenError: _handle_invalid_token,
+            Exception: _handle_server_error
+        },
+        lifespan=lifespan)
@@ -0,0 +1,755 @@
+"""
+This module contains the asynchronous counterparts of the functions in blobsapdi.services.
+
+Tokens are resolved with a non-blocking client of the authentication API, while
+database and file accesses run in the default executor of the event loop, so
+slow clients only hold a coroutine instead of a whole thread.
+"""
+
+import asyncio
+
+from typing import AsyncIterator, Iterator
+
+from blobsapdi import exceptions
+from blobsapdi import services
+
+from blobsapdi._logger import LOGGER
+from blobsapdi.aio._client import _AsyncAuthClient
+from blobsapdi.entities.blob import _DBBlob, _ReadOnlyBlob, Blob
+from blobsapdi.entities.client import _AUTH_OPTIONS
+from blobsapdi.enums import Visibility
+from blobsapdi.objects import _MultiHasher
+from blobsapdi.objects._multipart import _UploadSession
+from blobsapdi.objects._signer import _MAX_URL_TTL, _URL_TTL, _Signer
+
+
+logger = LOGGER
+
+_CLIENT: _AsyncAuthClient = None
+
+async def start(auth_api: str) -> None:
+    """
+    Opens the connections to the authentication API, with the pool, timeouts and
+    circuit breaker configured through Client.configure_http.
+
+    Args:
+        auth_api: The root URL of the authentication API.
+    """
+    global _CLIENT # pylint: disable=global-statement
+
+    _CLIENT = _AsyncAuthClient(auth_api, **_AUTH_OPTIONS)
+
+async def stop() -> None:
+    """
+    Closes the connections to the authentication API.
+    """
+    global _CLIENT # pylint: disable=global-statement
+
+    if _CLIENT is not None:
+        await _CLIENT.close()
+        _CLIENT = None
+
+def auth_stats() -> dict[str, int | str]:
+    """
+    Gets the state and counters of the circuit breaker of the authentication API.
+
+    Returns:
+        A dictionary with the circuit breaker statistics.
+    """
+    if _CLIENT is None:
+        raise RuntimeError("The async services were not started")
+
+    return _CLIENT.breaker.stats()
+
+async def _fetch_username(user_token: str) -> str:
+    if _CLIENT is None:
+        raise RuntimeError("The async services were not started")
+
+    return await _CLIENT.token_owner(user_token)
+
+async def _get_blob_only_owner(blob_id: str, user_token: str) -> _DBBlob:
+    username = await _fetch_username(user_token)
+
+    return await asyncio.to_thread(services.get_owned_blob, blob_id, username)
+
+async def create_blob(
+        user_token: str,
+        visibility: Visibility = Visibility.PRIVATE) -> _DBBlob:
+    """
+    Creates a new Blob object and inserts it into the database.
+
+    Args:
+        user_token: The token of the user creating the blob.
+        visibility: Visibility of the blob.
+
+    Returns:
+        Blob: The created Blob object
+
+    Raises:
+        UserNotExists: If the user token is invalid.
+    """
+    username = await _fetch_username(user_token)
+
+    blob = await asyncio.to_thread(Blob.create, username, visibility)
+
+    logger.debug("Created blob %s for user %s", blob.id_, username)
+
+    return blob
+
+async def update_blob(
+        blob_id: str,
+        user_token: str,
+        chunks: AsyncIterator[bytes]) -> _DBBlob:
+    """
+    Updates the contents of a Blob object in the database.
+
+    The chunks are gathered into buffers of the same size the synchronous
+    service reads, and every buffer is written and hashed in the executor.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of the Blob owner.
+        chunks: The data to write to the Blob, as it is received.
+
+    Returns:
+        Blob: The updated Blob object.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the user token is invalid.
+    """
+    blob = await _get_blob_only_owner(blob_id, user_token)
+
+    logger.debug("Writing to blob %s", blob_id)
+
+    hasher = _MultiHasher(services.AVAILABLE_HASHES)
+
+    def _write(tmp, buffer: bytes) -> None:
+        tmp.write(buffer)
+        hasher.update(buffer)
+
+    writer = blob.atomic_writer()
+
+    try:
+        tmp = await asyncio.to_thread(writer.__enter__)
+
+        try:
+            buffer = bytearray()
+
+            async for chunk in chunks:
+                buffer += chunk
+
+                if len(buffer) >= services.BUFF_SIZE:
+                    await asyncio.to_thread(_write, tmp, bytes(buffer))
+                    buffer.clear()
+
+            if buffer:
+                await asyncio.to_thread(_write, tmp, bytes(buffer))
+        except BaseException as e:
+            await asyncio.to_thread(writer.__exit__, type(e), e, e.__traceback__)
+            raise
+
+        await asyncio.to_thread(writer.__exit__, None, None, None)
+        await asyncio.to_thread(blob.update_hashes, hasher.hexdigests())
+    except BaseException:
+        blob.close()
+        raise
+
+    return await asyncio.to_thread(blob.reopen)
+
+async def update_blob_visibility(blob_id: str, user_token: str, visibility: Visibility) -> None:
+    """
+    Updates the visibility of a Blob object in the database.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of the Blob owner.
+        visibility: The new visibility of the Blob.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the user token is invalid.
+    """
+    blob = await _get_blob_only_owner(blob_id, user_token)
+
+    await asyncio.to_thread(setattr, blob, "visibility", visibility)
+
+async def delete_blob(blob_id: str, user_token: str) -> None:
+    """
+    Deletes a Blob object from the database.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of the Blob owner.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the user token is invalid.
+    """
+    blob = await _get_blob_only_owner(blob_id, user_token)
+
+    await asyncio.to_thread(blob.delete)
+
+async def get_hash_blob(blob_id: str, user_token: str, hashes_types: list[str]) -> dict[str, str]:
+    """
+    Gets the hashes of a Blob object from the database.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of the Blob owner.
+        hashes_types: The hash algorithms to get.
+
+    Returns:
+        dict[str, str]: The hashes of the Blob by algorithm.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the user token is invalid.
+    """
+    blob = await get_blob(blob_id, user_token)
+
+    return await asyncio.to_thread(services.get_blob_hashes, blob, hashes_types)
+
+async def get_blob(blob_id: str, user_token: str) -> _DBBlob:
+    """
+    Gets a Blob object from the database.
+
+    Args:
+        blob_id: The ID of the Blob.
+
+    Returns:
+        Blob: The Blob object.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the Blob is not public and the user token is invalid.
+    """
+    record = await asyncio.to_thread(Blob.fetch_record, blob_id)
+    username = None
+
+    # Public Blobs are served without resolving the token
+    if user_token is not None and not services.is_public_blob(blob_id, record):
+        username = await _fetch_username(user_token)
+
+    return await asyncio.to_thread(services.get_readable_blob, blob_id, username, record)
+
+async def open_blob(blob_id: str, user_token: str) -> _ReadOnlyBlob:
+    """
+    Opens a Blob only to read its contents, through a reader shared with the other
+    readers of the same contents and kept open for the next ones.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of a user allowed to read the Blob, None for public Blobs.
+
+    Returns:
+        The read-only Blob.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the Blob is not public and the user token is invalid.
+    """
+    record = await asyncio.to_thread(Blob.fetch_record, blob_id)
+    username = None
+
+    # Public Blobs are served without resolving the token
+    if user_token is not None and not services.is_public_blob(blob_id, record):
+        username = await _fetch_username(user_token)
+
+    return await asyncio.to_thread(services.open_readable_blob, blob_id, username, record)
+
+async def get_user_blobs(user_token: str) -> list[str]:
+    """
+    Gets all Blobs owned by a user.
+
+    Args:
+        user_token: The token of the user.
+
+    Returns:
+        list[Blob]: A list of Blobs owned by the user.
+
+    Raises:
+        UserNotExists: If the user token is invalid.
+    """
+    username = await _fetch_username(user_token)
+
+    return await asyncio.to_thread(lambda: list(Blob.fetch_user_blobs(username)))
+
+async def get_user_blobs_page(
+        user_token: str,
+        limit: int,
+        after: str = None) -> tuple[list[str], str | None]:
+    """
+    Gets a page of the IDs of the Blobs owned by a user, ordered by ID.
+
+    Args:
+        user_token: The token of the user.
+        limit: The maximum number of IDs of the page.
+        after: The last ID of the previous page, None for the first page.
+
+    Returns:
+        The IDs of the page and its last ID, or None if it is the last page.
+
+    Raises:
+        UserNotExists: If the user token is invalid.
+    """
+    username = await _fetch_username(user_token)
+
+    return await asyncio.to_thread(Blob.fetch_user_blobs(username).page, limit, after)
+
+async def iter_user_blobs(user_token: str, after: str = None) -> Iterator[str]:
+    """
+    Iterates over the IDs of the Blobs owned by a user, reading them page by page.
+
+    The user is authenticated before returning. The returned iterator blocks on
+    the database, so it must be consumed in a worker thread.
+
+    Args:
+        user_token: The token of the user.
+        after: The ID after which to start, None to start from the first one.
+
+    Raises:
+        UserNotExists: If the user token is invalid.
+    """
+    username = await _fetch_username(user_token)
+
+    return Blob.fetch_user_blobs(username).iter_after(after)
+
+async def remove_read_permission(blob_id: str, user_token: str, username: str) -> None:
+    """
+    Removes a user from the list of users allowed to read a Blob.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of the Blob owner.
+        username: The username of the user to remove.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the user token is invalid.
+    """
+    blob = await _get_blob_only_owner(blob_id, user_token)
+
+    await asyncio.to_thread(blob.remove_permissions, username)
+
+async def get_read_permissions(blob_id: str, user_token: str) -> list[str] | None:
+    """
+    Gets all users allowed to read a Blob.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of the Blob owner.
+
+    Returns:
+        list[str]: A list of usernames allowed to read the Blob or None if the Blob is public.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the user token is invalid.
+    """
+    blob = await _get_blob_only_owner(blob_id, user_token)
+
+    def _read() -> list[str] | None:
+        if blob.visibility == Visibility.PUBLIC:
+            return None
+
+        return list(blob.allowed_users)
+
+    return await asyncio.to_thread(_read)
+
+async def put_read_permissions(blob_id: str, user_token: str, usernames: set[str]) -> None:
+    """
+    Sets the list of users allowed to read a Blob.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of the Blob owner.
+        usernames: The list of usernames to set.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the user token is invalid.
+    """
+    blob = await _get_blob_only_owner(blob_id, user_token)
+
+    await asyncio.to_thread(setattr, blob, "allowed_users", usernames)
+
+async def patch_read_permissions(blob_id: str, user_token: str, usernames: set[str]) -> None:
+    """
+    Adds users to the list of users allowed to read a Blob.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of the Blob owner.
+        usernames: The list of usernames to add.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the user token is invalid.
+    """
+    blob = await _get_blob_only_owner(blob_id, user_token)
+
+    def _patch() -> None:
+        blob.allowed_users |= usernames
+
+    await asyncio.to_thread(_patch)
+
+async def get_blob_visibility(blob_id: str, user_token: str) -> Visibility:
+    """
+    Gets the visibility of a Blob.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of the Blob owner.
+
+    Returns:
+        Visibility: The visibility of the Blob.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found.
+        UserNotExists: If the user token is invalid.
+    """
+    blob = await _get_blob_only_owner(blob_id, user_token)
+
+    return await asyncio.to_thread(lambda: blob.visibility)
+
+async def create_blobs(user_token: str, visibilities: list[Visibility]) -> list[str]:
+    """
+    Creates several Blobs with a single authentication and transaction.
+
+    Args:
+        user_token: The token of the user creating the Blobs.
+        visibilities: The visibility of every Blob.
+
+    Returns:
+        list[str]: The IDs of the created Blobs, in the same order.
+
+    Raises:
+        UserNotExists: If the user token is invalid.
+    """
+    username = await _fetch_username(user_token)
+
+    blob_ids = await asyncio.to_thread(Blob.create_many, username, visibilities)
+
+    logger.debug("Created %d blobs for user %s", len(blob_ids), username)
+
+    return blob_ids
+
+async def delete_blobs(user_token: str, blob_ids: list[str]) -> set[str]:
+    """
+    Deletes several Blobs with a single authentication and transaction.
+
+    Args:
+        user_token: The token of the Blobs owner.
+        blob_ids: The IDs of the Blobs.
+
+    Returns:
+        set[str]: The IDs of the deleted Blobs, the ones not found or not owned are skipped.
+
+    Raises:
+        UserNotExists: If the user token is invalid.
+    """
+    username = await _fetch_username(user_token)
+
+    return await asyncio.to_thread(Blob.delete_many, blob_ids, username)
+
+async def update_blobs_visibility(
+        user_token: str, visibilities: list[tuple[str, Visibility]]) -> set[str]:
+    """
+    Updates the visibility of several Blobs with a single authentication and transaction.
+
+    Args:
+        user_token: The token of the Blobs owner.
+        visibilities: The ID and new visibility of every Blob.
+
+    Returns:
+        set[str]: The IDs of the updated Blobs, the ones not found or not owned are skipped.
+
+    Raises:
+        UserNotExists: If the user token is invalid.
+    """
+    username = await _fetch_username(user_token)
+
+    return await asyncio.to_thread(Blob.update_visibility_many, username, visibilities)
+
+async def update_blobs_permissions(
+        user_token: str,
+        permissions: list[tuple[str, set[str]]],
+        replace: bool = True) -> set[str]:
+    """
+    Updates the users allowed to read several Blobs with a single authentication and transaction.
+
+    Args:
+        user_token: The token of the Blobs owner.
+        permissions: The ID of every Blob and the usernames to allow.
+        replace: Whether the usernames replace the allowed ones or are added to them.
+
+    Returns:
+        set[str]: The IDs of the updated Blobs, the ones not found or not owned are skipped.
+
+    Raises:
+        UserNotExists: If the user token is invalid.
+    """
+    username = await _fetch_username(user_token)
+
+    return await asyncio.to_thread(
+        Blob.update_permissions_many, username, permissions, replace)
+
+async def create_upload(blob_id: str, user_token: str) -> str:
+    """
+    Starts a resumable upload of the contents of a Blob, whose parts are uploaded separately.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of the Blob owner.
+
+    Returns:
+        str: The ID of the upload.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found or is not owned by the user.
+        UserNotExists: If the user token is invalid.
+    """
+    username = await _fetch_username(user_token)
+
+    await asyncio.to_thread(services.check_owned_blob, blob_id, username)
+
+    session = await asyncio.to_thread(_UploadSession.create, blob_id)
+
+    logger.debug("Started upload %s of blob %s", session.upload_id, blob_id)
+
+    return session.upload_id
+
+async def upload_part(
+        blob_id: str,
+        upload_id: str,
+        part_number: int,
+        user_token: str,
+        chunks: AsyncIterator[bytes]) -> int:
+    """
+    Uploads a part of a resumable upload, replacing the part with the same number if any.
+
+    Args:
+        blob_id: The ID of the Blob.
+        upload_id: The ID of the upload.
+        part_number: The number of the part, starting from 1.
+        user_token: The token of the Blob owner.
+        chunks: The data of the part, as it is received.
+
+    Returns:
+        int: The size of the part.
+
+    Raises:
+        ValueError: If the part number is out of range.
+        BlobNotFoundError: If the Blob was not found or is not owned by the user.
+        UploadNotFoundError: If the upload was not found.
+        UserNotExists: If the user token is invalid.
+    """
+    username = await _fetch_username(user_token)
+
+    session = await asyncio.to_thread(services.open_owned_upload, blob_id, upload_id, username)
+
+    writer = session.part_writer(part_number)
+    size = 0
+
+    try:
+        tmp = await asyncio.to_thread(writer.__enter__)
+
+        try:
+            buffer = bytearray()
+
+            async for chunk in chunks:
+                buffer += chunk
+
+                if len(buffer) >= services.BUFF_SIZE:
+                    await asyncio.to_thread(tmp.write, bytes(buffer))
+                    size += len(buffer)
+                    buffer.clear()
+
+            if buffer:
+                await asyncio.to_thread(tmp.write, bytes(buffer))
+                size += len(buffer)
+        except BaseException as e:
+            await asyncio.to_thread(writer.__exit__, type(e), e, e.__traceback__)
+            raise
+
+        await asyncio.to_thread(writer.__exit__, None, None, None)
+    except FileNotFoundError as e:
+        raise exceptions.UploadNotFoundError(upload_id) from e
+
+    return size
+
+async def get_upload_parts(blob_id: str, upload_id: str, user_token: str) -> dict[int, int]:
+    """
+    Gets the parts uploaded so far, to resume an interrupted upload.
+
+    Args:
+        blob_id: The ID of the Blob.
+        upload_id: The ID of the upload.
+        user_token: The token of the Blob owner.
+
+    Returns:
+        dict[int, int]: The size of every uploaded part by number.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found or is not owned by the user.
+        UploadNotFoundError: If the upload was not found.
+        UserNotExists: If the user token is invalid.
+    """
+    username = await _fetch_username(user_token)
+
+    session = await asyncio.to_thread(services.open_owned_upload, blob_id, upload_id, username)
+
+    return await asyncio.to_thread(session.parts)
+
+async def complete_upload(
+        blob_id: str,
+        upload_id: str,
+        user_token: str,
+        parts: list[int] = None) -> _DBBlob:
+    """
+    Replaces the contents of a Blob with the concatenation of the parts of an upload.
+
+    Args:
+        blob_id: The ID of the Blob.
+        upload_id: The ID of the upload.
+        user_token: The token of the Blob owner.
+        parts: The numbers of the parts in ascending order, every uploaded part if None.
+
+    Returns:
+        Blob: The updated Blob object.
+
+    Raises:
+        ValueError: If the parts are not valid.
+        BlobNotFoundError: If the Blob was not found or is not owned by the user.
+        UploadNotFoundError: If the upload was not found.
+        UserNotExists: If the user token is invalid.
+    """
+    username = await _fetch_username(user_token)
+
+    return await asyncio.to_thread(
+        services.complete_owned_upload, blob_id, upload_id, username, parts)
+
+async def abort_upload(blob_id: str, upload_id: str, user_token: str) -> None:
+    """
+    Discards an upload and every part uploaded to it.
+
+    Args:
+        blob_id: The ID of the Blob.
+        upload_id: The ID of the upload.
+        user_token: The token of the Blob owner.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found or is not owned by the user.
+        UploadNotFoundError: If the upload was not found.
+        UserNotExists: If the user token is invalid.
+    """
+    username = await _fetch_username(user_token)
+
+    session = await asyncio.to_thread(services.open_owned_upload, blob_id, upload_id, username)
+
+    await asyncio.to_thread(session.remove)
+
+async def create_download_token(blob_id: str, user_token: str) -> tuple[str, int]:
+    """
+    Creates a short-lived token to download the current contents of a Blob without
+    authenticating again, for instance to fetch several ranges in parallel.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of a user allowed to read the Blob, None for public Blobs.
+
+    Returns:
+        tuple[str, int]: The token and the time it expires at, in seconds since the epoch.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the user token is invalid.
+    """
+    blob = await get_blob(blob_id, user_token)
+
+    def _etag() -> str:
+        with blob:
+            return blob.etag
+
+    etag = await asyncio.to_thread(_etag)
+
+    return _Signer.from_env().sign("download", blob_id, etag)
+
+async def get_blob_by_token(blob_id: str, token: str) -> _ReadOnlyBlob:
+    """
+    Opens a Blob to be read with a download token, without the authentication API
+    nor the permissions of the Blob.
+
+    Args:
+        blob_id: The ID of the Blob.
+        token: A token created by create_download_token.
+
+    Returns:
+        The read-only Blob, with the same contents the token was created for.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found.
+        InvalidTokenError: If the token is not valid for the Blob or its contents changed.
+    """
+    return await asyncio.to_thread(services.get_blob_by_token, blob_id, token)
+
+async def create_presigned_url(
+        blob_id: str, user_token: str, ttl: int = _URL_TTL) -> tuple[int, str]:
+    """
+    Signs a URL to download a Blob without authenticating, until it expires.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of a user allowed to read the Blob, None for public Blobs.
+        ttl: The number of seconds the URL is valid for.
+
+    Returns:
+        tuple[int, str]: The time the URL expires at, in seconds since the epoch,
+            and its signature.
+
+    Raises:
+        ValueError: If the ttl is out of range.
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the user token is invalid.
+    """
+    if not 0 < ttl <= _MAX_URL_TTL:
+        raise ValueError(f"Expiration must be between 1 and {_MAX_URL_TTL} seconds")
+
+    blob = await get_blob(blob_id, user_token)
+    await asyncio.to_thread(blob.close)
+
+    token, expires = _Signer.from_env().sign("url", blob_id, ttl=ttl)
+
+    return expires, token.partition(".")[2]
+
+async def get_blob_by_signature(blob_id: str, expires: str, signature: str) -> _ReadOnlyBlob:
+    """
+    Opens a Blob to be read with a signed URL, without the authentication API
+    nor the permissions of the Blob.
+
+    Args:
+        blob_id: The ID of the Blob.
+        expires: The expiration time of the URL, as given in its query.
+        signature: The signature of the URL, as given in its query.
+
+    Returns:
+        The read-only Blob.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found.
+        InvalidTokenError: If the signature is not valid for the Blob or the URL expired.
+    """
+    return await asyncio.to_thread(services.get_blob_by_signature, blob_id, expires, signature)
@@ -7,5 +7,6 @@ from blobsapdi.db._dao import _DAO
 
 connect = _DAO.connect
 close = _DAO.close
+stats = _DAO.stats
 
-__all__ = ['_DAO', 'connect', 'close']
+__all__ = ['_DAO', 'connect', 'close', 'stats']
@@ -5,11 +5,16 @@ for interacting with the SQLite database.
 
 import logging
 import sqlite3
+import time
 
+from contextlib import contextmanager
 from os import PathLike
 from threading import Lock
+from typing import Callable, Iterator
 
 from blobsapdi import exceptions
+from blobsapdi.db._pool import _ConnectionPool
+from blobsapdi.objects import _LRUCache
 
 
 logger = logging.getLogger("APDI")
@@ -20,6 +25,10 @@ class _Dao:
     """
     BLOBS = 'blobs'
     PERMS = 'perms'
+    HASHES = 'hashes'
+    CONTENTS = 'contents'
+
+    SYNCHRONOUS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
 
     LOCK = Lock()
 
@@ -29,39 +38,228 @@ class _Dao:
         """
         self._conn = None
         self._cursor = None
-
-    def connect(self, db_name: PathLike) -> '_Dao':
+        self._pool = None
+
+        self._meta_cache = _LRUCache(maxsize=4096, ttl=30)
+        self._meta_lock = Lock()
+        self._meta_fills: dict[str, object] = {}
+        self._stale_ids: set[str] = set()
+        self._unreferenced: list[tuple[Callable[[str], None], str]] = []
+
+        self._lock_stats = {
+            "acquisitions": 0,
+            "contended": 0,
+            "wait_seconds": 0.0
+        }
+
+    def connect(
+            self,
+            db_name: PathLike,
+            pool_size: int = 0,
+            synchronous: str = None) -> '_Dao':
         """
         Connects to the specified SQLite database and creates the necessary tables.
 
+        With a pool size of 0 a single connection is shared by every thread and
+        every query is serialized. Otherwise up to pool_size connections in WAL
+        mode are opened so readers run in parallel with the single writer.
+
         Args:
             db_name: The name of the database to connect to.
+            pool_size: The maximum number of pooled connections, 0 disables the pool.
+            synchronous: The PRAGMA synchronous level of the connections.
         """
 
         logger.info("Connecting to database %s", db_name)
 
-        self._conn = sqlite3.connect(db_name, check_same_thread=False)
-        self._cursor = self._conn.cursor()
+        if synchronous is not None and synchronous.upper() not in self.SYNCHRONOUS:
+            raise ValueError(f"Invalid synchronous level: {synchronous}")
 
-        _query = f'''CREATE TABLE IF NOT EXISTS {self.BLOBS} (
-            id TEXT,
-            owner TEXT,
-            visibility TEXT,
-            PRIMARY KEY (id))'''
+        if pool_size > 0 and str(db_name) == ':memory:':
+            logger.warning("In-memory databases cannot be pooled, using a single connection")
+            pool_size = 0
 
-        self._cursor.execute(_query)
+        def _open() -> sqlite3.Connection:
+            _conn = sqlite3.connect(db_name, check_same_thread=False)
 
-        _query = f'''CREATE TABLE IF NOT EXISTS {self.PERMS} (
-            id TEXT,
-            user TEXT UNIQUE,
-            perms INTEGER DEFAULT 0 NOT NULL,
-            PRIMARY KEY (id, user),
-            FOREIGN KEY (id) REFERENCES {self.BLOBS}(id))'''
+            if pool_size > 0:
+                _conn.execute('PRAGMA journal_mode=WAL')
+            if synchronous is not None:
+                _conn.execute(f'PRAGMA synchronous={synchronous.upper()}')
 
-        self._cursor.execute(_query)
+            return _conn
+
+        self._pool = None
+        self._conn = None
+        self._cursor = None
+
+        self._meta_cache.clear()
+
+        if pool_size > 0:
+            self._pool = _ConnectionPool(_open, pool_size)
+        else:
+            self._conn = _open()
+            self._cursor = self._conn.cursor()
+
+        self._migrate()
 
         return self
 
+    @contextmanager
+    def _locked(self, lock: Lock) -> Iterator[None]:
+        """
+        Holds a lock for the duration of the context, recording how often and how long it was waited.
+        """
+        if not lock.acquire(blocking=False):
+            _start = time.perf_counter()
+            lock.acquire()
+            self._lock_stats["contended"] += 1
+            self._lock_stats["wait_seconds"] += time.perf_counter() - _start
+
+        self._lock_stats["acquisitions"] += 1
+
+        try:
+            yield
+        finally:
+            lock.release()
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Gets a cursor to run read-only queries.
+
+        Yields:
+            A cursor of the shared connection or of a pooled one.
+        """
+        if self._pool is None:
+            with self._locked(_Dao.LOCK):
+                yield self._cursor
+            return
+
+        with self._pool.connection() as _conn:
+            yield _conn.cursor()
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Gets a cursor to run queries inside a single transaction.
+
+        The transaction is committed when the context exits cleanly and rolled back otherwise.
+        The cached metadata of the blobs marked stale meanwhile is invalidated once the
+        transaction ends, and the contents left unreferenced are discarded once it commits,
+        both before the lock is released.
+
+        Yields:
+            A cursor of the shared connection or of a pooled one.
+        """
+        with self._locked(_Dao.LOCK):
+            try:
+                if self._pool is None:
+                    with self._conn:
+                        yield self._cursor
+                else:
+                    with self._pool.connection() as _conn, _conn:
+                        yield _conn.cursor()
+            except BaseException:
+                # The references were restored by the rollback
+                self._unreferenced.clear()
+                raise
+            finally:
+                for _id in self._stale_ids:
+                    self._invalidate_meta(_id)
+
+                self._stale_ids.clear()
+
+            _unreferenced, self._unreferenced = self._unreferenced, []
+
+            for _discard, _digest in _unreferenced:
+                try:
+                    _discard(_digest)
+                except OSError as e:
+                    logger.warning("Could not discard the contents %s: %s", _digest, e)
+
+    def _migrations(self) -> tuple[tuple[str, ...], ...]:
+        """
+        Returns the schema migrations, the n-th one upgrades the schema to version n + 1.
+        """
+        return (
+            (
+                f'''CREATE TABLE IF NOT EXISTS {self.BLOBS} (
+                    id TEXT,
+                    owner TEXT,
+                    visibility TEXT,
+                    PRIMARY KEY (id))''',
+                f'''CREATE TABLE IF NOT EXISTS {self.PERMS} (
+                    id TEXT,
+                    user TEXT UNIQUE,
+                    perms INTEGER DEFAULT 0 NOT NULL,
+                    PRIMARY KEY (id, user),
+                    FOREIGN KEY (id) REFERENCES {self.BLOBS}(id))''',
+            ),
+            (
+                f'''CREATE TABLE {self.PERMS}_v2 (
+                    id TEXT,
+                    user TEXT,
+                    perms INTEGER DEFAULT 0 NOT NULL,
+                    PRIMARY KEY (id, user),
+                    FOREIGN KEY (id) REFERENCES {self.BLOBS}(id))''',
+                f'''INSERT INTO {self.PERMS}_v2 (id, user, perms)
+                    SELECT id, user, perms FROM {self.PERMS}''',
+                f'''DROP TABLE {self.PERMS}''',
+                f'''ALTER TABLE {self.PERMS}_v2 RENAME TO {self.PERMS}''',
+                f'''CREATE INDEX IF NOT EXISTS idx_{self.PERMS}_user
+                    ON {self.PERMS} (user, id)''',
+                f'''CREATE INDEX IF NOT EXISTS idx_{self.BLOBS}_owner
+                    ON {self.BLOBS} (owner, id)''',
+            ),
+            (
+                f'''ALTER TABLE {self.BLOBS} ADD COLUMN etag TEXT''',
+            ),
+            (
+                f'''ALTER TABLE {self.BLOBS}
+                    ADD COLUMN generation INTEGER DEFAULT 0 NOT NULL''',
+                f'''CREATE TABLE IF NOT EXISTS {self.HASHES} (
+                    id TEXT,
+                    algorithm TEXT,
+                    digest TEXT NOT NULL,
+                    generation INTEGER NOT NULL,
+                    PRIMARY KEY (id, algorithm),
+                    FOREIGN KEY (id) REFERENCES {self.BLOBS}(id))''',
+            ),
+            (
+                f'''ALTER TABLE {self.BLOBS} ADD COLUMN content TEXT''',
+                f'''CREATE TABLE IF NOT EXISTS {self.CONTENTS} (
+                    digest TEXT,
+                    refs INTEGER NOT NULL,
+                    PRIMARY KEY (digest))''',
+            ),
+            (
+                f'''ALTER TABLE {self.BLOBS} ADD COLUMN encoding TEXT''',
+                f'''ALTER TABLE {self.BLOBS} ADD COLUMN frames TEXT''',
+            ),
+        )
+
+    def _migrate(self) -> None:
+        """
+        Creates the necessary tables and upgrades an existing schema in place.
+
+        The schema version is stored in PRAGMA user_version and every pending
+        migration is applied inside its own transaction.
+        """
+        for _version, _statements in enumerate(self._migrations(), start=1):
+            with self._write() as _cursor:
+                _cursor.execute('BEGIN IMMEDIATE')
+
+                if _cursor.execute('PRAGMA user_version').fetchone()[0] >= _version:
+                    continue
+
+                logger.info("Migrating database schema to version %d", _version)
+
+                for _statement in _statements:
+                    _cursor.execute(_statement)
+
+                _cursor.execute(f'PRAGMA user_version={_version}')
+
     def new_blob(self, _id: str, owner: str, visibility: int = False) -> None:
         """
         Inserts a new blob into the database.
@@ -78,12 +276,33 @@ class _Dao:
             VALUES (?, ?, ?)'''
 
         try:
-            with _Dao.LOCK:
-                self._cursor.execute(_query, (_id, owner, visibility))
-                self._conn.commit()
+            with self._write() as _cursor:
+                _cursor.execute(_query, (_id, owner, visibility))
         except sqlite3.IntegrityError:
             raise exceptions.BlobAlreadyExistsError(_id) from sqlite3.IntegrityError
 
+    def new_blobs(self, owner: str, blobs: list[tuple[str, int]]) -> None:
+        """
+        Inserts several new blobs of an owner in a single transaction.
+
+        Args:
+            owner: The owner of the blobs.
+            blobs: The ID and visibility of every blob.
+
+        Raises:
+            BlobAlreadyExistsError: If a blob with any of the IDs already exists,
+                in which case none is inserted.
+        """
+        _query = f'''INSERT INTO {self.BLOBS} (id, owner, visibility)
+            VALUES (?, ?, ?)'''
+
+        try:
+            with self._write() as _cursor:
+                _cursor.executemany(_query, [(_id, owner, _v) for _id, _v in blobs])
+        except sqlite3.IntegrityError:
+            raise exceptions.BlobAlreadyExistsError(
+                ", ".join(_id for _id, _ in blobs)) from sqlite3.IntegrityError
+
     def get_blob(self, _id: str) -> tuple[str, str, int]:
         """
         Retrieves a blob from the database.
@@ -101,10 +320,215 @@ class _Dao:
             FROM {self.BLOBS}
             WHERE id=?'''
 
-        with _Dao.LOCK:
-            self._cursor.execute(_query, (_id,))
+        with self._read() as _cursor:
+            _cursor.execute(_query, (_id,))
 
-            _r = self._cursor.fetchone()
+            _r = _cursor.fetchone()
+
+            if _r is None:
+                raise exceptions.BlobNotFoundError(_id)
+
+            return _r
+
+    def get_blob_access(self, _id: str, user: str | None) -> tuple[str, str, str, bool]:
+        """
+        Retrieves a blob and whether a user has been granted access to it, in a single query.
+
+        Access is never cached, so changes made by other processes apply at once.
+
+        Args:
+            _id: The ID of the blob to retrieve.
+            user: The user whose grant to check, None for anonymous access.
+
+        Returns:
+            tuple: The ID, owner and visibility of the blob and whether the user has a grant.
+
+        Raises:
+            BlobNotFoundError: If the blob with the specified ID is not found.
+        """
+        _query = f'''SELECT b.id, b.owner, b.visibility, EXISTS (
+                SELECT 1
+                FROM {self.PERMS} p
+                WHERE p.id=b.id AND p.user=?)
+            FROM {self.BLOBS} b
+            WHERE b.id=?'''
+
+        with self._read() as _cursor:
+            _cursor.execute(_query, (user, _id))
+
+            _r = _cursor.fetchone()
+
+            if _r is None:
+                raise exceptions.BlobNotFoundError(_id)
+
+            return _r[0], _r[1], _r[2], bool(_r[3])
+
+    def get_blob_record(self, _id: str) -> dict:
+        """
+        Retrieves the owner, visibility and allowed users of a blob along with
+        the metadata of its contents, in a single query.
+
+        The record is never answered from the cache, and the metadata of the
+        contents read with it refreshes the cache.
+
+        Args:
+            _id: The ID of the blob.
+
+        Returns:
+            dict: The owner, visibility, users and metadata of the contents of the blob.
+
+        Raises:
+            BlobNotFoundError: If the blob with the specified ID is not found.
+        """
+        return self._get_meta(_id, access=True)
+
+    def get_blob_meta(self, _id: str, cached: bool = True) -> dict:
+        """
+        Retrieves the metadata of the contents of a blob, from the cache if possible.
+
+        Args:
+            _id: The ID of the blob.
+            cached: Whether the cached metadata may be returned.
+
+        Returns:
+            dict: The etag, content, encoding, frames and generation of the blob.
+
+        Raises:
+            BlobNotFoundError: If the blob with the specified ID is not found.
+        """
+        return self._get_meta(_id, cached)
+
+    def _get_meta(self, _id: str, cached: bool = True, access: bool = False) -> dict:
+        """
+        Retrieves the metadata of the contents of a blob, from the cache if possible.
+
+        Only the contents are cached, the owner, visibility and permissions
+        of a blob are always read from the database.
+
+        Args:
+            _id: The ID of the blob.
+            cached: Whether the cached metadata may be returned.
+            access: Whether the owner, visibility and allowed users are read along,
+                which skips the cache.
+
+        Returns:
+            dict: The metadata of the blob, which must not be modified.
+
+        Raises:
+            BlobNotFoundError: If the blob with the specified ID is not found.
+        """
+        _meta = self._meta_cache.get(_id) if cached and not access else None
+
+        if _meta is not None:
+            return _meta
+
+        # Only the latest fill started after the last write of the blob is cached
+        _fill = object()
+
+        with self._meta_lock:
+            self._meta_fills[_id] = _fill
+
+        _query = f'''SELECT b.etag, b.content, b.encoding, b.frames, b.generation
+            FROM {self.BLOBS} b
+            WHERE b.id=?'''
+
+        if access:
+            _query = f'''SELECT b.etag, b.content, b.encoding, b.frames, b.generation,
+                    b.owner, b.visibility, p.user
+                FROM {self.BLOBS} b
+                LEFT JOIN {self.PERMS} p ON p.id=b.id
+                WHERE b.id=?'''
+
+        try:
+            with self._read() as _cursor:
+                _cursor.execute(_query, (_id,))
+                _rows = _cursor.fetchall()
+        finally:
+            with self._meta_lock:
+                _current = self._meta_fills.get(_id) is _fill
+
+                if _current:
+                    del self._meta_fills[_id]
+
+        if not _rows:
+            raise exceptions.BlobNotFoundError(_id)
+
+        _meta = {
+            "etag": _rows[0][0],
+            "content": _rows[0][1],
+            "encoding": _rows[0][2],
+            "frames": _rows[0][3],
+            "generation": _rows[0][4]
+        }
+
+        if _current:
+            # Unless a write invalidated the blob while it was read, the rows are current
+            self._meta_cache.put(_id, _meta)
+
+        if access:
+            return _meta | {
+                "owner": _rows[0][5],
+                "visibility": _rows[0][6],
+                "users": {_r[7] for _r in _rows if _r[7] is not None}
+            }
+
+        return _meta
+
+    def _stale(self, _id: str) -> None:
+        """
+        Marks the cached metadata of a blob to be invalidated when the running write ends.
+
+        Args:
+            _id: The ID of the blob.
+        """
+        self._stale_ids.add(_id)
+
+    def _invalidate_meta(self, _id: str) -> None:
+        """
+        Removes the cached metadata of a blob and drops the fills of it still running.
+
+        Args:
+            _id: The ID of the blob.
+        """
+        with self._meta_lock:
+            self._meta_fills.pop(_id, None)
+            self._meta_cache.pop(_id)
+
+    def configure_cache(self, maxsize: int, ttl: float) -> None:
+        """
+        Configures the cache of the metadata of blob contents.
+
+        Args:
+            maxsize: The maximum number of cached blobs, 0 disables the cache.
+            ttl: The number of seconds the metadata of a blob is cached.
+        """
+        self._meta_cache.maxsize = maxsize
+        self._meta_cache.ttl = ttl
+
+        self._meta_cache.clear()
+
+    def get_user_blob(self, _id: str, owner: str) -> tuple[str, str, int]:
+        """
+        Retrieves a blob from the database only if it is owned by a user.
+
+        Args:
+            _id: The ID of the blob to retrieve.
+            owner: The user that must own the blob.
+
+        Returns:
+            tuple: A tuple representing the blob.
+
+        Raises:
+            BlobNotFoundError: If the blob is not found or is not owned by the user.
+        """
+        _query = f'''SELECT id, owner, visibility
+            FROM {self.BLOBS}
+            WHERE id=? AND owner=?'''
+
+        with self._read() as _cursor:
+            _cursor.execute(_query, (_id, owner))
+
+            _r = _cursor.fetchone()
 
             if _r is None:
                 raise exceptions.BlobNotFoundError(_id)
@@ -127,34 +551,197 @@ class _Dao:
             SET owner=?, visibility=?
             WHERE id=?'''
 
-        with _Dao.LOCK:
-            self._cursor.execute(_query, (owner, visibility, _id))
+        with self._write() as _cursor:
+            _cursor.execute(_query, (owner, visibility, _id))
 
-            if self._cursor.rowcount == 0:
+            if _cursor.rowcount == 0:
                 raise exceptions.BlobNotFoundError(_id)
 
-            self._conn.commit()
-
-    def delete_blob(self, _id: str) -> None:
+    def delete_blob(self, _id: str, discard: Callable[[str], None] = None) -> None:
         """
-        Deletes a blob from the database.
+        Deletes a blob from the database, dropping its reference to its stored contents.
 
         Args:
             _id: The ID of the blob to delete.
-        
+            discard: A callable run once the transaction commits with the digest
+                of the stored contents, if no other blob references them.
+
         Raises:
             BlobNotFoundError: If the blob with the specified ID is not found.
         """
+        _content_query = f'''SELECT content
+            FROM {self.BLOBS}
+            WHERE id=?'''
+
         _query = f'''DELETE FROM {self.BLOBS}
             WHERE id=?'''
-  
-        with _Dao.LOCK:
-            self._cursor.execute(_query, (_id,))
 
-            if self._cursor.rowcount == 0:
+        _hashes_query = f'''DELETE FROM {self.HASHES}
+            WHERE id=?'''
+
+        with self._write() as _cursor:
+            self._stale(_id)
+
+            # Writing first locks the database before the reference is read
+            _cursor.execute(_hashes_query, (_id,))
+
+            _r = _cursor.execute(_content_query, (_id,)).fetchone()
+
+            if _r is None:
                 raise exceptions.BlobNotFoundError(_id)
 
-            self._conn.commit()
+            _cursor.execute(_query, (_id,))
+
+            if _r[0] is not None:
+                self._release_content(_cursor, _r[0], discard)
+
+    def delete_blobs(
+            self,
+            ids: list[str],
+            owner: str,
+            discard: Callable[[str], None] = None) -> set[str]:
+        """
+        Deletes several blobs of an owner in a single transaction, dropping
+        their references to their stored contents.
+
+        Args:
+            ids: The IDs of the blobs to delete.
+            owner: The user that must own the blobs.
+            discard: A callable run once the transaction commits with the digest
+                of the stored contents, if no other blob references them.
+
+        Returns:
+            set: The IDs of the deleted blobs, the ones not found or not owned are skipped.
+        """
+        _query = f'''DELETE FROM {self.BLOBS}
+            WHERE id=? AND owner=?
+            RETURNING content'''
+
+        _hashes_query = f'''DELETE FROM {self.HASHES}
+            WHERE id=?'''
+
+        _deleted = set()
+
+        with self._write() as _cursor:
+            for _id in dict.fromkeys(ids):
+                _r = _cursor.execute(_query, (_id, owner)).fetchone()
+
+                if _r is None:
+                    continue
+
+                _deleted.add(_id)
+                self._stale(_id)
+
+                _cursor.execute(_hashes_query, (_id,))
+
+                if _r[0] is not None:
+                    self._release_content(_cursor, _r[0], discard)
+
+        return _deleted
+
+    def update_blobs_visibility(
+            self, owner: str, visibilities: list[tuple[str, str]]) -> set[str]:
+        """
+        Updates the visibility of several blobs of an owner in a single transaction.
+
+        Args:
+            owner: The user that must own the blobs.
+            visibilities: The ID and new visibility of every blob.
+
+        Returns:
+            set: The IDs of the updated blobs, the ones not found or not owned are skipped.
+        """
+        _query = f'''UPDATE {self.BLOBS}
+            SET visibility=?
+            WHERE id=? AND owner=?'''
+
+        _updated = {}
+
+        with self._write() as _cursor:
+            for _id, _visibility in visibilities:
+                _cursor.execute(_query, (_visibility, _id, owner))
+
+                if _cursor.rowcount > 0:
+                    _updated[_id] = _visibility
+
+        return set(_updated)
+
+    def update_blobs_perms(
+            self,
+            owner: str,
+            perms: list[tuple[str, set[str]]],
+            replace: bool = True) -> set[str]:
+        """
+        Updates the permissions of several blobs of an owner in a single transaction.
+
+        Args:
+            owner: The user that must own the blobs.
+            perms: The ID of every blob and the users to grant permissions to.
+            replace: Whether the users replace the current permissions or are added to them.
+
+        Returns:
+            set: The IDs of the updated blobs, the ones not found or not owned are skipped.
+        """
+        _delete_query = f'''DELETE FROM {self.PERMS}
+            WHERE id=? AND id IN (SELECT id FROM {self.BLOBS} WHERE owner=?)'''
+
+        _insert_query = f'''INSERT OR IGNORE INTO {self.PERMS} (id, user, perms)
+            SELECT id, ?, 0
+            FROM {self.BLOBS}
+            WHERE id=? AND owner=?'''
+
+        _owned_query = f'''SELECT 1
+            FROM {self.BLOBS}
+            WHERE id=? AND owner=?'''
+
+        _updated = set()
+
+        with self._write() as _cursor:
+            for _id, _users in perms:
+                if replace:
+                    _cursor.execute(_delete_query, (_id, owner))
+
+                _cursor.executemany(_insert_query, [(_user, _id, owner) for _user in _users])
+
+                if _cursor.execute(_owned_query, (_id, owner)).fetchone() is not None:
+                    _updated.add(_id)
+
+        return _updated
+
+    def _release_content(
+            self,
+            cursor: sqlite3.Cursor,
+            digest: str,
+            discard: Callable[[str], None] | None) -> None:
+        """
+        Drops a reference to stored contents, discarding them if it was the last one.
+
+        Args:
+            cursor: The cursor of the running transaction.
+            digest: The digest of the contents.
+            discard: A callable run with the digest once the transaction commits,
+                if the contents are no longer referenced.
+        """
+        _query = f'''UPDATE {self.CONTENTS}
+            SET refs=refs - 1
+            WHERE digest=?'''
+
+        _refs_query = f'''SELECT refs
+            FROM {self.CONTENTS}
+            WHERE digest=?'''
+
+        _delete_query = f'''DELETE FROM {self.CONTENTS}
+            WHERE digest=?'''
+
+        cursor.execute(_query, (digest,))
+
+        _r = cursor.execute(_refs_query, (digest,)).fetchone()
+
+        if _r is not None and _r[0] <= 0:
+            cursor.execute(_delete_query, (digest,))
+
+            if discard is not None:
+                self._unreferenced.append((discard, digest))
 
     def add_perms(self, _id: str, user: str) -> None:
         """ 
@@ -183,9 +770,8 @@ class _Dao:
         _query = f'''INSERT OR IGNORE INTO {self.PERMS} (id, user, perms)
             VALUES (?, ?, ?)'''
 
-        with _Dao.LOCK:
-            self._cursor.executemany(_query, [(_id, user, 0) for user in users])
-            self._conn.commit()
+        with self._write() as _cursor:
+            _cursor.executemany(_query, [(_id, user, 0) for user in users])
 
     def remove_perms(self, _id: str, user: str) -> None:
         """ 
@@ -201,9 +787,8 @@ class _Dao:
         _query = f'''DELETE FROM {self.PERMS}
             WHERE id=? AND user=?'''
 
-        with _Dao.LOCK:
-            self._cursor.execute(_query, (_id, user))
-            self._conn.commit()
+        with self._write() as _cursor:
+            _cursor.execute(_query, (_id, user))
 
     def replace_perms(self, _id: str, users: set[str]) -> None:
         """
@@ -219,10 +804,12 @@ class _Dao:
         _query = f'''DELETE FROM {self.PERMS}
             WHERE id=?'''
 
-        with _Dao.LOCK:
-            self._cursor.execute(_query, (_id,))
+        _insert_query = f'''INSERT OR IGNORE INTO {self.PERMS} (id, user, perms)
+            VALUES (?, ?, ?)'''
 
-        self.bulk_add_perms(_id, users)
+        with self._write() as _cursor:
+            _cursor.execute(_query, (_id,))
+            _cursor.executemany(_insert_query, [(_id, user, 0) for user in users])
 
     def get_user_perms(self, _id: str, user: str) -> int:
         """
@@ -239,9 +826,9 @@ class _Dao:
             FROM {self.PERMS}
             WHERE id=? AND user=?'''
 
-        with _Dao.LOCK:
-            self._cursor.execute(_query, (_id, user))
-            _r = self._cursor.fetchone()
+        with self._read() as _cursor:
+            _cursor.execute(_query, (_id, user))
+            _r = _cursor.fetchone()
             return None if _r is None else _r[0]
 
     def get_blob_perms(self, _id: str) -> list[tuple[str, int]]:
@@ -258,9 +845,9 @@ class _Dao:
             FROM {self.PERMS}
             WHERE id=?'''
 
-        with _Dao.LOCK:
-            self._cursor.execute(_query, (_id,))
-            return self._cursor.fetchall()
+        with self._read() as _cursor:
+            _cursor.execute(_query, (_id,))
+            return _cursor.fetchall()
 
     def get_blobs(self, user: str) -> list[str]:
         """
@@ -276,9 +863,52 @@ class _Dao:
             FROM {self.BLOBS}
             WHERE owner=?'''
 
-        with _Dao.LOCK:
-            self._cursor.execute(_query, (user,))
-            return [_t[0] for _t in self._cursor.fetchall()]
+        with self._read() as _cursor:
+            _cursor.execute(_query, (user,))
+            return [_t[0] for _t in _cursor.fetchall()]
+
+    def get_blobs_page(self, user: str, limit: int, after: str = None) -> list[str]:
+        """
+        Retrieves a page of the blobs owned by a user, ordered by ID.
+
+        The page is read by seeking the (owner, id) index past the last ID of the
+        previous page, so every page costs the same regardless of its position.
+
+        Args:
+            user: The user whose blobs to retrieve.
+            limit: The maximum number of blobs of the page.
+            after: The last ID of the previous page, None for the first page.
+
+        Returns:
+            list[str]: The IDs of the blobs of the page.
+        """
+        _query = f'''SELECT id
+            FROM {self.BLOBS}
+            WHERE owner=? AND id>?
+            ORDER BY id
+            LIMIT ?'''
+
+        with self._read() as _cursor:
+            _cursor.execute(_query, (user, after or '', limit))
+            return [_t[0] for _t in _cursor.fetchall()]
+
+    def count_blobs(self, user: str) -> int:
+        """
+        Counts the blobs owned by a user.
+
+        Args:
+            user: The user whose blobs to count.
+
+        Returns:
+            int: The number of blobs owned by the user.
+        """
+        _query = f'''SELECT COUNT(*)
+            FROM {self.BLOBS}
+            WHERE owner=?'''
+
+        with self._read() as _cursor:
+            _cursor.execute(_query, (user,))
+            return _cursor.fetchone()[0]
 
     def get_blob_visibility(self, _id: str) -> str:
         """
@@ -297,9 +927,9 @@ class _Dao:
             FROM {self.BLOBS}
             WHERE id=?'''
 
-        with _Dao.LOCK:
-            self._cursor.execute(_query, (_id,))
-            _r = self._cursor.fetchone()
+        with self._read() as _cursor:
+            _cursor.execute(_query, (_id,))
+            _r = _cursor.fetchone()
 
             if _r is None:
                 raise exceptions.BlobNotFoundError(_id)
@@ -321,13 +951,203 @@ class _Dao:
             SET visibility=?
             WHERE id=?'''
 
-        with _Dao.LOCK:
-            self._cursor.execute(_query, (visibility, _id))
+        with self._write() as _cursor:
+            _cursor.execute(_query, (visibility, _id))
 
-            if self._cursor.rowcount == 0:
+            if _cursor.rowcount == 0:
                 raise exceptions.BlobNotFoundError(_id)
 
-            self._conn.commit()
+    def get_blob_etag(self, _id: str) -> str | None:
+        """
+        Retrieves the entity tag of the contents of a blob.
+
+        Args:
+            _id: The ID of the blob.
+
+        Returns:
+            str: The entity tag of the blob, None if it is not known yet.
+
+        Raises:
+            BlobNotFoundError: If the blob with the specified ID is not found.
+        """
+        return self._get_meta(_id)["etag"]
+
+    def update_blob_etag(self, _id: str, etag: str) -> None:
+        """
+        Updates the entity tag of the contents of a blob.
+
+        Args:
+            _id: The ID of the blob.
+            etag: The new entity tag of the blob.
+
+        Raises:
+            BlobNotFoundError: If the blob with the specified ID is not found.
+        """
+        _query = f'''UPDATE {self.BLOBS}
+            SET etag=?
+            WHERE id=?'''
+
+        with self._write() as _cursor:
+            _cursor.execute(_query, (etag, _id))
+
+            if _cursor.rowcount == 0:
+                raise exceptions.BlobNotFoundError(_id)
+
+            self._stale(_id)
+
+    def get_blob_hashes(self, _id: str) -> tuple[int, dict[str, str]]:
+        """
+        Retrieves the content generation of a blob and the digests computed for it.
+
+        Digests stored for a previous generation of the contents are not returned.
+
+        Args:
+            _id: The ID of the blob.
+
+        Returns:
+            tuple: The generation of the blob and its digests by algorithm.
+
+        Raises:
+            BlobNotFoundError: If the blob with the specified ID is not found.
+        """
+        _query = f'''SELECT b.generation, h.algorithm, h.digest
+            FROM {self.BLOBS} b
+            LEFT JOIN {self.HASHES} h ON h.id=b.id AND h.generation=b.generation
+            WHERE b.id=?'''
+
+        with self._read() as _cursor:
+            _cursor.execute(_query, (_id,))
+            _rows = _cursor.fetchall()
+
+        if not _rows:
+            raise exceptions.BlobNotFoundError(_id)
+
+        return _rows[0][0], {_r[1]: _r[2] for _r in _rows if _r[1] is not None}
+
+    def update_blob_contents(
+            self,
+            _id: str,
+            hashes: dict[str, str],
+            store: Callable[[], None] = None,
+            discard: Callable[[str], None] = None,
+            encoding: str = None,
+            frames: str = None,
+            replace: Callable[[], None] = None) -> int:
+        """
+        Starts a new content generation for a blob, replacing its digests and entity tag.
+
+        If a store callable is given the blob becomes a reference to the contents with
+        its SHA-256 digest, and its reference to the previous contents is dropped. The store
+        callable runs inside the transaction and the discard one once it commits, both
+        holding the database lock, so contents referenced by a concurrent upload are never
+        discarded. A replace callable also runs inside the transaction, so the digests
+        recorded by concurrent writers always match the contents left in place.
+
+        Args:
+            _id: The ID of the blob.
+            hashes: The digests of the new contents by algorithm, which must include sha256.
+            store: A callable that makes sure the new contents are in the content store.
+            discard: A callable run with the digest of the previous contents,
+                if no other blob references them.
+            encoding: The codec the new contents are compressed with, None if they are not.
+            frames: The serialized index of the frames of the compressed contents.
+            replace: A callable that puts the new contents in place of the previous ones.
+
+        Returns:
+            int: The new generation of the blob.
+
+        Raises:
+            BlobNotFoundError: If the blob with the specified ID is not found.
+        """
+        _query = f'''UPDATE {self.BLOBS}
+            SET generation=generation + 1, etag=?
+            WHERE id=?'''
+
+        _generation_query = f'''SELECT generation, content
+            FROM {self.BLOBS}
+            WHERE id=?'''
+
+        _content_query = f'''UPDATE {self.BLOBS}
+            SET content=?, encoding=?, frames=?
+            WHERE id=?'''
+
+        _delete_query = f'''DELETE FROM {self.HASHES}
+            WHERE id=?'''
+
+        _insert_query = f'''INSERT INTO {self.HASHES} (id, algorithm, digest, generation)
+            VALUES (?, ?, ?, ?)'''
+
+        _ref_query = f'''INSERT INTO {self.CONTENTS} (digest, refs)
+            VALUES (?, 1)
+            ON CONFLICT (digest) DO UPDATE SET refs=refs + 1'''
+
+        _content = hashes["sha256"] if store is not None else None
+
+        with self._write() as _cursor:
+            _cursor.execute(_query, (hashes["sha256"], _id))
+
+            if _cursor.rowcount == 0:
+                raise exceptions.BlobNotFoundError(_id)
+
+            _generation, _previous = _cursor.execute(_generation_query, (_id,)).fetchone()
+
+            _cursor.execute(_content_query, (_content, encoding, frames, _id))
+
+            _cursor.execute(_delete_query, (_id,))
+            _cursor.executemany(
+                _insert_query, [(_id, _a, _d, _generation) for _a, _d in hashes.items()])
+
+            if _content is not None:
+                _cursor.execute(_ref_query, (_content,))
+                store()
+
+            if replace is not None:
+                replace()
+
+            if _previous is not None:
+                self._release_content(_cursor, _previous, discard)
+
+            self._stale(_id)
+
+        return _generation
+
+    def content_stats(self) -> dict[str, int]:
+        """
+        Counts the distinct stored contents and the references of blobs to them.
+
+        Returns:
+            dict: The number of stored contents and of references.
+        """
+        _query = f'''SELECT COUNT(*), COALESCE(SUM(refs), 0)
+            FROM {self.CONTENTS}'''
+
+        with self._read() as _cursor:
+            _contents, _refs = _cursor.execute(_query).fetchone()
+
+        return {
+            "contents": _contents,
+            "references": _refs
+        }
+
+    def add_blob_hashes(self, _id: str, generation: int, hashes: dict[str, str]) -> None:
+        """
+        Stores digests computed for a generation of the contents of a blob.
+
+        Nothing is stored if the contents of the blob changed since that generation.
+
+        Args:
+            _id: The ID of the blob.
+            generation: The generation of the contents the digests were computed for.
+            hashes: The digests by algorithm.
+        """
+        _query = f'''INSERT OR REPLACE INTO {self.HASHES} (id, algorithm, digest, generation)
+            SELECT id, ?, ?, generation
+            FROM {self.BLOBS}
+            WHERE id=? AND generation=?'''
+
+        with self._write() as _cursor:
+            _cursor.executemany(
+                _query, [(_a, _d, _id, generation) for _a, _d in hashes.items()])
 
     def close(self) -> None:
         """
@@ -336,7 +1156,29 @@ class _Dao:
 
         logger.info("Closing database connection")
 
-        self._conn.close()
+        if self._pool is not None:
+            self._pool.close()
+        else:
+            self._conn.close()
+
+    def stats(self) -> dict:
+        """
+        Gets the lock contention and content store counters and, if enabled,
+        the connection pool counters.
+
+        Returns:
+            A dictionary with the database statistics.
+        """
+        _stats = {
+            "lock": dict(self._lock_stats),
+            "meta_cache": self._meta_cache.stats(),
+            "contents": self.content_stats()
+        }
+
+        if self._pool is not None:
+            _stats["pool"] = self._pool.stats()
+
+        return _stats
 
     def __enter__(self) -> '_Dao':
         return self
@@ -0,0 +1,101 @@
+"""
+This module contains the implementation of a pool of SQLite connections
+shared by the worker threads of the application.
+"""
+
+import queue
+import sqlite3
+import time
+
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Iterator
+
+
+class _ConnectionPool:
+    """
+    This class represents a bounded pool of SQLite connections.
+
+    Connections are created lazily up to the pool size and handed to one thread at a time.
+    """
+
+    def __init__(self, factory: Callable[[], sqlite3.Connection], size: int) -> None:
+        """
+        Initializes a new instance of the _ConnectionPool class.
+
+        Args:
+            factory: A callable that opens a new configured connection.
+            size: The maximum number of connections of the pool.
+        """
+        self._factory = factory
+        self._size = size
+
+        self._idle = queue.LifoQueue()
+        self._connections = []
+        self._lock = Lock()
+
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Checks out a connection for the duration of the context.
+
+        Yields:
+            A connection not used by any other thread.
+        """
+        _conn = self._checkout()
+
+        try:
+            yield _conn
+        finally:
+            self._idle.put(_conn)
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._connections) < self._size:
+                _conn = self._factory()
+                self._connections.append(_conn)
+                return _conn
+
+        _start = time.perf_counter()
+
+        _conn = self._idle.get()
+
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += time.perf_counter() - _start
+
+        return _conn
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Returns the size and contention counters of the pool.
+        """
+        with self._lock:
+            return {
+                "size": self._size,
+                "open": len(self._connections),
+                "idle": self._idle.qsize(),
+                "waits": self.waits,
+                "wait_seconds": self.wait_seconds
+            }
+
+    def close(self) -> None:
+        """
+        Closes every connection of the pool.
+        """
+        with self._lock:
+            for _conn in self._connections:
+                _conn.close()
+
+            self._connections.clear()
+            self._idle = queue.LifoQueue()
+
+__export__ = (_ConnectionPool,)
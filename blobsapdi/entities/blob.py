@@ -2,18 +2,81 @@
 This module contains the Blob class, which represents a Blob object 
 that can be stored in a database and synchronizes with a file in storage
 """
+import io
+import os
+
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from typing import BinaryIO
 from uuid import uuid4
 
+from blobsapdi import exceptions
 from blobsapdi.db import _DAO
-from blobsapdi.objects._file_blob import _FileBlob
+from blobsapdi.objects._compression import (
+    _codec, _CompressingWriter, _DecompressingReader, _FrameIndex)
+from blobsapdi.objects._content_store import _ContentStore, _backend
+from blobsapdi.objects._file_blob import _SUFIX, _FileBlob
+from blobsapdi.objects._hasher import _BUFF_SIZE, _MultiHasher
 from blobsapdi.enums import Visibility
+from blobsapdi.storage import _object_backend
+from blobsapdi.storage._backend import _BytesReader, _ObjectReader, _ObjectStat
+from blobsapdi.storage._content_cache import _ContentCache
+from blobsapdi.storage._local import _FileReader
+from blobsapdi.storage._object_blob import _ObjectBlob
+from blobsapdi.storage._shared import _ReaderView, _SharedReaders
+
+
+_PAGE_SIZE = 1000
+_READERS = _SharedReaders()
+_CONTENTS = _ContentCache()
+_UNKNOWN = object()
 
+def _invalidate(_id: str) -> None:
+    """
+    Drops the cached readers and contents of a Blob whose contents changed or were deleted.
+    """
+    _READERS.invalidate(_id)
+    _CONTENTS.invalidate(_id)
 
-class _DBBlob(_FileBlob):
+class _RecordedFileBlob(_FileBlob):
+    """
+    Represents the file holding the contents of a Blob, which are replaced
+    by update_hashes inside the transaction recording their digests.
+    """
+
+    _DEFER_REPLACE = True
+
+def _storage_class() -> type[_RecordedFileBlob] | type[_ObjectBlob]:
+    """
+    Returns the class holding the contents of the Blobs in the current storage backend.
+    """
+    return _ObjectBlob if _object_backend() is not None else _RecordedFileBlob
+
+class _DBBlob(io.RawIOBase):
     """
     Represents a Blob object that is stored in a database.
+
+    Its contents are stored as a file, or as an object of the storage backend
+    if one is set, and are read and written through the matching storage blob.
     """
 
+    _contents: _RecordedFileBlob | _ObjectBlob | None = None
+
+    @property
+    def id_(self) -> str:
+        """
+        Returns the ID of the Blob (read_only).
+        """
+        return self._contents.id_
+
+    @property
+    def file_path(self) -> str | None:
+        """
+        Returns the path of the file holding the contents of the Blob,
+        None if they are not in a local file.
+        """
+        return self._contents.file_path
+
     @property
     def owner(self) -> str:
         """
@@ -32,7 +95,10 @@ class _DBBlob(_FileBlob):
         Returns:
             The visibility of the Blob.
         """
-        return Visibility(_DAO.get_blob_visibility(self.id_))
+        if self._visibility is None:
+            self._visibility = _DAO.get_blob_visibility(self.id_)
+
+        return Visibility(self._visibility)
 
     @visibility.setter
     def visibility(self, value: Visibility) -> None:
@@ -44,6 +110,38 @@ class _DBBlob(_FileBlob):
         """
         _DAO.update_blob_visibility(self.id_, value.value)
 
+        self._visibility = value
+
+    @property
+    def etag(self) -> str:
+        """
+        Gets the entity tag of the Blob, the SHA-256 digest of its contents.
+
+        The digest is computed and stored the first time it is requested for a Blob
+        whose contents were not written through update_blob.
+
+        Returns:
+            The entity tag of the Blob.
+        """
+        _etag = _DAO.get_blob_etag(self.id_)
+
+        if _etag is None:
+            _etag = self.digests(['sha256'])['sha256']
+
+            _DAO.update_blob_etag(self.id_, _etag)
+
+        return _etag
+
+    @etag.setter
+    def etag(self, value: str) -> None:
+        """
+        Sets the entity tag of the Blob.
+
+        Args:
+            value: The new entity tag of the Blob.
+        """
+        _DAO.update_blob_etag(self.id_, value)
+
     @property
     def allowed_users(self) -> set[str]:
         """
@@ -67,28 +165,239 @@ class _DBBlob(_FileBlob):
     def __init__(
             self,
             _id: str,
-            owner: str) -> None:
+            owner: str,
+            visibility: Visibility | str = None,
+            grant: tuple[str, bool] = None,
+            meta: dict = None) -> None:
         """
         Initializes a new Blob object.
 
         Args:
             _id: The ID of the Blob.
             owner: The owner of the Blob.
-            public: Whether the Blob is public or not.
-            allowed_users: A list of users allowed to access the Blob.
-            in_db: Whether the Blob is currently stored in the database.
+            visibility: The visibility of the Blob, if already known.
+            grant: A user and whether it has been granted access to the Blob, if already known.
+            meta: The metadata of the contents of the Blob, if already read.
         """
-        super().__init__(_id)
+        _meta = meta or _DAO.get_blob_meta(_id)
+
+        try:
+            self._contents = _storage_class()(_id, _meta["content"])
+        except FileNotFoundError:
+            if _meta["content"] is None:
+                raise
+
+            # The cached contents were replaced by another process meanwhile
+            _meta = _DAO.get_blob_meta(_id, cached=False)
+            self._contents = _storage_class()(_id, _meta["content"])
 
         self.seek(0)
 
+        self._index = _FrameIndex.loads(_meta["frames"]) \
+            if _meta["encoding"] is not None else None
+        self._written = None
+
         self._owner = owner
+        self._visibility = visibility
+        self._grant = grant
+
+    def readable(self) -> bool:
+        return self._contents.readable()
+
+    def writable(self) -> bool:
+        return self._contents.writable()
+
+    def seekable(self) -> bool:
+        return self._contents.seekable()
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:
+        return self._contents.readinto(buffer)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._contents.read(size)
+
+    def readall(self) -> bytes:
+        return self._contents.readall()
+
+    def write(self, data: bytes) -> int:
+        return self._contents.write(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._contents.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._contents.tell()
+
+    def fileno(self) -> int:
+        return self._contents.fileno()
+
+    def stat(self) -> os.stat_result | _ObjectStat:
+        """
+        Returns the status of the contents of the Blob, such as their size and modification time.
+        """
+        return self._contents.stat()
+
+    def close(self) -> None:
+        if self._contents is not None:
+            self._contents.close()
+
+        super().close()
+
+    @property
+    def encoding(self) -> str | None:
+        """
+        Gets the codec the contents of the Blob are compressed with at rest.
+
+        Returns:
+            The codec, None if the contents are stored as they are.
+        """
+        return None if self._index is None else 'gzip'
+
+    def decoded(self) -> BinaryIO:
+        """
+        Opens the decompressed contents of the Blob, which close the Blob when closed.
+
+        Returns:
+            The Blob itself if its contents are not compressed.
+        """
+        if self._index is None:
+            return self
+
+        return _DecompressingReader(self, self._index)
+
+    def digests(
+            self,
+            algorithms: Iterable[str],
+            buff_size: int = _BUFF_SIZE) -> dict[str, str]:
+        """
+        Computes several digests of the current contents of the Blob, decompressed
+        if they are compressed at rest.
+
+        The Blob is opened again, so contents that replaced the open ones are hashed.
+
+        Args:
+            algorithms: The names of the hashlib algorithms to compute.
+            buff_size: The size of the chunks read from the contents.
+
+        Returns:
+            The hexadecimal digests of the contents by algorithm.
+        """
+        with _DBBlob(self.id_, self.owner, self._visibility) as _latest:
+            _decoded = _latest.decoded()
+
+            return _MultiHasher.digest_stream(
+                _decoded, algorithms, buff_size, _decoded.stat().st_size)
+
+    @contextmanager
+    def atomic_writer(self) -> Iterator[BinaryIO]:
+        """
+        Opens a stream that atomically replaces the contents of the Blob when the context exits cleanly.
+
+        If the COMPRESSION environment variable sets a codec the new contents are
+        compressed as they are written, unless they go to the content store, which
+        keeps them as they are so that every blob can share them.
+
+        Yields:
+            The stream to write the new contents to.
+        """
+        self._written = None
+
+        with self._contents.atomic_writer() as _tmp:
+            if _codec() == 'none' or _backend() == 'cas':
+                yield _tmp
+                return
+
+            _writer = _CompressingWriter(_tmp)
+
+            yield _writer
+
+            self._written = _writer.finish()
+
+    def stored_hashes(self) -> tuple[int, dict[str, str]]:
+        """
+        Gets the digests stored for the current contents of the Blob.
+
+        Returns:
+            The generation of the contents and the digests by algorithm.
+        """
+        return _DAO.get_blob_hashes(self.id_)
+
+    def update_hashes(self, hashes: dict[str, str]) -> int:
+        """
+        Records that the contents of the Blob were replaced, storing their digests.
+
+        Args:
+            hashes: The digests of the new contents by algorithm, including sha256.
+
+        With the content store the contents staged by atomic_writer are stored
+        under their digest, unless identical contents are already stored, and
+        otherwise the staged file replaces the file of the Blob, both inside the
+        transaction recording the digests. How the contents were compressed by
+        atomic_writer is stored along them.
+
+        Returns:
+            The new generation of the contents.
+        """
+        _store = _ContentStore.from_env()
+        _generation = None
+
+        _written, self._written = self._written, None
+        _encoding = {} if _written is None else {"encoding": 'gzip', "frames": _written.dumps()}
+
+        def _commit(staged: str) -> None:
+            nonlocal _generation
+
+            _generation = _DAO.update_blob_contents(
+                self.id_,
+                hashes,
+                store=lambda: _store.put(staged, hashes["sha256"]),
+                discard=_store.discard)
+
+        def _replace(replace: Callable[[], None]) -> None:
+            nonlocal _generation
+
+            _generation = _DAO.update_blob_contents(
+                self.id_, hashes, discard=_store.discard, replace=replace, **_encoding)
+
+        try:
+            if not self._contents.commit_staged(_commit) \
+                    and not self._contents.replace_staged(_replace):
+                _generation = _DAO.update_blob_contents(
+                    self.id_, hashes, discard=_store.discard, **_encoding)
+        finally:
+            # The contents were replaced even if they could not be recorded
+            _invalidate(self.id_)
+
+        return _generation
+
+    def add_hashes(self, generation: int, hashes: dict[str, str]) -> None:
+        """
+        Stores digests computed for a generation of the contents of the Blob.
+
+        Args:
+            generation: The generation the digests were computed for.
+            hashes: The digests by algorithm.
+        """
+        _DAO.add_blob_hashes(self.id_, generation, hashes)
+
+    def reopen(self) -> '_DBBlob':
+        """
+        Closes the Blob and opens it again, to read contents that replaced the open ones.
+
+        Returns:
+            The reopened Blob.
+        """
+        self.close()
+
+        return _DBBlob(self.id_, self.owner, self._visibility)
 
     def delete(self) -> None:
         """
         Deletes the Blob from the database.
         """
-        super().delete()
+        self._contents.delete()
+        self.close()
+
         Blob.delete(self.id_)
 
     def add_permissions(self, user: str) -> None:
@@ -119,9 +428,230 @@ class _DBBlob(_FileBlob):
         Returns:
             If the user has permissions for the Blob.
         """
-        return user == self.owner \
-            or self.visibility == Visibility.PUBLIC \
-            or _DAO.get_user_perms(self.id_, user) is not None
+        if user == self.owner or self.visibility == Visibility.PUBLIC:
+            return True
+
+        if self._grant is not None and self._grant[0] == user:
+            return self._grant[1]
+
+        return _DAO.get_user_perms(self.id_, user) is not None
+
+    def __eq__(self, __value: object) -> bool:
+        return issubclass(type(__value), self.__class__) and self.id_ == __value.id_
+
+class _ReadOnlyBlob(_ReaderView):
+    """
+    Represents a Blob opened only to be read, through positional reads of a reader
+    shared by every request reading the same contents at the same time, and kept
+    open for the next ones until the contents change or the reader is evicted.
+    """
+
+    @property
+    def id_(self) -> str:
+        """
+        Returns the ID of the Blob (read_only).
+        """
+        return self.__id
+
+    @property
+    def file_path(self) -> str | None:
+        """
+        Returns the path of the file holding the contents, None if they are not in a local file.
+        """
+        if self._file_path is _UNKNOWN:
+            if self._name is not None:
+                self._file_path = self._backend.local_path(self._name)
+            else:
+                try:
+                    self._file_path = _FileBlob.locate(self.__id, self._content)
+                except FileNotFoundError:
+                    self._file_path = None
+
+        return self._file_path
+
+    def __init__(
+            self,
+            _id: str,
+            etag: str,
+            generation: int = None,
+            content: str = None,
+            frames: str = None,
+            written: bool = True) -> None:
+        """
+        Initializes a new _ReadOnlyBlob object.
+
+        Args:
+            _id: The ID of the Blob.
+            etag: The entity tag of the contents to read.
+            generation: The generation of the contents, None to read them without sharing them.
+            content: The digest of its contents in the content store, if they are stored there.
+            frames: The serialized index of the frames of its contents, if they are compressed.
+            written: Whether contents were ever recorded for the Blob, only the missing
+                contents of a Blob never written are read as empty.
+
+        Raises:
+            BlobNotFoundError: If the contents of a written Blob are missing.
+        """
+        self.__id = _id
+
+        self.etag = etag
+        self._index = _FrameIndex.loads(frames) if frames is not None else None
+
+        self._content = content
+        self._backend = _object_backend()
+        self._name = f'{_id}.{_SUFIX}' if self._backend is not None else None
+        self._file_path = _UNKNOWN
+
+        def _open() -> _ObjectReader:
+            try:
+                if self._name is not None:
+                    return self._backend.reader(self._name)
+
+                return _FileReader(_FileBlob.locate(_id, content))
+            except FileNotFoundError as e:
+                if written:
+                    # Deleted or replaced since its metadata was read
+                    raise exceptions.BlobNotFoundError(_id) from e
+
+                # A blob that was never written is empty
+                return _BytesReader(b'', 0.0)
+
+        # Cached readers are only looked up, files are not even located
+        _key = (_id, generation)
+
+        self.cached = True
+        _reader = _CONTENTS.get(_key)
+
+        if _reader is None:
+            _reader = _READERS.acquire(_key, _open)
+
+            try:
+                _loaded = _CONTENTS.load(_key, _reader)
+            except BaseException:
+                _READERS.release(_key, _reader)
+                raise
+
+            if _loaded is None:
+                self.cached = False
+            else:
+                # Served from memory from now on, the reader is not kept open
+                _READERS.release(_key, _reader, cache=False)
+                _reader = _loaded
+
+        if self.cached:
+            # Contents in memory are not registered in the shared readers
+            _key = (_id, None)
+
+        super().__init__(_READERS, _key, _reader)
+
+    def open_file(self) -> BinaryIO | None:
+        """
+        Opens the file holding the contents being read with a descriptor of its own,
+        so it can be sent without going through the shared reader.
+
+        Returns:
+            The file, None if the contents are not read from a local file
+            or the file was replaced or removed since they were opened.
+        """
+        if not isinstance(self._reader, _FileReader) or self.file_path is None:
+            return None
+
+        try:
+            _file = open(self.file_path, 'rb')
+        except FileNotFoundError:
+            return None
+
+        if not self._reader.same_file(_file.fileno()):
+            _file.close()
+            return None
+
+        return _file
+
+    @property
+    def encoding(self) -> str | None:
+        """
+        Gets the codec the contents of the Blob are compressed with at rest.
+
+        Returns:
+            The codec, None if the contents are stored as they are.
+        """
+        return None if self._index is None else 'gzip'
+
+    def decoded(self) -> BinaryIO:
+        """
+        Opens the decompressed contents of the Blob, which close the Blob when closed.
+
+        Returns:
+            The Blob itself if its contents are not compressed.
+        """
+        if self._index is None:
+            return self
+
+        return _DecompressingReader(self, self._index)
+
+class _UserBlobs(Mapping):
+    """
+    A lazy mapping from the IDs of the Blobs owned by a user to _DBBlob objects.
+
+    Blob files are only opened when a Blob is accessed by its ID.
+    """
+
+    def __init__(self, owner: str) -> None:
+        """
+        Initializes a new _UserBlobs mapping.
+
+        Args:
+            owner: The owner of the Blobs.
+        """
+        self._owner = owner
+
+    def __getitem__(self, _id: str) -> _DBBlob:
+        try:
+            return Blob.fetch_owned(_id, self._owner)
+        except exceptions.BlobNotFoundError as e:
+            raise KeyError(_id) from e
+
+    def __contains__(self, _id: object) -> bool:
+        try:
+            _DAO.get_user_blob(_id, self._owner)
+        except exceptions.BlobNotFoundError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_after()
+
+    def iter_after(self, after: str = None) -> Iterator[str]:
+        """
+        Iterates over the IDs of the Blobs in order, reading them page by page.
+
+        Args:
+            after: The ID after which to start, None to start from the first one.
+        """
+        while _ids := _DAO.get_blobs_page(self._owner, _PAGE_SIZE, after):
+            yield from _ids
+            after = _ids[-1]
+
+    def page(self, limit: int, after: str = None) -> tuple[list[str], str | None]:
+        """
+        Returns a page of the IDs of the Blobs in order.
+
+        Args:
+            limit: The maximum number of IDs of the page.
+            after: The last ID of the previous page, None for the first page.
+
+        Returns:
+            The IDs of the page and its last ID, or None if it is the last page.
+        """
+        _ids = _DAO.get_blobs_page(self._owner, limit + 1, after)
+
+        if len(_ids) > limit:
+            return _ids[:limit], _ids[limit - 1]
+
+        return _ids, None
+
+    def __len__(self) -> int:
+        return _DAO.count_blobs(self._owner)
 
 class Blob:
     """
@@ -148,15 +678,176 @@ class Blob:
 
         _DAO.new_blob(_uuid, owner, visibility.value)
 
-        return _DBBlob(_uuid, owner)
+        return _DBBlob(_uuid, owner, visibility)
+
+    @staticmethod
+    def create_many(owner: str, visibilities: list[Visibility]) -> list[str]:
+        """
+        Creates several Blobs in a single transaction, without opening them.
+
+        Args:
+            owner: The owner of the Blobs.
+            visibilities: The visibility of every Blob.
+
+        Returns:
+            list[str]: The IDs of the created Blobs, in the same order.
+        """
+        _ids = [str(uuid4()) for _ in visibilities]
+
+        _DAO.new_blobs(owner, [(_id, _v.value) for _id, _v in zip(_ids, visibilities)])
+
+        return _ids
+
+    @staticmethod
+    def fetch_etag(_id: str) -> str | None:
+        """
+        Fetches the entity tag of the current contents of a Blob, from the cache if possible.
+
+        Args:
+            _id: The ID of the Blob.
+
+        Returns:
+            The entity tag, None if it is not known yet.
+
+        Raises:
+            BlobNotFoundError: If the Blob does not exist.
+        """
+        return _DAO.get_blob_etag(_id)
+
+    @staticmethod
+    def fetch_record(_id: str) -> dict:
+        """
+        Fetches the access and the metadata of the contents of a Blob in a single
+        lookup, to check and open it without reading the database again.
+
+        Args:
+            _id: The ID of the Blob.
+
+        Returns:
+            The record of the Blob.
+
+        Raises:
+            BlobNotFoundError: If the Blob does not exist.
+        """
+        return _DAO.get_blob_record(_id)
+
+    @staticmethod
+    def can_read(_id: str, user: str = None, record: dict = None) -> bool:
+        """
+        Checks if a user may read a Blob, reading its access from the database.
+
+        Args:
+            _id: The ID of the Blob.
+            user: The user that will read the Blob, None for anonymous access.
+            record: The record of the Blob from fetch_record, if already fetched.
+
+        Returns:
+            If the Blob is public, owned by the user or the user has been granted access.
+
+        Raises:
+            BlobNotFoundError: If the Blob does not exist.
+        """
+        if record is None:
+            _, owner, visibility, granted = _DAO.get_blob_access(_id, user)
+        else:
+            owner, visibility, granted = \
+                record["owner"], record["visibility"], user in record["users"]
+
+        if Visibility(visibility) == Visibility.PUBLIC:
+            return True
+
+        return user is not None and (user == owner or granted)
+
+    @staticmethod
+    def open_readonly(_id: str, record: dict = None) -> _ReadOnlyBlob:
+        """
+        Opens a Blob only to read its current contents, whose metadata is read from
+        the cache and whose reader is shared with the other readers of the same contents.
+
+        Args:
+            _id: The ID of the Blob.
+            record: The record of the Blob from fetch_record, if already fetched.
+
+        Returns:
+            The read-only Blob, which must be closed.
+
+        Raises:
+            BlobNotFoundError: If the Blob does not exist.
+        """
+        _meta = record or _DAO.get_blob_meta(_id)
+        _etag = _stored = _meta["etag"]
+
+        if _etag is None:
+            # Contents not written through update_blob are hashed once
+            with Blob.fetch(_id) as _blob:
+                _etag = _blob.etag
+
+        return _ReadOnlyBlob(
+            _id,
+            _etag,
+            _meta["generation"],
+            _meta["content"],
+            _meta["frames"],
+            written=_stored is not None or _meta["content"] is not None)
+
+    @staticmethod
+    def configure_readers(maxsize: int) -> None:
+        """
+        Configures the cache of the readers of the Blobs opened only to be read.
+
+        Args:
+            maxsize: The maximum number of idle readers kept open, 0 disables the cache.
+        """
+        _READERS.maxsize = maxsize
+
+        _READERS.clear()
 
     @staticmethod
-    def fetch(_id: str) -> _DBBlob:
+    def reader_stats() -> dict[str, int]:
+        """
+        Gets the number of readers in use and cached, and the hit/miss counters of the cache.
+
+        Returns:
+            A dictionary with the cache statistics.
+        """
+        return _READERS.stats()
+
+    @staticmethod
+    def configure_contents(maxbytes: int, threshold: int) -> None:
+        """
+        Configures the cache of the contents of small Blobs held in memory.
+
+        Args:
+            maxbytes: The maximum total size of the cached contents, 0 disables the cache.
+            threshold: The maximum size of the contents of a Blob to cache them.
+        """
+        _CONTENTS.maxbytes = maxbytes
+        _CONTENTS.threshold = threshold
+
+        _CONTENTS.clear()
+
+    @staticmethod
+    def content_cache_stats() -> dict[str, int | float]:
+        """
+        Gets the size, hit/miss counters, hit ratio and bytes served of the contents cache.
+
+        Returns:
+            A dictionary with the cache statistics.
+        """
+        return _CONTENTS.stats()
+
+    @staticmethod
+    def fetch(_id: str, user: str = None, record: dict = None) -> _DBBlob:
         """
         Fetches a Blob object from the database by its ID.
 
+        The owner, visibility, whether the user has been granted access and the
+        metadata of the contents are all loaded by a single lookup.
+
         Args:
             _id: The ID of the Blob to fetch.
+            user: The user that will access the Blob, if any.
+            record: The record of the Blob from fetch_record, if already fetched.
 
         Returns:
             Blob: The fetched Blob object.
@@ -164,14 +855,36 @@ class Blob:
         Raises:
             BlobNotFoundError: If the Blob with the given ID is not found in the database.
         """
-        id_, owner, _ = _DAO.get_blob(_id)
+        _record = record or _DAO.get_blob_record(_id)
 
-        _b = _DBBlob(id_, owner)
+        return _DBBlob(
+            _id,
+            _record["owner"],
+            _record["visibility"],
+            (user, user in _record["users"]),
+            _record)
 
-        return _b
+    @staticmethod
+    def fetch_owned(_id: str, owner: str) -> _DBBlob:
+        """
+        Fetches a Blob object from the database by its ID, only if it is owned by a user.
+
+        Args:
+            _id: The ID of the Blob to fetch.
+            owner: The user that must own the Blob.
+
+        Returns:
+            Blob: The fetched Blob object.
+
+        Raises:
+            BlobNotFoundError: If the Blob is not found or is not owned by the user.
+        """
+        id_, owner, visibility = _DAO.get_user_blob(_id, owner)
+
+        return _DBBlob(id_, owner, visibility)
 
     @staticmethod
-    def fetch_user_blobs(user: str) -> dict[str, _DBBlob]:
+    def fetch_user_blobs(user: str) -> Mapping[str, _DBBlob]:
         """
         Fetches all Blobs owned by a user.
 
@@ -179,16 +892,9 @@ class Blob:
             user: The user to fetch Blobs for.
 
         Returns:
-            list[Blob]: A list of Blobs owned by the user.
+            Mapping[str, Blob]: A lazy mapping of the Blobs owned by the user.
         """
-        _r = _DAO.get_blobs(user)
-
-        _bs = {
-            _id: _DBBlob(_id, user)
-            for _id in _r
-        }
-
-        return _bs
+        return _UserBlobs(user)
 
     @staticmethod
     def delete(_id: str) -> None:
@@ -201,5 +907,62 @@ class Blob:
         Raises:
             BlobNotFoundError: If the Blob with the given ID is not found in the database.
         """
-        _DAO.delete_blob(_id)
+        _DAO.delete_blob(_id, discard=_ContentStore.from_env().discard)
+
+        _invalidate(_id)
+
+    @staticmethod
+    def delete_many(ids: list[str], owner: str) -> set[str]:
+        """
+        Deletes several Blobs of a user in a single transaction, along with their contents.
+
+        Args:
+            ids: The IDs of the Blobs to delete.
+            owner: The user that must own the Blobs.
+
+        Returns:
+            set[str]: The IDs of the deleted Blobs, the ones not found or not owned are skipped.
+        """
+        _deleted = _DAO.delete_blobs(ids, owner, discard=_ContentStore.from_env().discard)
+
+        _class = _storage_class()
+
+        for _id in _deleted:
+            _class.remove(_id)
+            _invalidate(_id)
+
+        return _deleted
+
+    @staticmethod
+    def update_visibility_many(owner: str, visibilities: list[tuple[str, Visibility]]) -> set[str]:
+        """
+        Updates the visibility of several Blobs of a user in a single transaction.
+
+        Args:
+            owner: The user that must own the Blobs.
+            visibilities: The ID and new visibility of every Blob.
+
+        Returns:
+            set[str]: The IDs of the updated Blobs, the ones not found or not owned are skipped.
+        """
+        return _DAO.update_blobs_visibility(
+            owner, [(_id, _v.value) for _id, _v in visibilities])
+
+    @staticmethod
+    def update_permissions_many(
+            owner: str,
+            permissions: list[tuple[str, set[str]]],
+            replace: bool = True) -> set[str]:
+        """
+        Updates the users allowed to read several Blobs of a user in a single transaction.
+
+        Args:
+            owner: The user that must own the Blobs.
+            permissions: The ID of every Blob and the users to allow.
+            replace: Whether the users replace the allowed ones or are added to them.
+
+        Returns:
+            set[str]: The IDs of the updated Blobs, the ones not found or not owned are skipped.
+        """
+        return _DAO.update_blobs_perms(owner, permissions, replace)
  
\ No newline at end of file
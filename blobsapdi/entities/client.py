@@ -4,13 +4,137 @@ This module contains the Client class and its dependencies.
 
 import os
 
-from adiauthcli import client
+from collections.abc import Mapping
+from threading import Lock
 
+import requests
+
+from requests.adapters import HTTPAdapter
+
+from blobsapdi import exceptions
 from blobsapdi.entities.blob import Blob, _DBBlob
 from blobsapdi.enums import Visibility
+from blobsapdi.objects import _AuthProtocol, _LRUCache
+
+
+_TOKEN_CACHE = _LRUCache(maxsize=1024, ttl=60)
+_INVALID_TOKEN = object()
 
+_AUTH_OPTIONS = {}
+_AUTH_SESSION = None
+_AUTH_LOCK = Lock()
 
-class _LoggedClient(client.Client):
+
+class _AuthSession:
+    """
+    A keep-alive session to the authentication API shared by every thread of the process.
+
+    Calls go through the circuit breaker of an _AuthProtocol, so a failing or slow
+    API is not called again until its reset timeout elapses and requests fail fast
+    meanwhile.
+    """
+
+    @property
+    def service_up(self) -> bool:
+        """
+        Checks the connection to the authentication API.
+
+        Returns:
+            A boolean representing the connection status.
+        """
+        try:
+            return self._get(_AuthProtocol.STATUS_PATH).status_code == 200
+        except exceptions.adiauth.ServiceError:
+            return False
+
+    def __init__(
+            self,
+            auth_api: str,
+            pool_size: int = 10,
+            connect_timeout: float = 1,
+            read_timeout: float = 5,
+            failure_threshold: int = 5,
+            reset_timeout: float = 30) -> None:
+        """
+        Initializes a new instance of the _AuthSession class.
+
+        Args:
+            auth_api: The root URL of the authentication API.
+            pool_size: The maximum number of kept-alive connections to the API.
+            connect_timeout: The number of seconds connecting to the API may take.
+            read_timeout: The number of seconds the API may take to answer.
+            failure_threshold: The consecutive failures that open the circuit, 0 never opens it.
+            reset_timeout: The number of seconds the circuit stays open.
+        """
+        self.pid = os.getpid()
+
+        self._protocol = _AuthProtocol(auth_api, failure_threshold, reset_timeout)
+        self.root = self._protocol.root
+        self.breaker = self._protocol.breaker
+
+        self._timeout = (connect_timeout, read_timeout)
+
+        _adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+
+        self._session = requests.Session()
+        self._session.mount("http://", _adapter)
+        self._session.mount("https://", _adapter)
+
+    def _get(self, path: str) -> requests.Response:
+        _url = self._protocol.url(path)
+
+        try:
+            _response = self._session.get(_url, timeout=self._timeout)
+        except requests.RequestException as e:
+            raise self._protocol.failed(e) from e
+
+        self._protocol.answered(_response.status_code)
+
+        return _response
+
+    def token_owner(self, token: str) -> str:
+        """
+        Resolves the owner of a token.
+
+        Args:
+            token: The token of the user.
+
+        Returns:
+            The username of the token owner.
+
+        Raises:
+            UserNotExists: If the token is invalid.
+            ServiceError: If the authentication API failed or the circuit is open.
+        """
+        _response = self._get(_AuthProtocol.token_path(token))
+
+        return _AuthProtocol.token_owner(token, _response.status_code, _response.json)
+
+    def close(self) -> None:
+        """
+        Closes the connections to the authentication API.
+        """
+        self._session.close()
+
+def _get_auth_session() -> _AuthSession:
+    """
+    Returns the session of the current process, opening a new one after a fork
+    or a change of the AUTH_API environment variable.
+    """
+    global _AUTH_SESSION # pylint: disable=global-statement
+
+    _api = os.getenv("AUTH_API", "http://localhost:3001")
+
+    with _AUTH_LOCK:
+        if _AUTH_SESSION is None \
+                or _AUTH_SESSION.pid != os.getpid() \
+                or _AUTH_SESSION.root != (_api if _api.endswith("/") else f"{_api}/"):
+            # Connections inherited from the parent process are left alone
+            _AUTH_SESSION = _AuthSession(_api, **_AUTH_OPTIONS)
+
+        return _AUTH_SESSION
+
+class _LoggedClient:
 
     @property
     def username(self) -> str:
@@ -23,22 +147,25 @@ class _LoggedClient(client.Client):
         return self._user_
 
     @property
-    def blobs(self) -> dict[str, _DBBlob]:
+    def blobs(self) -> Mapping[str, _DBBlob]:
         """
         Fetches all the blobs for the current user.
 
         Returns:
-            A list of Blob objects.
+            A lazy mapping of Blob IDs to Blob objects.
         """
         return Blob.fetch_user_blobs(self.username)
 
-    def __init__(self, admin_token: str = None) -> None:
+    def __init__(self, username: str, token: str) -> None:
         """
         Initializes a new instance of the _LoggedClient class.
-        """
-        _api = os.getenv("AUTH_API", "http://localhost:3001")
 
-        super().__init__(_api, admin_token, check_service=False)
+        Args:
+            username: The name of the user.
+            token: The token of the user.
+        """
+        self._user_ = username
+        self._token_ = token
 
     def create_blob(self, visibility: Visibility) -> _DBBlob:
         """
@@ -56,6 +183,7 @@ class Client:
     """
     A class representing a client.
     """
+    NEGATIVE_TTL = 5
 
     @staticmethod
     def check_connection() -> bool:
@@ -65,7 +193,7 @@ class Client:
         Returns:
             A boolean representing the connection status.
         """
-        return _LoggedClient().service_up
+        return _get_auth_session().service_up
 
 
     @staticmethod
@@ -81,12 +209,128 @@ class Client:
 
         Raises:
             UserNotExists: If the user does not exist.
+            ServiceError: If the authentication API failed or the circuit is open.
+        """
+        username = Client.cached_owner(token)
+
+        if username is None:
+            try:
+                username = _get_auth_session().token_owner(token)
+            except exceptions.adiauth.UserNotExists:
+                Client.cache_owner(token, None)
+                raise
+
+            Client.cache_owner(token, username)
+
+        return _LoggedClient(username, token)
+
+    @staticmethod
+    def cached_owner(token: str) -> str | None:
+        """
+        Gets the owner of a token from the token cache.
+
+        Args:
+            token: The token of the user.
+
+        Returns:
+            The username of the token owner, None if the token is not cached.
+
+        Raises:
+            UserNotExists: If the token is cached as invalid.
         """
-        _c = _LoggedClient()
+        username = _TOKEN_CACHE.get(token)
+
+        if username is _INVALID_TOKEN:
+            # A new error for every request, which never share its traceback
+            raise exceptions.adiauth.UserNotExists(token, reason="Invalid token")
 
-        username = _c.token_owner(token)
+        return username
 
-        _c._user_ = username
-        _c._token_ = token
+    @staticmethod
+    def cache_owner(token: str, owner: str | None) -> None:
+        """
+        Caches the owner of a token, or that the token is invalid for a shorter time.
+
+        Args:
+            token: The token of the user.
+            owner: The username of the token owner, None if the token is invalid.
+        """
+        if owner is None:
+            _TOKEN_CACHE.put(token, _INVALID_TOKEN, ttl=Client.NEGATIVE_TTL)
+        else:
+            _TOKEN_CACHE.put(token, owner)
+
+    @staticmethod
+    def configure_http(
+            pool_size: int,
+            connect_timeout: float,
+            read_timeout: float,
+            failure_threshold: int,
+            reset_timeout: float) -> None:
+        """
+        Configures the session to the authentication API, which is reopened on next use.
+
+        Args:
+            pool_size: The maximum number of kept-alive connections to the API.
+            connect_timeout: The number of seconds connecting to the API may take.
+            read_timeout: The number of seconds the API may take to answer.
+            failure_threshold: The consecutive failures that open the circuit, 0 never opens it.
+            reset_timeout: The number of seconds the circuit stays open.
+        """
+        global _AUTH_SESSION # pylint: disable=global-statement
 
-        return _c
+        with _AUTH_LOCK:
+            _AUTH_OPTIONS.update(
+                pool_size=pool_size,
+                connect_timeout=connect_timeout,
+                read_timeout=read_timeout,
+                failure_threshold=failure_threshold,
+                reset_timeout=reset_timeout)
+
+            if _AUTH_SESSION is not None and _AUTH_SESSION.pid == os.getpid():
+                _AUTH_SESSION.close()
+
+            _AUTH_SESSION = None
+
+    @staticmethod
+    def auth_stats() -> dict[str, int | str]:
+        """
+        Gets the state and counters of the circuit breaker of the authentication API.
+
+        Returns:
+            A dictionary with the circuit breaker statistics.
+        """
+        return _get_auth_session().breaker.stats()
+
+    @staticmethod
+    def configure_cache(maxsize: int, ttl: float, negative_ttl: float) -> None:
+        """
+        Configures the token to username cache used by fetch_user.
+
+        Args:
+            maxsize: The maximum number of cached tokens, 0 disables the cache.
+            ttl: The number of seconds a valid token is cached.
+            negative_ttl: The number of seconds an invalid token is cached.
+        """
+        _TOKEN_CACHE.maxsize = maxsize
+        _TOKEN_CACHE.ttl = ttl
+        Client.NEGATIVE_TTL = negative_ttl
+
+        _TOKEN_CACHE.clear()
+
+    @staticmethod
+    def clear_cache() -> None:
+        """
+        Removes every cached token.
+        """
+        _TOKEN_CACHE.clear()
+
+    @staticmethod
+    def cache_stats() -> dict[str, int]:
+        """
+        Gets the size and hit/miss counters of the token cache.
+
+        Returns:
+            A dictionary with the cache statistics.
+        """
+        return _TOKEN_CACHE.stats()
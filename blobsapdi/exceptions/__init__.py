@@ -27,6 +27,17 @@ class BlobAlreadyExistsError(Exception):
     def __init__(self, _id: str) -> None:
         super().__init__(f'Blob with id {_id} already exists')
 
+class UploadNotFoundError(Exception):
+    """
+    Exception raised when an upload session with a given ID is not found.
+
+    Args:
+        _id: The ID of the missing upload session.
+    """
+
+    def __init__(self, _id: str) -> None:
+        super().__init__(f'Upload with id {_id} not found')
+
 class InvalidTokenError(Exception):
     """
     Exception raised when a token is invalid.
@@ -0,0 +1,56 @@
+"""
+This module provides the command that moves the blobs of a storage directory
+from the flat layout to the fan-out layout while the servers keep running.
+
+The servers must already be started with the target --storage-fanout, so that
+they look up blobs in the flat layout until they are moved.
+"""
+
+import sys
+import os
+
+from argparse import ArgumentParser
+
+from blobsapdi._logger import LOGGER
+from blobsapdi.objects._file_blob import _SUFIX
+from blobsapdi.objects._layout import _MAX_FANOUT, _migrate_layout
+
+
+logger = LOGGER
+
+def _parse_args() -> ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "-s", "--storage",
+        type=str,
+        default="storage")
+
+    parser.add_argument(
+        "-f", "--fanout",
+        type=int,
+        choices=range(1, _MAX_FANOUT + 1),
+        default=2)
+
+    return parser.parse_args()
+
+def main():
+    args = _parse_args()
+
+    if not os.path.isdir(args.storage):
+        print(f"[!] Storage directory {args.storage} does not exist.")
+        sys.exit(1)
+
+    _moved = 0
+
+    for _id in _migrate_layout(args.storage, args.fanout, _SUFIX):
+        _moved += 1
+
+        if _moved % 10000 == 0:
+            logger.info("Moved %d blobs", _moved)
+
+    logger.info("Moved %d blobs to the %d levels fan-out layout", _moved, args.fanout)
+
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+This module provides a stand-in HTTP object store that backs the chunked storage
+backend, so blob contents can be served from a different host than the metadata.
+
+Objects are stored as files of a local directory and support PUT, GET with a single
+byte range, HEAD and DELETE.
+"""
+
+import sys
+import os
+import re
+import tempfile
+
+from argparse import ArgumentParser
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from blobsapdi._logger import LOGGER
+
+
+logger = LOGGER
+
+_NAME = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9._-]*$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_BUFF_SIZE = 1024 * 1024
+
+class _ObjectHandler(BaseHTTPRequestHandler):
+    """
+    A handler of the requests to the objects of the directory of its server.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None: # pylint: disable=redefined-builtin
+        logger.debug(format, *args)
+
+    def _path(self) -> str | None:
+        _name = self.path.lstrip("/")
+
+        if not _NAME.match(_name):
+            self._reply(HTTPStatus.BAD_REQUEST)
+            return None
+
+        return os.path.join(self.server.root, _name)
+
+    def _reply(self, status: HTTPStatus, length: int = 0, headers: dict = None) -> None:
+        self.send_response(status)
+
+        for _key, _value in (headers or {}).items():
+            self.send_header(_key, _value)
+
+        self.send_header("Content-Length", str(length))
+        self.end_headers()
+
+    def do_PUT(self) -> None: # pylint: disable=invalid-name
+        if (_path := self._path()) is None:
+            return
+
+        _remaining = int(self.headers.get("Content-Length", 0))
+        _fd, _tmp_path = tempfile.mkstemp(dir=self.server.root, suffix=".tmp")
+
+        try:
+            with os.fdopen(_fd, "wb") as _tmp:
+                while _remaining > 0:
+                    _chunk = self.rfile.read(min(_remaining, _BUFF_SIZE))
+
+                    if not _chunk:
+                        raise ConnectionError("Request body ended early")
+
+                    _tmp.write(_chunk)
+                    _remaining -= len(_chunk)
+
+            os.replace(_tmp_path, _path)
+        except BaseException:
+            os.remove(_tmp_path)
+            raise
+
+        self._reply(HTTPStatus.NO_CONTENT)
+
+    def _send_object(self, body: bool) -> None:
+        if (_path := self._path()) is None:
+            return
+
+        try:
+            _f = open(_path, "rb")
+        except FileNotFoundError:
+            self._reply(HTTPStatus.NOT_FOUND)
+            return
+
+        with _f:
+            _size = os.fstat(_f.fileno()).st_size
+            _start, _end = 0, _size - 1
+            _status = HTTPStatus.OK
+            _headers = {"Accept-Ranges": "bytes"}
+
+            if (_range := _RANGE.match(self.headers.get("Range", ""))) and any(_range.groups()):
+                if not _range.group(1):
+                    _start = max(_size - int(_range.group(2)), 0)
+                else:
+                    _start = int(_range.group(1))
+
+                    if _range.group(2):
+                        _end = min(int(_range.group(2)), _size - 1)
+
+                if _start > _end:
+                    self._reply(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+                                headers={"Content-Range": f"bytes */{_size}"})
+                    return
+
+                _status = HTTPStatus.PARTIAL_CONTENT
+                _headers["Content-Range"] = f"bytes {_start}-{_end}/{_size}"
+
+            _remaining = _end - _start + 1
+
+            self._reply(_status, _remaining, _headers)
+
+            if not body:
+                return
+
+            _f.seek(_start)
+
+            while _remaining > 0 and (_chunk := _f.read(min(_remaining, _BUFF_SIZE))):
+                self.wfile.write(_chunk)
+                _remaining -= len(_chunk)
+
+    def do_GET(self) -> None: # pylint: disable=invalid-name
+        self._send_object(True)
+
+    def do_HEAD(self) -> None: # pylint: disable=invalid-name
+        self._send_object(False)
+
+    def do_DELETE(self) -> None: # pylint: disable=invalid-name
+        if (_path := self._path()) is None:
+            return
+
+        try:
+            os.remove(_path)
+        except FileNotFoundError:
+            self._reply(HTTPStatus.NOT_FOUND)
+            return
+
+        self._reply(HTTPStatus.NO_CONTENT)
+
+class _ObjectServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server of the objects stored in a directory.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], root: str) -> None:
+        """
+        Initializes a new instance of the _ObjectServer class.
+
+        Args:
+            address: The address and port to listen on, port 0 picks a free one.
+            root: The directory the objects are stored in.
+        """
+        os.makedirs(root, exist_ok=True)
+
+        self.root = root
+
+        super().__init__(address, _ObjectHandler)
+
+def _parse_args() -> ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "-a", "--address",
+        type=str,
+        default="0.0.0.0")
+
+    parser.add_argument(
+        "-p", "--port",
+        type=int,
+        default=3003)
+
+    parser.add_argument(
+        "-s", "--storage",
+        type=str,
+        default="objects")
+
+    return parser.parse_args()
+
+def main():
+    args = _parse_args()
+
+    with _ObjectServer((args.address, args.port), args.storage) as _server:
+        logger.info("Serving objects of %s on %s:%d", args.storage, args.address, args.port)
+
+        try:
+            _server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
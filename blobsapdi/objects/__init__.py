@@ -1,4 +1,8 @@
+from blobsapdi.objects._auth_protocol import _AuthProtocol
+from blobsapdi.objects._circuit_breaker import _CircuitBreaker
 from blobsapdi.objects._file_blob import _FileBlob
+from blobsapdi.objects._hasher import _MultiHasher
+from blobsapdi.objects._lru_cache import _LRUCache
 
 
-__all__ = ["_FileBlob"]
+__all__ = ["_AuthProtocol", "_CircuitBreaker", "_FileBlob", "_LRUCache", "_MultiHasher"]
@@ -0,0 +1,115 @@
+"""
+This module contains the _AuthProtocol class, which holds the requests made to the
+authentication API and how their answers are read, shared by the synchronous and
+asynchronous clients so that only their transports differ.
+"""
+
+from typing import Any, Callable
+
+from blobsapdi import exceptions
+from blobsapdi.objects._circuit_breaker import _CircuitBreaker
+
+
+class _AuthProtocol:
+    """
+    The wire protocol of the authentication API behind a circuit breaker.
+
+    Clients ask for the URL of a request, which fails fast while the circuit is
+    open, send it with their own transport and hand back its outcome.
+    """
+
+    STATUS_PATH = "v1/status"
+
+    def __init__(
+            self,
+            auth_api: str,
+            failure_threshold: int = 5,
+            reset_timeout: float = 30) -> None:
+        """
+        Initializes a new instance of the _AuthProtocol class.
+
+        Args:
+            auth_api: The root URL of the authentication API.
+            failure_threshold: The consecutive failures that open the circuit, 0 never opens it.
+            reset_timeout: The number of seconds the circuit stays open.
+        """
+        self.root = auth_api if auth_api.endswith("/") else f"{auth_api}/"
+        self.breaker = _CircuitBreaker(failure_threshold, reset_timeout)
+
+    @staticmethod
+    def token_path(token: str) -> str:
+        """
+        Returns the path resolving the owner of a token.
+
+        Args:
+            token: The token of the user.
+        """
+        return f"v1/token/{token}"
+
+    def url(self, path: str) -> str:
+        """
+        Returns the URL of a request to the authentication API.
+
+        Args:
+            path: The path of the request.
+
+        Raises:
+            ServiceError: If the circuit is open.
+        """
+        if not self.breaker.allow():
+            raise exceptions.adiauth.ServiceError(url=self.root, reason="Circuit open")
+
+        return f"{self.root}{path}"
+
+    def failed(self, error: Exception) -> exceptions.adiauth.ServiceError:
+        """
+        Records a request that got no answer.
+
+        Args:
+            error: The error raised by the transport.
+
+        Returns:
+            The error to raise instead.
+        """
+        self.breaker.record_failure()
+
+        return exceptions.adiauth.ServiceError(url=self.root, reason=str(error))
+
+    def answered(self, status_code: int) -> None:
+        """
+        Records the answer to a request.
+
+        Args:
+            status_code: The HTTP status code of the answer.
+
+        Raises:
+            ServiceError: If the authentication API failed to answer.
+        """
+        if status_code >= 500:
+            self.breaker.record_failure()
+            raise exceptions.adiauth.ServiceError(url=self.root, reason=f"HTTP {status_code}")
+
+        self.breaker.record_success()
+
+    @staticmethod
+    def token_owner(token: str, status_code: int, json: Callable[[], Any]) -> str:
+        """
+        Reads the owner of a token from the answer of the authentication API.
+
+        Args:
+            token: The token of the user.
+            status_code: The HTTP status code of the answer.
+            json: A callable decoding the body of the answer.
+
+        Returns:
+            The username of the token owner.
+
+        Raises:
+            UserNotExists: If the token is invalid.
+        """
+        if status_code != 200:
+            raise exceptions.adiauth.UserNotExists(token, reason="Invalid token")
+
+        return json()["user"]
+
+__export__ = (_AuthProtocol,)
@@ -0,0 +1,112 @@
+"""
+This module contains the _CircuitBreaker class, which stops calling a failing service for a while.
+"""
+
+import time
+
+from threading import Lock
+
+
+class _CircuitBreaker:
+    """
+    A thread-safe circuit breaker.
+
+    After a number of consecutive failures the circuit opens and calls are
+    rejected without reaching the service. Once the reset timeout elapses a
+    single trial call is let through, closing the circuit if it succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    @property
+    def state(self) -> str:
+        """
+        Returns the current state of the circuit.
+        """
+        with self._lock:
+            return self._state()
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30) -> None:
+        """
+        Initializes a new instance of the _CircuitBreaker class.
+
+        Args:
+            failure_threshold: The consecutive failures that open the circuit, 0 never opens it.
+            reset_timeout: The number of seconds the circuit stays open before a trial call.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = Lock()
+
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+        self._rejected = 0
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """
+        Checks whether a call may reach the service, reserving the trial call if half open.
+
+        Returns:
+            Whether the call is allowed.
+        """
+        with self._lock:
+            _state = self._state()
+
+            if _state == self.CLOSED:
+                return True
+
+            if _state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+
+            self._rejected += 1
+
+            return False
+
+    def record_success(self) -> None:
+        """
+        Records a successful call, closing the circuit.
+        """
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        """
+        Records a failed call, opening the circuit if the threshold is reached.
+        """
+        with self._lock:
+            self._failures += 1
+            self._trial = False
+
+            if self._opened_at is not None or \
+                    0 < self.failure_threshold <= self._failures:
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> dict[str, int | str]:
+        """
+        Returns the state and counters of the circuit.
+        """
+        with self._lock:
+            return {
+                "state": self._state(),
+                "failures": self._failures,
+                "rejected": self._rejected
+            }
+
+__export__ = (_CircuitBreaker,)
@@ -0,0 +1,258 @@
+"""
+This module contains the classes that compress blob contents at rest.
+
+When the COMPRESSION environment variable is 'gzip' new contents are compressed as
+a single gzip stream with a full flush every _FRAME_SIZE bytes of input. Every frame
+can be inflated on its own, so ranges are read by decompressing only the frames they
+span, and the stored bytes can be sent as they are to clients accepting gzip.
+"""
+
+import io
+import json
+import os
+import zlib
+
+from typing import BinaryIO, NamedTuple
+
+
+_CODECS = ('none', 'gzip')
+_FRAME_SIZE = 1024 * 1024
+_MAX_RATIO = 0.9
+
+def _codec() -> str:
+    """
+    Returns the compression codec set by the COMPRESSION environment variable.
+    """
+    _name = os.getenv("COMPRESSION", "none")
+
+    if _name not in _CODECS:
+        raise ValueError(f"Invalid compression codec: {_name}")
+
+    return _name
+
+class _DecodedStat(NamedTuple):
+    """
+    The status of decompressed contents, named after the fields of os.stat_result.
+    """
+    st_size: int
+    st_mtime: float
+
+class _FrameIndex(NamedTuple):
+    """
+    The positions of the frames of compressed contents.
+    """
+    size: int
+    frame_size: int
+    offsets: tuple[int, ...]
+
+    def dumps(self) -> str:
+        """
+        Serializes the index to be stored along the contents.
+        """
+        return json.dumps([self.size, self.frame_size, self.offsets])
+
+    @classmethod
+    def loads(cls, value: str) -> '_FrameIndex':
+        """
+        Deserializes an index serialized by dumps.
+
+        Args:
+            value: The serialized index.
+        """
+        _size, _frame_size, _offsets = json.loads(value)
+
+        return cls(_size, _frame_size, tuple(_offsets))
+
+class _CompressingWriter(io.RawIOBase):
+    """
+    A stream that compresses the data written to it frame by frame into another stream.
+
+    Whether the contents are compressed is decided by their first frame: if it does
+    not shrink to at most 90% of its size the contents are stored as they are.
+    """
+
+    def __init__(
+            self,
+            raw: BinaryIO,
+            frame_size: int = _FRAME_SIZE,
+            level: int = zlib.Z_DEFAULT_COMPRESSION) -> None:
+        """
+        Initializes a new instance of the _CompressingWriter class.
+
+        Args:
+            raw: The stream the contents are stored in.
+            frame_size: The number of bytes of input of every frame.
+            level: The zlib compression level.
+        """
+        self._raw = raw
+        self._frame_size = frame_size
+        self._level = level
+
+        self._buffer = bytearray()
+        self._compressor = None
+        self._decided = False
+
+        self._size = 0
+        self._written = 0
+        self._offsets = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: bytes) -> int:
+        self._buffer += b
+        self._size += len(b)
+
+        while len(self._buffer) >= self._frame_size:
+            self._write_frame(bytes(self._buffer[:self._frame_size]))
+            del self._buffer[:self._frame_size]
+
+        return len(b)
+
+    def _write_frame(self, frame: bytes) -> None:
+        if self._decided and self._compressor is None:
+            self._emit(frame)
+            return
+
+        _compressor = self._compressor or zlib.compressobj(self._level, zlib.DEFLATED, 31)
+        _compressed = _compressor.compress(frame) + _compressor.flush(zlib.Z_FULL_FLUSH)
+
+        if not self._decided:
+            self._decided = True
+
+            if len(_compressed) > len(frame) * _MAX_RATIO:
+                # Incompressible, the contents are stored as they are
+                self._emit(frame)
+                return
+
+            self._compressor = _compressor
+
+        self._offsets.append(self._written)
+        self._emit(_compressed)
+
+    def _emit(self, data: bytes) -> None:
+        self._raw.write(data)
+        self._written += len(data)
+
+    def finish(self) -> _FrameIndex | None:
+        """
+        Writes the last frame and the end of the gzip stream.
+
+        Returns:
+            The index of the frames, None if the contents were stored as they are.
+        """
+        if self._buffer or not self._decided:
+            self._write_frame(bytes(self._buffer))
+            self._buffer.clear()
+
+        if self._compressor is None:
+            return None
+
+        self._emit(self._compressor.flush())
+
+        return _FrameIndex(self._size, self._frame_size, tuple(self._offsets))
+
+class _DecompressingReader(io.RawIOBase):
+    """
+    A stream of the decompressed contents of another stream, which inflates
+    only the frames that are read.
+    """
+
+    def __init__(self, raw: BinaryIO, index: _FrameIndex) -> None:
+        """
+        Initializes a new instance of the _DecompressingReader class.
+
+        Args:
+            raw: The seekable stream of the compressed contents, closed along with the reader.
+            index: The index of the frames of the contents.
+        """
+        self._raw = raw
+        self._index = index
+
+        self._position = 0
+        self._frame = -1
+        self._data = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:
+        _view = memoryview(buffer).cast('B')
+        _read = 0
+
+        while _read < len(_view) and self._position < self._index.size:
+            _frame, _start = divmod(self._position, self._index.frame_size)
+
+            if _frame != self._frame:
+                self._load(_frame)
+
+            _data = self._data[_start:_start + len(_view) - _read]
+
+            if not _data:
+                raise EOFError(f"Frame {_frame} of the compressed contents is truncated")
+
+            _view[_read:_read + len(_data)] = _data
+            _read += len(_data)
+            self._position += len(_data)
+
+        return _read
+
+    def _load(self, frame: int) -> None:
+        """
+        Inflates a frame, the first one starts with the gzip header.
+        """
+        _start = self._index.offsets[frame]
+        _end = self._index.offsets[frame + 1] if frame + 1 < len(self._index.offsets) else None
+
+        self._raw.seek(_start)
+
+        _compressed = bytearray()
+
+        while _end is None or len(_compressed) < _end - _start:
+            _chunk = self._raw.read(
+                _FRAME_SIZE if _end is None else _end - _start - len(_compressed))
+
+            if not _chunk:
+                break
+
+            _compressed += _chunk
+
+        _decompressor = zlib.decompressobj(31 if frame == 0 else -zlib.MAX_WBITS)
+
+        self._data = _decompressor.decompress(_compressed)
+        self._frame = frame
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._index.size
+        elif whence != io.SEEK_SET:
+            raise ValueError(f"Invalid whence: {whence}")
+
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+
+        self._position = offset
+
+        return offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def stat(self) -> _DecodedStat:
+        """
+        Returns the status of the decompressed contents.
+        """
+        return _DecodedStat(self._index.size, self._raw.stat().st_mtime)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._raw.close()
+
+        super().close()
+
+__export__ = (_codec, _FrameIndex, _CompressingWriter, _DecompressingReader)
@@ -0,0 +1,110 @@
+"""
+This module contains the _ContentStore class, a content-addressed store of blob contents.
+
+When the STORAGE_BACKEND environment variable is 'cas' the contents of every blob
+are stored once per distinct SHA-256 digest under '<STORAGE>/cas/ab/cd/<digest>',
+and blobs are reference-counted pointers to them in the database.
+"""
+
+import hashlib
+import os
+
+
+_BACKENDS = ('file', 'cas', 'local', 'memory', 'chunked')
+_EMPTY_DIGEST = hashlib.sha256(b'').hexdigest()
+
+def _backend() -> str:
+    """
+    Returns the storage backend set by the STORAGE_BACKEND environment variable.
+    """
+    _name = os.getenv("STORAGE_BACKEND", "file")
+
+    if _name not in _BACKENDS:
+        raise ValueError(f"Invalid storage backend: {_name}")
+
+    return _name
+
+class _ContentStore:
+    """
+    A store of immutable contents addressed by their SHA-256 digest.
+    """
+
+    def __init__(self, storage: str) -> None:
+        """
+        Initializes a new instance of the _ContentStore class.
+
+        Args:
+            storage: The storage directory, contents are kept in its 'cas' subdirectory.
+        """
+        self.root = os.path.join(storage, 'cas')
+
+    @classmethod
+    def from_env(cls) -> '_ContentStore':
+        """
+        Returns the store of the STORAGE directory.
+        """
+        return cls(os.getenv("STORAGE", "storage"))
+
+    def path(self, digest: str) -> str:
+        """
+        Returns the path of the contents with a digest.
+
+        Args:
+            digest: The SHA-256 digest of the contents.
+        """
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def open_empty(self) -> int:
+        """
+        Opens the empty contents read-only, creating them if missing.
+
+        Returns:
+            The file descriptor of the empty contents.
+        """
+        _path = self.path(_EMPTY_DIGEST)
+
+        try:
+            return os.open(_path, os.O_RDONLY | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(_path), exist_ok=True)
+
+        return os.open(_path, os.O_RDONLY | os.O_CREAT, 0o644)
+
+    def put(self, tmp_path: str, digest: str) -> bool:
+        """
+        Moves a file into the store unless contents with the same digest are already stored.
+
+        Args:
+            tmp_path: The path of the file, in the same filesystem as the store.
+            digest: The SHA-256 digest of the file.
+
+        Returns:
+            Whether the file was stored, False if it was a duplicate and was removed.
+        """
+        _path = self.path(digest)
+
+        if os.path.isfile(_path):
+            os.remove(tmp_path)
+            return False
+
+        try:
+            os.replace(tmp_path, _path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(_path), exist_ok=True)
+            os.replace(tmp_path, _path)
+
+        return True
+
+    def discard(self, digest: str) -> None:
+        """
+        Removes the contents with a digest, once no blob references them.
+
+        Args:
+            digest: The SHA-256 digest of the contents.
+        """
+        try:
+            os.remove(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+__export__ = (_backend, _ContentStore)
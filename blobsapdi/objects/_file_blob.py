@@ -4,9 +4,18 @@ This module contains the _FileBlob class, which represents a file blob that stor
 
 import io
 import os
+import tempfile
+
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+from blobsapdi.objects._content_store import _ContentStore, _EMPTY_DIGEST, _backend
+from blobsapdi.objects._hasher import _BUFF_SIZE, _MultiHasher
+from blobsapdi.objects._layout import _blob_dir, _fanout
 
 
 _SUFIX = 'blob'
+_DURABILITY = ('none', 'file', 'full')
 
 class _FileBlob(io.FileIO):
     """
@@ -15,6 +24,9 @@ class _FileBlob(io.FileIO):
     """
     _fp: io.FileIO = None
 
+    # Whether atomic_writer leaves the new contents staged for replace_staged
+    _DEFER_REPLACE = False
+
     @property
     def id_(self) -> str:
         """
@@ -22,31 +34,277 @@ class _FileBlob(io.FileIO):
         """
         return self.__id
 
-    def __init__(self, _id: str) -> None:
+    def __init__(self, _id: str, content: str = None) -> None:
         """
         Initializes a new instance of the _FileBlob class.
 
         Args:
             _id: The ID of the file blob.
+            content: The digest of its contents in the content store, if they are stored there.
         """
         self.__id = _id
 
-        self._dir = os.getenv("STORAGE", "storage")
+        self._storage = os.getenv("STORAGE", "storage")
+        self._dir = _blob_dir(self._storage, _id, _fanout())
 
         self.file_name = f'{_id}.{_SUFIX}'
         self.file_path = os.path.join(self._dir, self.file_name)
 
-        os.makedirs(self._dir, exist_ok=True)
+        self._target_path = self.file_path
+        self._flat_path = os.path.join(self._storage, self.file_name)
+
+        self._store = _ContentStore.from_env()
+        self._dedup = _backend() == 'cas'
+        self._staged = None
+
+        if content is not None:
+            # Shared with every blob with the same contents, so never writable
+            self.file_path = self._store.path(content)
+            super().__init__(self.file_path, 'rb')
+            return
+
+        super().__init__(self.file_path, 'a+b', opener=self._open)
+
+    def _open(self, path: str, flags: int) -> int:
+        """
+        Opens the file of the blob, which may still be in the flat layout while
+        the storage is being migrated, creating it and its directory if missing.
+        """
+        _paths = [path] if self._flat_path == path else [path, self._flat_path, path]
+
+        for _path in _paths:
+            try:
+                _fd = os.open(_path, flags & ~os.O_CREAT)
+            except FileNotFoundError:
+                continue
+
+            self.file_path = _path
+            return _fd
+
+        if self._dedup:
+            self.file_path = self._store.path(_EMPTY_DIGEST)
+            return self._store.open_empty()
+
+        try:
+            return os.open(path, flags)
+        except FileNotFoundError:
+            # The directory is only created the first time a blob is stored in it
+            os.makedirs(self._dir, exist_ok=True)
+
+        return os.open(path, flags)
+
+    def stat(self) -> os.stat_result:
+        """
+        Returns the status of the file blob, such as its size and modification time.
+        """
+        return os.fstat(self.fileno())
+
+    def digests(
+            self,
+            algorithms: Iterable[str],
+            buff_size: int = _BUFF_SIZE) -> dict[str, str]:
+        """
+        Computes several digests of the current contents of the file blob.
+
+        The file is opened again, so contents that replaced the open ones are hashed.
+
+        Args:
+            algorithms: The names of the hashlib algorithms to compute.
+            buff_size: The size of the chunks read from the file.
+
+        Returns:
+            The hexadecimal digests of the contents by algorithm.
+        """
+        return _MultiHasher.digest_file(self.file_path, algorithms, buff_size)
+
+    @contextmanager
+    def atomic_writer(self) -> Iterator[BinaryIO]:
+        """
+        Opens a temporary file in the storage directory that atomically replaces
+        the contents of the file blob when the context exits cleanly.
+
+        Readers holding the file blob open keep reading the previous contents, and if
+        the context exits with an exception the temporary file is discarded.
+
+        How much is synced to disk before the replacement is controlled by the
+        DURABILITY environment variable: 'none', 'file' (the default) syncs the
+        contents and 'full' also syncs the storage directory.
+
+        With the content store the temporary file is only staged, and it is the
+        owner of the file blob who moves it into the store once its digest is known.
+        Subclasses deferring the replacement stage it too, until replace_staged.
+
+        Yields:
+            The temporary file to write the new contents to.
+        """
+        _durability = os.getenv("DURABILITY", "file")
+
+        if _durability not in _DURABILITY:
+            raise ValueError(f"Invalid durability level: {_durability}")
+
+        _dir = self._store.root if self._dedup else self._dir
+
+        try:
+            _fd, _tmp_path = tempfile.mkstemp(
+                prefix=f'.{self.file_name}.', suffix='.tmp', dir=_dir)
+        except FileNotFoundError:
+            os.makedirs(_dir, exist_ok=True)
+            _fd, _tmp_path = tempfile.mkstemp(
+                prefix=f'.{self.file_name}.', suffix='.tmp', dir=_dir)
+
+        try:
+            with os.fdopen(_fd, 'wb') as _tmp:
+                yield _tmp
+
+                _tmp.flush()
+
+                if _durability != 'none':
+                    os.fsync(_tmp.fileno())
+
+            if self._dedup or self._DEFER_REPLACE:
+                self._staged = _tmp_path
+                return
+
+            self._replace(_tmp_path)
+        except BaseException:
+            if os.path.isfile(_tmp_path):
+                os.remove(_tmp_path)
+            raise
+
+    def _replace(self, tmp_path: str) -> None:
+        """
+        Moves a temporary file written by atomic_writer over the file of the blob.
+        """
+        os.replace(tmp_path, self._target_path)
+
+        if os.getenv("DURABILITY", "file") == 'full':
+            _dir_fd = os.open(self._dir, os.O_RDONLY)
+            try:
+                os.fsync(_dir_fd)
+            finally:
+                os.close(_dir_fd)
 
-        super().__init__(self.file_path, 'a+b')
+        if self.file_path != self._target_path:
+            # Written while the storage is being migrated, the flat file is stale
+            self._remove(self.file_path)
+            self.file_path = self._target_path
+
+    def commit_staged(self, commit: Callable[[str], None]) -> bool:
+        """
+        Hands the contents staged by atomic_writer over to be moved into the content store.
+
+        The staged file is removed afterwards if it was not moved, as well as the
+        file of the blob itself, which is superseded by the stored contents.
+
+        Args:
+            commit: A callable that receives the path of the staged file.
+
+        Returns:
+            Whether there were staged contents.
+        """
+        if self._staged is None or not self._dedup:
+            return False
+
+        _staged, self._staged = self._staged, None
+
+        try:
+            commit(_staged)
+        finally:
+            self._remove(_staged)
+
+        self._remove(self._target_path)
+        self._remove(self._flat_path)
+
+        return True
+
+    def replace_staged(self, commit: Callable[[Callable[[], None]], None]) -> bool:
+        """
+        Hands over a callable that replaces the contents of the file blob with the
+        ones staged by atomic_writer, for the owner to run while recording them.
+
+        The staged file is removed afterwards if it was not moved.
+
+        Args:
+            commit: A callable that receives the callable replacing the contents.
+
+        Returns:
+            Whether there were staged contents.
+        """
+        if self._staged is None or self._dedup:
+            return False
+
+        _staged, self._staged = self._staged, None
+
+        try:
+            commit(lambda: self._replace(_staged))
+        finally:
+            self._remove(_staged)
+
+        return True
+
+    def close(self) -> None:
+        if self._staged is not None:
+            # Staged contents that were never committed are dropped
+            _staged, self._staged = self._staged, None
+            self._remove(_staged)
+
+        super().close()
 
     def delete(self) -> None:
         """
-        Deletes the file blob.
+        Deletes the file blob, but never the stored contents it points to.
         """
         super().close()
-        if os.path.isfile(self.file_path):
-            os.remove(self.file_path)
+
+        self._remove(self._target_path)
+        self._remove(self._flat_path)
+
+    @classmethod
+    def remove(cls, _id: str) -> None:
+        """
+        Deletes the file of a blob without opening it, but never the stored contents it points to.
+
+        Args:
+            _id: The ID of the file blob.
+        """
+        _storage = os.getenv("STORAGE", "storage")
+        _file_name = f'{_id}.{_SUFIX}'
+
+        cls._remove(os.path.join(_blob_dir(_storage, _id, _fanout()), _file_name))
+        cls._remove(os.path.join(_storage, _file_name))
+
+    @classmethod
+    def locate(cls, _id: str, content: str = None) -> str:
+        """
+        Returns the path of the contents of a file blob without opening it.
+
+        Args:
+            _id: The ID of the file blob.
+            content: The digest of its contents in the content store, if they are stored there.
+
+        Raises:
+            FileNotFoundError: If the file blob was never written.
+        """
+        if content is not None:
+            return _ContentStore.from_env().path(content)
+
+        _storage = os.getenv("STORAGE", "storage")
+        _file_name = f'{_id}.{_SUFIX}'
+
+        for _path in (
+                os.path.join(_blob_dir(_storage, _id, _fanout()), _file_name),
+                os.path.join(_storage, _file_name)):
+            if os.path.isfile(_path):
+                return _path
+
+        raise FileNotFoundError(_file_name)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
 
     def __eq__(self, __value: object) -> bool:
         return issubclass(type(__value), self.__class__) and self.id_ == __value.id_
@@ -0,0 +1,169 @@
+"""
+This module contains the _MultiHasher class, which computes several digests of the same data in a single pass.
+"""
+
+import hashlib
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from os import PathLike
+from threading import Lock
+from typing import BinaryIO, Iterable
+
+
+_BUFF_SIZE = 1024 * 1024
+_PARALLEL_THRESHOLD = 16 * 1024 * 1024
+
+_EXECUTOR: ThreadPoolExecutor = None
+_EXECUTOR_LOCK = Lock()
+
+def _get_executor() -> ThreadPoolExecutor | None:
+    """
+    Returns the thread pool shared by every hasher, None if the HASH_THREADS
+    environment variable does not allow more than one thread.
+    """
+    global _EXECUTOR # pylint: disable=global-statement
+
+    _threads = int(os.getenv("HASH_THREADS", "0"))
+
+    if _threads <= 1:
+        return None
+
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(_threads, thread_name_prefix="hasher")
+
+        return _EXECUTOR
+
+class _MultiHasher:
+    """
+    A class that updates a digest per algorithm with every chunk of data.
+
+    hashlib releases the GIL while hashing large chunks, so when parallel
+    each chunk is fed to the algorithms from a shared thread pool.
+    """
+
+    def __init__(self, algorithms: Iterable[str], parallel: bool = False) -> None:
+        """
+        Initializes a new instance of the _MultiHasher class.
+
+        Args:
+            algorithms: The names of the hashlib algorithms to compute.
+            parallel: Whether to update the digests concurrently, if HASH_THREADS allows it.
+        """
+        self._hashes = {_a: hashlib.new(_a) for _a in algorithms}
+        self._executor = _get_executor() if parallel and len(self._hashes) > 1 else None
+
+    def update(self, chunk: bytes | memoryview) -> None:
+        """
+        Feeds a chunk of data to every digest.
+
+        Args:
+            chunk: The data to hash, which can be reused once this method returns.
+        """
+        if self._executor is None:
+            for _hash in self._hashes.values():
+                _hash.update(chunk)
+            return
+
+        for _future in [
+                self._executor.submit(_hash.update, chunk)
+                for _hash in self._hashes.values()]:
+            _future.result()
+
+    def hexdigests(self) -> dict[str, str]:
+        """
+        Returns the hexadecimal digests of the data fed so far by algorithm.
+        """
+        return {_a: _hash.hexdigest() for _a, _hash in self._hashes.items()}
+
+    @classmethod
+    def digest_stream(
+            cls,
+            stream: BinaryIO,
+            algorithms: Iterable[str],
+            buff_size: int = _BUFF_SIZE,
+            size: int = 0) -> dict[str, str]:
+        """
+        Computes several digests of the rest of a stream reading it into a reusable buffer.
+
+        Streams of at least 16 MiB are hashed in parallel.
+
+        Args:
+            stream: The stream to read.
+            algorithms: The names of the hashlib algorithms to compute.
+            buff_size: The size of the chunks read from the stream.
+            size: The expected size of the stream, if known.
+
+        Returns:
+            The hexadecimal digests of the stream by algorithm.
+        """
+        _buffer = bytearray(buff_size)
+        _view = memoryview(_buffer)
+
+        _hasher = cls(algorithms, parallel=size >= _PARALLEL_THRESHOLD)
+
+        while (_read := stream.readinto(_buffer)) > 0:
+            _hasher.update(_view[:_read])
+
+        return _hasher.hexdigests()
+
+    @classmethod
+    def digest_file(
+            cls,
+            path: PathLike,
+            algorithms: Iterable[str],
+            buff_size: int = _BUFF_SIZE) -> dict[str, str]:
+        """
+        Computes several digests of a file reading it only once into a reusable buffer.
+
+        Files of at least 16 MiB are hashed in parallel.
+
+        Args:
+            path: The path of the file.
+            algorithms: The names of the hashlib algorithms to compute.
+            buff_size: The size of the chunks read from the file.
+
+        Returns:
+            The hexadecimal digests of the file by algorithm.
+        """
+        with open(path, 'rb', buffering=0) as _f:
+            return cls.digest_stream(
+                _f, algorithms, buff_size, os.fstat(_f.fileno()).st_size)
+
+    @classmethod
+    def digest_files(
+            cls,
+            paths: Iterable[PathLike],
+            algorithms: Iterable[str],
+            buff_size: int = _BUFF_SIZE) -> dict[str, str]:
+        """
+        Computes several digests of the concatenation of several files.
+
+        Files adding up to at least 16 MiB are hashed in parallel.
+
+        Args:
+            paths: The paths of the files, in order.
+            algorithms: The names of the hashlib algorithms to compute.
+            buff_size: The size of the chunks read from the files.
+
+        Returns:
+            The hexadecimal digests of the concatenated files by algorithm.
+        """
+        paths = list(paths)
+
+        _buffer = bytearray(buff_size)
+        _view = memoryview(_buffer)
+
+        _hasher = cls(
+            algorithms,
+            parallel=sum(os.path.getsize(_p) for _p in paths) >= _PARALLEL_THRESHOLD)
+
+        for _path in paths:
+            with open(_path, 'rb', buffering=0) as _f:
+                while (_read := _f.readinto(_buffer)) > 0:
+                    _hasher.update(_view[:_read])
+
+        return _hasher.hexdigests()
+
+__export__ = (_MultiHasher,)
@@ -0,0 +1,95 @@
+"""
+This module contains the layout of the blob files in the storage directory.
+
+With a fan-out of N levels every blob lives N directories deep, each named after
+two hexadecimal characters of the hash of its ID (e.g. 'ab/cd/<id>.blob'), so no
+directory grows past a few thousand entries. A fan-out of 0 is the flat layout.
+"""
+
+import hashlib
+import logging
+import os
+
+from typing import Iterator
+
+
+logger = logging.getLogger("APDI")
+
+_MAX_FANOUT = 4
+
+def _fanout() -> int:
+    """
+    Returns the fan-out levels set by the STORAGE_FANOUT environment variable.
+    """
+    _levels = int(os.getenv("STORAGE_FANOUT", "0"))
+
+    if not 0 <= _levels <= _MAX_FANOUT:
+        raise ValueError(f"Invalid storage fan-out: {_levels}")
+
+    return _levels
+
+def _blob_dir(storage: str, _id: str, fanout: int) -> str:
+    """
+    Returns the directory of a blob.
+
+    Args:
+        storage: The storage directory.
+        _id: The ID of the blob.
+        fanout: The fan-out levels.
+
+    Returns:
+        The directory the file of the blob belongs to.
+    """
+    if fanout == 0:
+        return storage
+
+    _hash = hashlib.md5(_id.encode(), usedforsecurity=False).hexdigest()
+
+    return os.path.join(storage, *(_hash[_i:_i + 2] for _i in range(0, fanout * 2, 2)))
+
+def _migrate_layout(storage: str, fanout: int, sufix: str) -> Iterator[str]:
+    """
+    Moves the blob files of the flat layout to the fan-out layout.
+
+    Safe to run while the servers are serving with the same fan-out: files are
+    hard linked into place without replacing newer contents written meanwhile,
+    and only then unlinked from the flat layout.
+
+    Args:
+        storage: The storage directory.
+        fanout: The fan-out levels to move the files to.
+        sufix: The extension of the blob files.
+
+    Yields:
+        The ID of every moved blob.
+    """
+    if fanout == 0:
+        return
+
+    with os.scandir(storage) as _entries:
+        for _entry in _entries:
+            if _entry.name.startswith('.') or not _entry.name.endswith(f'.{sufix}') \
+                    or not _entry.is_file(follow_symlinks=False):
+                continue
+
+            _id = _entry.name[:-len(sufix) - 1]
+            _dir = _blob_dir(storage, _id, fanout)
+
+            os.makedirs(_dir, exist_ok=True)
+
+            try:
+                os.link(_entry.path, os.path.join(_dir, _entry.name))
+            except FileExistsError:
+                # Already rewritten in the fan-out layout, the flat file is stale
+                logger.debug("Blob %s already in the fan-out layout", _id)
+            except FileNotFoundError:
+                continue
+
+            try:
+                os.remove(_entry.path)
+            except FileNotFoundError:
+                pass
+
+            yield _id
+
+__export__ = (_fanout, _blob_dir, _migrate_layout)
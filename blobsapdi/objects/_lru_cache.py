@@ -0,0 +1,151 @@
+"""
+This module contains the _LRUCache class, a thread-safe bounded cache with per-entry expiration.
+"""
+
+import time
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable
+
+
+_MISSING = object()
+
+class _LRUCache:
+    """
+    A bounded least-recently-used cache whose entries expire after a time to live.
+    """
+
+    @property
+    def hits(self) -> int:
+        """
+        Returns the number of lookups answered by the cache.
+        """
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """
+        Returns the number of lookups not answered by the cache.
+        """
+        return self._misses
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60) -> None:
+        """
+        Initializes a new instance of the _LRUCache class.
+
+        Args:
+            maxsize: The maximum number of entries, 0 disables the cache.
+            ttl: The default number of seconds an entry is kept.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Gets the value stored for a key, marking it as recently used.
+
+        Args:
+            key: The key to look up.
+            default: The value returned if the key is missing or expired.
+
+        Returns:
+            The cached value or the default.
+        """
+        with self._lock:
+            _entry = self._entries.get(key, _MISSING)
+
+            if _entry is not _MISSING and _entry[0] <= time.monotonic():
+                del self._entries[key]
+                _entry = _MISSING
+
+            if _entry is _MISSING:
+                self._misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+            return _entry[1]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Gets the value stored for a key without marking it as used or counting the lookup.
+
+        Args:
+            key: The key to look up.
+            default: The value returned if the key is missing or expired.
+
+        Returns:
+            The cached value or the default.
+        """
+        with self._lock:
+            _entry = self._entries.get(key, _MISSING)
+
+            if _entry is _MISSING or _entry[0] <= time.monotonic():
+                return default
+
+            return _entry[1]
+
+    def put(self, key: Hashable, value: Any, ttl: float = None) -> None:
+        """
+        Stores a value for a key, evicting the least recently used entries if full.
+
+        Args:
+            key: The key to store.
+            value: The value to store.
+            ttl: The number of seconds the entry is kept, defaults to the cache ttl.
+        """
+        if self.maxsize <= 0:
+            return
+
+        _expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._entries[key] = (_expires, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """
+        Removes a key from the cache, if present.
+
+        Args:
+            key: The key to remove.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Removes every entry and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the size and hit/miss counters of the cache.
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self._hits,
+                "misses": self._misses
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+__export__ = (_LRUCache,)
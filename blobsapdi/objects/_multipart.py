@@ -0,0 +1,303 @@
+"""
+This module contains the _UploadSession class, which stages the parts of a resumable upload.
+
+Every session is a directory '<STORAGE>/uploads/<blob id>/<upload id>' holding
+a '<n>.part' file per uploaded part. Parts are written atomically, so a part whose
+upload was interrupted is simply uploaded again, and they are concatenated into
+the blob without copying them through user space whenever the platform allows it
+and they do not have to be hashed on the way.
+"""
+
+import errno
+import os
+import re
+import shutil
+import tempfile
+import time
+
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+from uuid import uuid4
+
+from blobsapdi.objects._hasher import _BUFF_SIZE, _MultiHasher
+
+
+_MAX_PARTS = 10000
+_SESSION_TTL = 24 * 60 * 60
+_UPLOAD_ID = re.compile(r'[0-9a-f]{32}')
+_FALLBACK_ERRNOS = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP)
+
+def _uploads_root() -> str:
+    """
+    Returns the directory where the sessions of every blob are staged.
+    """
+    return os.path.join(os.getenv("STORAGE", "storage"), 'uploads')
+
+def _zero_copy(src: int, dst: int, count: int) -> int:
+    """
+    Copies up to count bytes between the current offsets of two files inside the kernel.
+
+    Returns:
+        The number of bytes copied.
+
+    Raises:
+        OSError: If the files can not be copied inside the kernel.
+    """
+    if hasattr(os, 'copy_file_range'):
+        try:
+            return os.copy_file_range(src, dst, count)
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS:
+                raise
+
+    return os.sendfile(dst, src, None, count)
+
+def _concatenate(paths: list[str], out: BinaryIO, hasher: _MultiHasher = None) -> None:
+    """
+    Appends several files to a stream, inside the kernel if the stream is a file
+    and the files are not hashed.
+
+    Args:
+        paths: The paths of the files, in order.
+        out: The stream to write to.
+        hasher: The hasher updated with every byte written, if any.
+    """
+    try:
+        out.flush()
+        _out = out.fileno() if hasher is None else None
+    except OSError:
+        _out = None
+
+    for _path in paths:
+        with open(_path, 'rb', buffering=0) as _part:
+            _left = os.fstat(_part.fileno()).st_size
+
+            while _out is not None and _left > 0:
+                try:
+                    _copied = _zero_copy(_part.fileno(), _out, _left)
+                except OSError as e:
+                    if e.errno not in _FALLBACK_ERRNOS:
+                        raise
+
+                    # Both offsets were advanced by what was copied so far
+                    _out = None
+                    break
+
+                if _copied == 0:
+                    raise EOFError(f"Part {_path} was truncated while being assembled")
+
+                _left -= _copied
+
+            if _out is None and hasher is None:
+                shutil.copyfileobj(_part, out, _BUFF_SIZE)
+            elif _out is None:
+                # Hashed as read, so the digests match the part written even if it is replaced
+                while _chunk := _part.read(_BUFF_SIZE):
+                    hasher.update(_chunk)
+                    out.write(_chunk)
+
+class _UploadSession:
+    """
+    The parts staged by a resumable upload of the contents of a blob.
+    """
+
+    def __init__(self, blob_id: str, upload_id: str) -> None:
+        """
+        Initializes a new instance of the _UploadSession class.
+
+        Args:
+            blob_id: The ID of the blob the contents are uploaded to.
+            upload_id: The ID of the session.
+        """
+        self.blob_id = blob_id
+        self.upload_id = upload_id
+
+        self.path = os.path.join(_uploads_root(), blob_id, upload_id)
+
+    @classmethod
+    def create(cls, blob_id: str) -> '_UploadSession':
+        """
+        Starts a new session, removing the sessions of every blob that expired.
+
+        Args:
+            blob_id: The ID of the blob the contents are uploaded to.
+        """
+        cls.expire()
+
+        _session = cls(blob_id, uuid4().hex)
+
+        os.makedirs(_session.path)
+
+        return _session
+
+    @classmethod
+    def open(cls, blob_id: str, upload_id: str) -> '_UploadSession':
+        """
+        Opens an existing session.
+
+        Args:
+            blob_id: The ID of the blob the contents are uploaded to.
+            upload_id: The ID of the session.
+
+        Raises:
+            FileNotFoundError: If the session does not exist.
+        """
+        _session = cls(blob_id, upload_id)
+
+        if not _UPLOAD_ID.fullmatch(upload_id) or not os.path.isdir(_session.path):
+            raise FileNotFoundError(upload_id)
+
+        return _session
+
+    @staticmethod
+    def expire(ttl: float = _SESSION_TTL) -> None:
+        """
+        Removes the sessions of every blob not touched for longer than ttl seconds.
+
+        Args:
+            ttl: The number of seconds a session is kept since its last part was uploaded.
+        """
+        _deadline = time.time() - ttl
+
+        try:
+            _blobs = list(os.scandir(_uploads_root()))
+        except FileNotFoundError:
+            return
+
+        for _blob in _blobs:
+            try:
+                _sessions = list(os.scandir(_blob.path))
+            except FileNotFoundError:
+                continue
+
+            for _session in _sessions:
+                try:
+                    if _session.stat().st_mtime >= _deadline:
+                        continue
+                except FileNotFoundError:
+                    continue
+
+                shutil.rmtree(_session.path, ignore_errors=True)
+
+            try:
+                os.rmdir(_blob.path)
+            except OSError:
+                pass
+
+    def _part_path(self, number: int) -> str:
+        if not 0 < number <= _MAX_PARTS:
+            raise ValueError(f"Part number must be between 1 and {_MAX_PARTS}")
+
+        return os.path.join(self.path, f'{number}.part')
+
+    @contextmanager
+    def part_writer(self, number: int) -> Iterator[BinaryIO]:
+        """
+        Opens a temporary file that atomically replaces a part when the context exits cleanly.
+
+        Args:
+            number: The number of the part, starting from 1.
+
+        Yields:
+            The temporary file to write the part to.
+
+        Raises:
+            ValueError: If the part number is out of range.
+            FileNotFoundError: If the session was removed meanwhile.
+        """
+        _path = self._part_path(number)
+
+        _fd, _tmp_path = tempfile.mkstemp(prefix=f'.{number}.', suffix='.tmp', dir=self.path)
+
+        try:
+            with os.fdopen(_fd, 'wb') as _tmp:
+                yield _tmp
+
+            os.replace(_tmp_path, _path)
+        except BaseException:
+            if os.path.isfile(_tmp_path):
+                os.remove(_tmp_path)
+            raise
+
+        # Keeps the session from expiring while parts are still being uploaded
+        os.utime(self.path)
+
+    def parts(self) -> dict[int, int]:
+        """
+        Returns the size of every uploaded part by number.
+        """
+        _parts = {}
+
+        for _entry in os.scandir(self.path):
+            _number, _, _ext = _entry.name.partition('.')
+
+            if _ext == 'part' and _number.isdigit():
+                _parts[int(_number)] = _entry.stat().st_size
+
+        return dict(sorted(_parts.items()))
+
+    def paths(self, numbers: list[int] = None) -> list[str]:
+        """
+        Returns the paths of the parts that make up the contents, in order.
+
+        Args:
+            numbers: The numbers of the parts in ascending order, every uploaded part if None.
+
+        Raises:
+            ValueError: If no parts were given, they are not in ascending order or
+                one of them was not uploaded.
+        """
+        _uploaded = self.parts()
+
+        if numbers is None:
+            numbers = list(_uploaded)
+
+        if not numbers:
+            raise ValueError("No parts were uploaded")
+
+        if any(_a >= _b for _a, _b in zip(numbers, numbers[1:])):
+            raise ValueError("Parts must be in ascending order")
+
+        for _number in numbers:
+            if _number not in _uploaded:
+                raise ValueError(f"Part {_number} was not uploaded")
+
+        return [self._part_path(_n) for _n in numbers]
+
+    def assemble(
+            self,
+            out: BinaryIO,
+            numbers: list[int] = None,
+            hasher: _MultiHasher = None) -> list[str]:
+        """
+        Writes the concatenation of the parts to a stream.
+
+        Args:
+            out: The stream to write the contents to.
+            numbers: The numbers of the parts in ascending order, every uploaded part if None.
+            hasher: The hasher to update with the contents as they are written, if any.
+
+        Returns:
+            The paths of the parts written.
+
+        Raises:
+            ValueError: If the parts are not valid.
+        """
+        _paths = self.paths(numbers)
+
+        _concatenate(_paths, out, hasher)
+
+        return _paths
+
+    def remove(self) -> None:
+        """
+        Removes the session and every part uploaded to it.
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
+
+        try:
+            os.rmdir(os.path.dirname(self.path))
+        except OSError:
+            pass
+
+__export__ = (_UploadSession,)
@@ -0,0 +1,113 @@
+"""
+This module contains the _Signer class, which signs short-lived tokens with HMAC-SHA256.
+
+The secret is read from the DOWNLOAD_SECRET environment variable, which every
+process serving the same storage must share. The server makes a random one before
+forking its workers when it is not set, and a process without it makes its own, so
+tokens are only accepted by the processes that share the secret they were signed with.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import time
+
+from threading import Lock
+
+from blobsapdi._logger import LOGGER
+
+
+logger = LOGGER
+
+_TOKEN_TTL = 300
+_URL_TTL = 60 * 60
+_MAX_URL_TTL = 7 * 24 * 60 * 60
+
+_SIGNER: '_Signer' = None
+_SIGNER_LOCK = Lock()
+
+class _Signer:
+    """
+    A class that signs and verifies tokens binding several fields to an expiration time.
+    """
+
+    def __init__(self, secret: bytes) -> None:
+        """
+        Initializes a new instance of the _Signer class.
+
+        Args:
+            secret: The key of the HMAC.
+        """
+        self._secret = secret
+
+    @classmethod
+    def from_env(cls) -> '_Signer':
+        """
+        Returns the signer shared by the process, built again if DOWNLOAD_SECRET changes.
+        """
+        global _SIGNER # pylint: disable=global-statement
+
+        _secret = os.getenv("DOWNLOAD_SECRET")
+
+        with _SIGNER_LOCK:
+            if _SIGNER is None or (_secret is not None and _SIGNER._secret != _secret.encode()):
+                if _secret is None:
+                    logger.warning(
+                        "DOWNLOAD_SECRET is not set, download tokens are only valid in this process")
+
+                _SIGNER = cls(_secret.encode() if _secret is not None else secrets.token_bytes(32))
+
+            return _SIGNER
+
+    def _signature(self, fields: tuple[str, ...], expires: int) -> str:
+        _message = "\n".join((*fields, str(expires))).encode()
+        _digest = hmac.new(self._secret, _message, hashlib.sha256).digest()
+
+        return base64.urlsafe_b64encode(_digest).rstrip(b"=").decode()
+
+    def sign(self, *fields: str, ttl: int = _TOKEN_TTL) -> tuple[str, int]:
+        """
+        Signs a token for several fields.
+
+        Args:
+            fields: The fields the token is bound to, the first one should tell what it is for.
+            ttl: The number of seconds the token is valid for.
+
+        Returns:
+            The token and the time it expires at, in seconds since the epoch.
+        """
+        _expires = int(time.time()) + ttl
+
+        return f"{_expires}.{self._signature(fields, _expires)}", _expires
+
+    def verify(self, token: str, *fields: str) -> int:
+        """
+        Verifies a token signed for several fields.
+
+        Args:
+            token: The token.
+            fields: The fields the token must be bound to.
+
+        Returns:
+            The time the token expires at, in seconds since the epoch.
+
+        Raises:
+            ValueError: If the token is malformed, forged, bound to other fields or expired.
+        """
+        _expires, _, _signature = token.partition(".")
+
+        if not (_expires.isascii() and _expires.isdigit()):
+            raise ValueError("Malformed token")
+
+        if not hmac.compare_digest(
+                _signature.encode(), self._signature(fields, int(_expires)).encode()):
+            raise ValueError("Invalid token signature")
+
+        if int(_expires) < time.time():
+            raise ValueError("Expired token")
+
+        return int(_expires)
+
+__export__ = (_Signer,)
@@ -1,6 +1,7 @@
 import sys
 import os
 import logging
+import secrets
 
 from typing import Callable
 from urllib.parse import urlparse
@@ -14,12 +15,21 @@ from blobsapdi import services
 from blobsapdi import enums
 from blobsapdi import db
 from blobsapdi import entities
+from blobsapdi._batch import (
+    _Batch, _created, _parse_acl, _parse_create, _parse_id, _parse_visibility, _updated)
+from blobsapdi._listing import _DEFAULT_LIMIT, _Listing
+from blobsapdi.objects._compression import _CODECS
+from blobsapdi.objects._content_store import _BACKENDS
+from blobsapdi.objects._signer import _URL_TTL
+from blobsapdi.storage._chunked import _CHUNK_SIZE
 
 from blobsapdi import __app__, __version__, __usage__
 
 
 logger = logging.getLogger("APDI")
 
+_DOWNLOAD_MODES = ("stream", "sendfile", "x-sendfile")
+
 def _url(url: str) -> str:
     result = urlparse(url)
     if all([result.scheme, result.netloc]):
@@ -52,8 +62,169 @@ def _parse_args() -> ArgumentParser:
         type=str,
         default="storage")
 
+    parser.add_argument(
+        "--storage-backend",
+        type=str,
+        choices=_BACKENDS,
+        default="file")
+
+    parser.add_argument(
+        "--compression",
+        type=str,
+        choices=_CODECS,
+        default="none")
+
+    parser.add_argument(
+        "--object-store-url",
+        type=str,
+        default="http://localhost:3003")
+
+    parser.add_argument(
+        "--object-chunk-size",
+        type=int,
+        default=_CHUNK_SIZE)
+
+    parser.add_argument(
+        "--storage-fanout",
+        type=int,
+        choices=range(0, 5),
+        default=0)
+
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=0)
+
+    parser.add_argument(
+        "-t", "--threads",
+        type=int,
+        default=1)
+
+    parser.add_argument(
+        "--asgi",
+        action="store_true")
+
+    parser.add_argument(
+        "--asgi-threads",
+        type=int,
+        default=0)
+
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        default=30)
+
+    parser.add_argument(
+        "--durability",
+        type=str,
+        choices=("none", "file", "full"),
+        default="file")
+
+    parser.add_argument(
+        "--hash-threads",
+        type=int,
+        default=0)
+
+    parser.add_argument(
+        "--download-mode",
+        type=str,
+        choices=_DOWNLOAD_MODES,
+        default="stream")
+
+    parser.add_argument(
+        "--db-pool-size",
+        type=int,
+        default=0)
+
+    parser.add_argument(
+        "--db-synchronous",
+        type=str.upper,
+        choices=db._DAO.SYNCHRONOUS,
+        default=None)
+
+    parser.add_argument(
+        "--meta-cache-size",
+        type=int,
+        default=4096)
+
+    parser.add_argument(
+        "--meta-cache-ttl",
+        type=float,
+        default=30)
+
+    parser.add_argument(
+        "--reader-cache-size",
+        type=int,
+        default=256)
+
+    parser.add_argument(
+        "--content-cache-bytes",
+        type=int,
+        default=0)
+
+    parser.add_argument(
+        "--content-cache-threshold",
+        type=int,
+        default=64 * 1024)
+
+    parser.add_argument(
+        "--auth-pool-size",
+        type=int,
+        default=10)
+
+    parser.add_argument(
+        "--auth-connect-timeout",
+        type=float,
+        default=1)
+
+    parser.add_argument(
+        "--auth-read-timeout",
+        type=float,
+        default=5)
+
+    parser.add_argument(
+        "--auth-failure-threshold",
+        type=int,
+        default=5)
+
+    parser.add_argument(
+        "--auth-reset-timeout",
+        type=float,
+        default=30)
+
+    parser.add_argument(
+        "--token-cache-size",
+        type=int,
+        default=1024)
+
+    parser.add_argument(
+        "--token-cache-ttl",
+        type=float,
+        default=60)
+
+    parser.add_argument(
+        "--token-cache-negative-ttl",
+        type=float,
+        default=5)
+
     return parser.parse_args()
 
+def _make_conditional(response: flask.Response, size: int) -> flask.Response:
+    environ = flask.request.environ
+
+    if flask.request.range is not None and len(flask.request.range.ranges) > 1:
+        # Werkzeug only serves single byte ranges and rejects the others,
+        # so requests for several ranges get the whole contents
+        environ = {_k: _v for _k, _v in environ.items() if _k != "HTTP_RANGE"}
+
+    response = response.make_conditional(environ, accept_ranges=True, complete_length=size)
+
+    if response.status_code == 304:
+        # Some X-Sendfile implementations send the file anyway
+        response.headers.pop("X-Sendfile", None)
+
+    return response
+
 def _route_app(app: flask.Flask) -> tuple[Callable]:
     endpoint = f"/api/{__version__}"
 
@@ -76,12 +247,31 @@ def _route_app(app: flask.Flask) -> tuple[Callable]:
             "error": str(error)
             }), 401
 
+    @app.errorhandler(exceptions.adiauth.ServiceError)
+    def handle_service_error(error: Exception) -> flask.Response:
+        logger.warning("Auth API unavailable: %s", error)
+        return flask.jsonify({
+            "error": str(error)
+            }), 503
+
     @app.errorhandler(exceptions.BlobNotFoundError)
     def handle_blob_not_found(error: Exception) -> flask.Response:
         return flask.jsonify({
             "error": str(error)
             }), 404
 
+    @app.errorhandler(exceptions.InvalidTokenError)
+    def handle_invalid_token(error: Exception) -> flask.Response:
+        return flask.jsonify({
+            "error": str(error)
+            }), 403
+
+    @app.errorhandler(exceptions.UploadNotFoundError)
+    def handle_upload_not_found(error: Exception) -> flask.Response:
+        return flask.jsonify({
+            "error": str(error)
+            }), 404
+
     @app.route("/", methods=["GET"])
     @app.route(f"{endpoint}/status/", methods=["GET"])
     def get_status() -> flask.Response:
@@ -89,29 +279,151 @@ def _route_app(app: flask.Flask) -> tuple[Callable]:
             "message": f"API {__app__} {__version__} up and running"
         }
 
+    @app.route(f"{endpoint}/metrics/", methods=["GET"])
+    def get_metrics() -> flask.Response:
+        return {
+            "token_cache": entities.Client.cache_stats(),
+            "auth": entities.Client.auth_stats(),
+            "readers": entities.Blob.reader_stats(),
+            "content_cache": entities.Blob.content_cache_stats(),
+            "db": db.stats()
+        }
+
     @app.route(f"{endpoint}/blobs/<blob>", methods=["GET"])
     def get_blob(blob: str) -> flask.Response:
-        blob_ = services.get_blob(blob, flask.request.user_token)
+        token = flask.request.headers.get("DownloadToken")
+        signature = flask.request.args.get("signature")
+
+        if signature is not None:
+            blob_ = services.get_blob_by_signature(
+                blob, flask.request.args.get("expires", ""), signature)
+        elif token is not None:
+            blob_ = services.get_blob_by_token(blob, token)
+        else:
+            blob_ = services.open_blob(blob, flask.request.user_token)
+
+        # Compressed contents are sent as they are stored to clients accepting their codec
+        encoding = blob_.encoding
+        encoded = encoding is not None and flask.request.accept_encodings.quality(encoding) > 0
+
+        def _encode(response: flask.Response) -> flask.Response:
+            if encoded:
+                response.content_encoding = encoding
+
+            if encoding is not None:
+                response.vary.add("Accept-Encoding")
 
-        return flask.send_file(blob_, mimetype="application/octet-stream")
+            return response
+
+        mode = flask.current_app.config.get("DOWNLOAD_MODE", "stream")
+        file = None
+
+        if mode != "stream" and not blob_.cached and (encoding is None or encoded):
+            # Reopened only if it still holds the contents the ETag describes;
+            # contents already held in memory are streamed instead
+            try:
+                file = blob_.open_file()
+            except Exception:
+                blob_.close()
+                raise
+
+        if file is not None and mode == "x-sendfile":
+            # Hand the path over so the file is sent by the front server
+            file.close()
+
+            with blob_:
+                etag = blob_.etag
+
+            response = flask.send_file(
+                os.path.abspath(file.name),
+                mimetype="application/octet-stream",
+                etag=f"{etag}-{encoding}" if encoded else etag,
+                conditional=False)
+
+            return _make_conditional(_encode(response), response.content_length)
+
+        # An open file is sent through wsgi.file_wrapper (sendfile) from its own
+        # descriptor, so it outlives the blob being discarded or replaced
+        body = file or (blob_ if encoding is None or encoded else blob_.decoded())
+
+        try:
+            if file is not None:
+                with blob_:
+                    stat = blob_.stat()
+                    etag = blob_.etag
+            else:
+                stat = body.stat()
+                etag = blob_.etag
+
+            response = flask.send_file(
+                body,
+                mimetype="application/octet-stream",
+                etag=f"{etag}-{encoding}" if encoded else etag,
+                last_modified=stat.st_mtime,
+                conditional=False)
+
+            # The size of a file object is unknown to send_file, so the ranges and
+            # validators are only checked once it is set
+            response.content_length = stat.st_size
+
+            return _make_conditional(_encode(response), stat.st_size)
+        except Exception:
+            body.close()
+            raise
+
+    @app.route(f"{endpoint}/blobs/<blob>/download-token", methods=["POST"])
+    def post_download_token(blob: str) -> flask.Response:
+        token, expires = services.create_download_token(blob, flask.request.user_token)
+
+        return {
+            "token": token,
+            "expires": expires
+        }, 201
+
+    @app.route(f"{endpoint}/blobs/<blob>/presigned-url", methods=["POST"])
+    def post_presigned_url(blob: str) -> flask.Response:
+        body = flask.request.json_
+        ttl = body.get("expiresIn", _URL_TTL) if isinstance(body, dict) else _URL_TTL
+
+        if type(ttl) is not int:
+            return {
+                "error": "Invalid 'expiresIn' number of seconds"
+            }, 400
+
+        try:
+            expires, signature = services.create_presigned_url(
+                blob, flask.request.user_token, ttl)
+        except ValueError as e:
+            return {
+                "error": str(e)
+            }, 400
+
+        return {
+            "URL": f"{endpoint}/blobs/{blob}?expires={expires}&signature={signature}",
+            "expires": expires
+        }, 201
 
     @app.route(f"{endpoint}/blobs/", methods=["GET"])
     def get_blobs() -> flask.Response:
-        blob_ids = services.get_user_blobs(flask.request.user_token)
+        try:
+            listing = _Listing.parse(
+                flask.request.args, flask.request.headers.get("Accept", ""))
+        except ValueError as e:
+            return {
+                "error": str(e)
+            }, 400
 
-        url = flask.request.root_url.rstrip("/")
-        _endpoint = endpoint.lstrip("/")
+        url = f"{flask.request.root_url.rstrip('/')}/{endpoint.lstrip('/')}/blobs"
 
-        res = [
-            {
-                "blobId": id,
-                "URL": f"{url}/{_endpoint}/blobs/{id}"
-            } for id in blob_ids
-        ]
+        if listing.paged:
+            blob_ids, last = services.get_user_blobs_page(
+                flask.request.user_token, listing.limit or _DEFAULT_LIMIT, listing.after)
 
-        return {
-            "blobs": res
-        }
+            return listing.page(blob_ids, last, url)
+
+        blob_ids = services.iter_user_blobs(flask.request.user_token, listing.after)
+
+        return flask.Response(listing.stream(blob_ids, url), mimetype=listing.media_type)
 
     @app.route(f"{endpoint}/blobs/", methods=["POST"])
     def post_blob() -> flask.Response:
@@ -137,6 +449,65 @@ def _route_app(app: flask.Flask) -> tuple[Callable]:
 
         return "", 204
 
+    @app.route(f"{endpoint}/blobs/<blob>/uploads", methods=["POST"])
+    def post_upload(blob: str) -> flask.Response:
+        upload_id = services.create_upload(blob, flask.request.user_token)
+
+        return {
+            "uploadId": upload_id,
+            "URL": f"{endpoint}/blobs/{blob}/uploads/{upload_id}"
+        }, 201
+
+    @app.route(f"{endpoint}/blobs/<blob>/uploads/<upload>/parts/<int:part>", methods=["PUT"])
+    def put_upload_part(blob: str, upload: str, part: int) -> flask.Response:
+        try:
+            size = services.upload_part(
+                blob, upload, part, flask.request.user_token, flask.request.stream)
+        except ValueError as e:
+            return {
+                "error": str(e)
+            }, 400
+
+        return {
+            "partNumber": part,
+            "size": size
+        }
+
+    @app.route(f"{endpoint}/blobs/<blob>/uploads/<upload>", methods=["GET"])
+    def get_upload(blob: str, upload: str) -> flask.Response:
+        parts = services.get_upload_parts(blob, upload, flask.request.user_token)
+
+        return {
+            "parts": [{"partNumber": _n, "size": _s} for _n, _s in parts.items()]
+        }
+
+    @app.route(f"{endpoint}/blobs/<blob>/uploads/<upload>", methods=["POST"])
+    def post_upload_complete(blob: str, upload: str) -> flask.Response:
+        parts = flask.request.json_.get("parts")
+
+        if parts is not None and (
+                not isinstance(parts, list) or not all(type(_p) is int for _p in parts)):
+            return {
+                "error": "Invalid 'parts' list of part numbers"
+            }, 400
+
+        try:
+            blob_ = services.complete_upload(blob, upload, flask.request.user_token, parts)
+        except ValueError as e:
+            return {
+                "error": str(e)
+            }, 400
+
+        blob_.close()
+
+        return "", 204
+
+    @app.route(f"{endpoint}/blobs/<blob>/uploads/<upload>", methods=["DELETE"])
+    def delete_upload(blob: str, upload: str) -> flask.Response:
+        services.abort_upload(blob, upload, flask.request.user_token)
+
+        return "", 204
+
     @app.route(f"{endpoint}/blobs/<blob>", methods=["DELETE"])
     def delete_blob(blob: str) -> flask.Response:
         services.delete_blob(blob, flask.request.user_token)
@@ -229,13 +600,90 @@ def _route_app(app: flask.Flask) -> tuple[Callable]:
             "visibility": visibility.value
         }
 
+    @app.route(f"{endpoint}/batch/create", methods=["POST"])
+    def batch_create() -> flask.Response:
+        try:
+            batch = _Batch(flask.request.json_, _parse_create)
+        except ValueError as e:
+            return {
+                "error": str(e)
+            }, 400
+
+        blob_ids = services.create_blobs(flask.request.user_token, batch.valid)
+
+        return {
+            "results": batch.results(_created(blob_ids, endpoint))
+        }
+
+    @app.route(f"{endpoint}/batch/delete", methods=["POST"])
+    def batch_delete() -> flask.Response:
+        try:
+            batch = _Batch(flask.request.json_, _parse_id)
+        except ValueError as e:
+            return {
+                "error": str(e)
+            }, 400
+
+        deleted = services.delete_blobs(flask.request.user_token, batch.valid)
+
+        return {
+            "results": batch.results(_updated(batch.valid, deleted))
+        }
+
+    @app.route(f"{endpoint}/batch/visibility", methods=["POST"])
+    def batch_visibility() -> flask.Response:
+        try:
+            batch = _Batch(flask.request.json_, _parse_visibility)
+        except ValueError as e:
+            return {
+                "error": str(e)
+            }, 400
+
+        updated = services.update_blobs_visibility(flask.request.user_token, batch.valid)
+
+        return {
+            "results": batch.results(_updated((_id for _id, _ in batch.valid), updated))
+        }
+
+    @app.route(f"{endpoint}/batch/acl", methods=["POST"])
+    def batch_acl() -> flask.Response:
+        body = flask.request.json_
+        mode = body.get("mode", "put") if isinstance(body, dict) else "put"
+
+        if mode not in ("put", "patch"):
+            return {
+                "error": "Invalid mode, must be 'put' or 'patch'"
+            }, 400
+
+        try:
+            batch = _Batch(body, _parse_acl)
+        except ValueError as e:
+            return {
+                "error": str(e)
+            }, 400
+
+        updated = services.update_blobs_permissions(
+            flask.request.user_token, batch.valid, replace=mode == "put")
+
+        return {
+            "results": batch.results(_updated((_id for _id, _ in batch.valid), updated))
+        }
+
     return (
         before_request,
         get_status,
+        get_metrics,
         get_blob,
+        post_download_token,
+        post_presigned_url,
         get_blobs,
         post_blob,
         put_blob,
+        post_upload,
+        put_upload_part,
+        get_upload,
+        post_upload_complete,
+        delete_upload,
         delete_blob,
         get_blob_hashes,
         delete_acl,
@@ -244,29 +692,136 @@ def _route_app(app: flask.Flask) -> tuple[Callable]:
         patch_acl,
         put_visibility,
         get_visibility,
+        batch_create,
+        batch_delete,
+        batch_visibility,
+        batch_acl,
 
         handle_blob_not_found,
+        handle_upload_not_found,
+        handle_invalid_token,
         handle_user_not_exists,
+        handle_service_error,
         handle_server_error)
 
+def create_app(download_mode: str = "stream") -> flask.Flask:
+    """
+    Creates the APDI application with all its routes.
+
+    The database must be connected before the application serves requests.
+
+    Args:
+        download_mode: How blob contents are sent, one of stream, sendfile or x-sendfile.
+
+    Returns:
+        The APDI application.
+    """
+    app = flask.Flask(__app__)
+
+    app.config["DOWNLOAD_MODE"] = download_mode
+    app.config["USE_X_SENDFILE"] = download_mode == "x-sendfile"
+
+    _route_app(app)
+
+    return app
+
 def _execute(
         port=3002,
         host="0.0.0.0",
         db_path="pyblob.db",
+        download_mode="stream",
+        db_pool_size=0,
+        db_synchronous=None,
+        meta_cache_size=4096,
+        meta_cache_ttl=30,
+        reader_cache_size=256,
+        content_cache_bytes=0,
+        content_cache_threshold=64 * 1024,
         storage="storage",
-        auth_api="http://localhost:3001") -> None:
+        storage_fanout=0,
+        storage_backend="file",
+        object_store_url="http://localhost:3003",
+        object_chunk_size=_CHUNK_SIZE,
+        compression="none",
+        durability="file",
+        hash_threads=0,
+        auth_api="http://localhost:3001",
+        auth_pool_size=10,
+        auth_connect_timeout=1,
+        auth_read_timeout=5,
+        auth_failure_threshold=5,
+        auth_reset_timeout=30,
+        token_cache_size=1024,
+        token_cache_ttl=60,
+        token_cache_negative_ttl=5,
+        workers=0,
+        threads=1,
+        asgi=False,
+        asgi_threads=0,
+        timeout=30) -> None:
 
     os.environ["STORAGE"] = storage
+    os.environ["STORAGE_FANOUT"] = str(storage_fanout)
+    os.environ["STORAGE_BACKEND"] = storage_backend
+    os.environ["OBJECT_STORE_URL"] = object_store_url
+    os.environ["OBJECT_CHUNK_SIZE"] = str(object_chunk_size)
+    os.environ["COMPRESSION"] = compression
+    os.environ["DURABILITY"] = durability
+    os.environ["HASH_THREADS"] = str(hash_threads)
     os.environ["AUTH_API"] = auth_api
 
+    if os.getenv("DOWNLOAD_SECRET") is None:
+        # Made before the workers are forked, so tokens signed by any of them are accepted by all
+        logger.warning("DOWNLOAD_SECRET is not set, download tokens are only valid in this server")
+        os.environ["DOWNLOAD_SECRET"] = secrets.token_urlsafe(32)
+
+    entities.Client.configure_http(
+        auth_pool_size,
+        auth_connect_timeout,
+        auth_read_timeout,
+        auth_failure_threshold,
+        auth_reset_timeout)
+    entities.Client.configure_cache(
+        token_cache_size, token_cache_ttl, token_cache_negative_ttl)
+    db._DAO.configure_cache(meta_cache_size, meta_cache_ttl)
+    entities.Blob.configure_readers(reader_cache_size)
+    entities.Blob.configure_contents(content_cache_bytes, content_cache_threshold)
+
     logger.info("Checking Auth API connection")
     if not entities.Client.check_connection():
         raise exceptions.adiauth.ServiceError(url=auth_api, reason="Auth API")
 
-    with db.connect(db_path):
-        app = flask.Flask(__app__)
+    if asgi:
+        import uvicorn # pylint: disable=import-outside-toplevel
+
+        from blobsapdi.aio import create_app as create_asgi_app # pylint: disable=import-outside-toplevel
+
+        uvicorn.run(
+            create_asgi_app(auth_api, db_path, db_pool_size, db_synchronous, asgi_threads),
+            host=host,
+            port=port,
+            timeout_graceful_shutdown=timeout)
+        return
+
+    if workers > 0:
+        from blobsapdi._wsgi import _serve # pylint: disable=import-outside-toplevel
+
+        def _worker_app() -> flask.Flask:
+            db.connect(db_path, db_pool_size, db_synchronous)
+            return create_app(download_mode)
+
+        _serve(
+            _worker_app,
+            db.close,
+            host=host,
+            port=port,
+            workers=workers,
+            threads=threads,
+            timeout=timeout)
+        return
 
-        _route_app(app)
+    with db.connect(db_path, db_pool_size, db_synchronous):
+        app = create_app(download_mode)
 
         app.run(
             host=host,
@@ -288,8 +843,36 @@ def main():
             port=args.port,
             host=args.listening,
             db_path=args.db,
+            download_mode=args.download_mode,
+            db_pool_size=args.db_pool_size,
+            db_synchronous=args.db_synchronous,
+            meta_cache_size=args.meta_cache_size,
+            meta_cache_ttl=args.meta_cache_ttl,
+            reader_cache_size=args.reader_cache_size,
+            content_cache_bytes=args.content_cache_bytes,
+            content_cache_threshold=args.content_cache_threshold,
             storage=args.storage,
-            auth_api=args.auth_api
+            storage_fanout=args.storage_fanout,
+            storage_backend=args.storage_backend,
+            object_store_url=args.object_store_url,
+            object_chunk_size=args.object_chunk_size,
+            compression=args.compression,
+            durability=args.durability,
+            hash_threads=args.hash_threads,
+            auth_api=args.auth_api,
+            auth_pool_size=args.auth_pool_size,
+            auth_connect_timeout=args.auth_connect_timeout,
+            auth_read_timeout=args.auth_read_timeout,
+            auth_failure_threshold=args.auth_failure_threshold,
+            auth_reset_timeout=args.auth_reset_timeout,
+            token_cache_size=args.token_cache_size,
+            token_cache_ttl=args.token_cache_ttl,
+            token_cache_negative_ttl=args.token_cache_negative_ttl,
+            workers=args.workers,
+            threads=args.threads,
+            asgi=args.asgi,
+            asgi_threads=args.asgi_threads,
+            timeout=args.timeout
             )
     except exceptions.adiauth.ServiceError:
         print(f"[!] Auth API at {args.auth_api} is not running.")
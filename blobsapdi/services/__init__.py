@@ -3,21 +3,27 @@ This module contains functions for
 creating, updating, deleting, and retrieving Blob objects from a database.
 """
 
-import hashlib
 import io
+import os
+
+from collections.abc import Iterator
 
 from blobsapdi import exceptions
 
 from blobsapdi._logger import LOGGER
-from blobsapdi.entities.blob import _DBBlob, Blob
+from blobsapdi.entities.blob import _DBBlob, _ReadOnlyBlob, Blob
 from blobsapdi.entities.client import Client
 from blobsapdi.enums import Visibility
+from blobsapdi.objects import _MultiHasher
+from blobsapdi.objects._hasher import _PARALLEL_THRESHOLD
+from blobsapdi.objects._multipart import _UploadSession
+from blobsapdi.objects._signer import _MAX_URL_TTL, _URL_TTL, _Signer
 
 
 logger = LOGGER
 
-_BUFF_SIZE = 1024 * 1024
-_AVAILABLE_HASHES = {"md5", "sha1", "sha256", "sha512"}
+BUFF_SIZE = 1024 * 1024
+AVAILABLE_HASHES = {"md5", "sha1", "sha256", "sha512"}
 
 def create_blob(
         user_token: str,
@@ -63,21 +69,24 @@ def update_blob(
             or the user does not have permission to access the Blob.
         UserNotExists: If the user token is invalid.
     """
-    user = Client.fetch_user(user_token)
-
-    blob = user.blobs.get(blob_id)
+    blob = _get_blob_only_owner(blob_id, user_token)
 
-    if blob is None:
-        raise exceptions.BlobNotFoundError(blob_id)
+    logger.debug("Writing to blob %s", blob_id)
 
-    blob.truncate(0)
+    hasher = _MultiHasher(AVAILABLE_HASHES)
 
-    logger.debug("Writing to blob %s", blob_id)
+    try:
+        with blob.atomic_writer() as tmp:
+            while (chunk := raw.read(BUFF_SIZE)) != b'':
+                tmp.write(chunk)
+                hasher.update(chunk)
 
-    while (chunk := raw.read(_BUFF_SIZE)) != b'':
-        blob.write(chunk)
+        blob.update_hashes(hasher.hexdigests())
+    except BaseException:
+        blob.close()
+        raise
 
-    return blob
+    return blob.reopen()
 
 def update_blob_visibility(blob_id: str, user_token: str, visibility: Visibility) -> None:
     """
@@ -93,12 +102,7 @@ def update_blob_visibility(blob_id: str, user_token: str, visibility: Visibility
             or the user does not have permission to access the Blob.
         UserNotExists: If the user token is invalid.
     """
-    user = Client.fetch_user(user_token)
-
-    blob = user.blobs.get(blob_id)
-
-    if blob is None:
-        raise exceptions.BlobNotFoundError(blob_id)
+    blob = _get_blob_only_owner(blob_id, user_token)
 
     blob.visibility = visibility
 
@@ -115,25 +119,24 @@ def delete_blob(blob_id: str, user_token: str) -> None:
             or the user does not have permission to access the Blob.
         UserNotExists: If the user token is invalid.
     """
-    user = Client.fetch_user(user_token)
-
-    blob = user.blobs.get(blob_id)
-
-    if blob is None:
-        raise exceptions.BlobNotFoundError(blob_id)
+    blob = _get_blob_only_owner(blob_id, user_token)
 
     blob.delete()
 
-def get_hash_blob(blob_id: str, user_token: str, hashes_types: str) -> tuple[str, str]:
+def get_hash_blob(blob_id: str, user_token: str, hashes_types: list[str]) -> dict[str, str]:
     """
-    Gets the hash of a Blob object from the database.
+    Gets the hashes of a Blob object from the database.
+
+    Hashes stored when the Blob was uploaded are returned as is, the rest
+    are computed from its contents and stored.
 
     Args:
         blob_id: The ID of the Blob.
         user_token: The token of the Blob owner.
+        hashes_types: The hash algorithms to get.
 
     Returns:
-        int: The hash of the Blob.
+        dict[str, str]: The hashes of the Blob by algorithm.
 
     Raises:
         BlobNotFoundError: If the Blob was not found 
@@ -142,17 +145,43 @@ def get_hash_blob(blob_id: str, user_token: str, hashes_types: str) -> tuple[str
     """
     blob = get_blob(blob_id, user_token)
 
-    for hash_type in hashes_types:
-        if hash_type not in _AVAILABLE_HASHES:
-            raise ValueError(f"Invalid hash type: {hash_type}")
+    return get_blob_hashes(blob, hashes_types)
 
-    hashes = { }
+def get_blob_hashes(blob: _DBBlob, hashes_types: list[str]) -> dict[str, str]:
+    """
+    Gets the hashes of a readable Blob, computing and storing the missing ones.
 
-    for hash_type in hashes_types:
-        hashes[hash_type] = hashlib.file_digest(blob, hash_type, _bufsize = _BUFF_SIZE).hexdigest()
-        blob.seek(0)
+    Args:
+        blob: The Blob, which is closed once its hashes are known.
+        hashes_types: The hash algorithms to get.
+
+    Returns:
+        dict[str, str]: The hashes of the Blob by algorithm.
+
+    Raises:
+        ValueError: If any of the hash algorithms is not available.
+    """
+    with blob:
+        for hash_type in hashes_types:
+            if hash_type not in AVAILABLE_HASHES:
+                raise ValueError(f"Invalid hash type: {hash_type}")
+
+        generation, hashes = blob.stored_hashes()
+
+        missing = {hash_type for hash_type in hashes_types if hash_type not in hashes}
+
+        if missing:
+            logger.debug("Computing %s hashes of blob %s", ", ".join(missing), blob.id_)
+
+            # Opened after reading the generation, so the digests are never
+            # stored for contents older than that generation
+            computed = blob.digests(missing, BUFF_SIZE)
+
+            blob.add_hashes(generation, computed)
 
-    return hashes
+            hashes |= computed
+
+    return {hash_type: hashes[hash_type] for hash_type in hashes_types}
 
 def get_blob(blob_id: str, user_token: str) -> _DBBlob:
     """
@@ -167,19 +196,105 @@ def get_blob(blob_id: str, user_token: str) -> _DBBlob:
     Raises:
         BlobNotFoundError: If the Blob was not found 
             or the user does not have permission to access the Blob.
-        UserNotExists: If the user token is invalid.
+        UserNotExists: If the Blob is not public and the user token is invalid.
     """
-    blob = Blob.fetch(blob_id)
+    record = Blob.fetch_record(blob_id)
+    username = None
 
-    if blob.visibility == Visibility.PUBLIC:
-        return blob
+    # Public Blobs are served without resolving the token
+    if user_token is not None and not is_public_blob(blob_id, record):
+        username = Client.fetch_user(user_token).username
+
+    return get_readable_blob(blob_id, username, record)
+
+def open_blob(blob_id: str, user_token: str) -> _ReadOnlyBlob:
+    """
+    Opens a Blob only to read its contents, through a reader shared with the other
+    readers of the same contents and kept open for the next ones.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of a user allowed to read the Blob, None for public Blobs.
+
+    Returns:
+        The read-only Blob.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the Blob is not public and the user token is invalid.
+    """
+    record = Blob.fetch_record(blob_id)
+    username = None
 
-    if user_token is None:
+    # Public Blobs are served without resolving the token
+    if user_token is not None and not is_public_blob(blob_id, record):
+        username = Client.fetch_user(user_token).username
+
+    return open_readable_blob(blob_id, username, record)
+
+def is_public_blob(blob_id: str, record: dict = None) -> bool:
+    """
+    Checks if a Blob is public.
+
+    Args:
+        blob_id: The ID of the Blob.
+        record: The record of the Blob from Blob.fetch_record, if already fetched.
+
+    Returns:
+        If anyone may read the Blob.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found.
+    """
+    return Blob.can_read(blob_id, record=record)
+
+def open_readable_blob(
+        blob_id: str, username: str | None, record: dict = None) -> _ReadOnlyBlob:
+    """
+    Opens a Blob only to read its contents, only if the user is allowed to read it.
+
+    Args:
+        blob_id: The ID of the Blob.
+        username: The name of the user, None for anonymous requests.
+        record: The record of the Blob from Blob.fetch_record, if already fetched.
+
+    Returns:
+        The read-only Blob.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+    """
+    if not Blob.can_read(blob_id, username, record):
         raise exceptions.BlobNotFoundError(blob_id)
 
-    user = Client.fetch_user(user_token)
+    return Blob.open_readonly(blob_id, record)
+
+def get_readable_blob(blob_id: str, username: str | None, record: dict = None) -> _DBBlob:
+    """
+    Gets a Blob object from the database, only if the user is allowed to read it.
+
+    Args:
+        blob_id: The ID of the Blob.
+        username: The name of the user, None for anonymous requests.
+        record: The record of the Blob from Blob.fetch_record, if already fetched.
+
+    Returns:
+        Blob: The Blob object.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+    """
+    blob = Blob.fetch(blob_id, username, record)
+
+    if blob.visibility == Visibility.PUBLIC:
+        return blob
+
+    if username is None or not blob.has_permissions(username):
+        blob.close()
 
-    if not blob.has_permissions(user.username):
         raise exceptions.BlobNotFoundError(blob_id)
 
     return blob
@@ -199,7 +314,46 @@ def get_user_blobs(user_token: str) -> list[str]:
     """
     user = Client.fetch_user(user_token)
 
-    return list(user.blobs.keys())
+    return list(user.blobs)
+
+def get_user_blobs_page(
+        user_token: str,
+        limit: int,
+        after: str = None) -> tuple[list[str], str | None]:
+    """
+    Gets a page of the IDs of the Blobs owned by a user, ordered by ID.
+
+    Args:
+        user_token: The token of the user.
+        limit: The maximum number of IDs of the page.
+        after: The last ID of the previous page, None for the first page.
+
+    Returns:
+        The IDs of the page and its last ID, or None if it is the last page.
+
+    Raises:
+        UserNotExists: If the user token is invalid.
+    """
+    user = Client.fetch_user(user_token)
+
+    return user.blobs.page(limit, after)
+
+def iter_user_blobs(user_token: str, after: str = None) -> Iterator[str]:
+    """
+    Iterates over the IDs of the Blobs owned by a user, reading them page by page.
+
+    The user is authenticated before returning, the Blobs are read while iterating.
+
+    Args:
+        user_token: The token of the user.
+        after: The ID after which to start, None to start from the first one.
+
+    Raises:
+        UserNotExists: If the user token is invalid.
+    """
+    user = Client.fetch_user(user_token)
+
+    return user.blobs.iter_after(after)
 
 def _get_blob_only_owner(blob_id: str, user_token: str) -> _DBBlob:
     """
@@ -219,7 +373,23 @@ def _get_blob_only_owner(blob_id: str, user_token: str) -> _DBBlob:
     """
     user = Client.fetch_user(user_token)
 
-    blob = user.blobs.get(blob_id)
+    return get_owned_blob(blob_id, user.username)
+
+def get_owned_blob(blob_id: str, username: str) -> _DBBlob:
+    """
+    Gets a Blob object from the database, only if it is owned by the user.
+
+    Args:
+        blob_id: The ID of the Blob.
+        username: The name of the Blob owner.
+
+    Returns:
+        Blob: The Blob object.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found or is not owned by the user.
+    """
+    blob = Blob.fetch_user_blobs(username).get(blob_id)
 
     if blob is None:
         raise exceptions.BlobNotFoundError(blob_id)
@@ -339,3 +509,413 @@ def get_blob_visibility(blob_id: str, user_token: str) -> Visibility:
     blob = _get_blob_only_owner(blob_id, user_token)
 
     return blob.visibility
+
+def create_blobs(user_token: str, visibilities: list[Visibility]) -> list[str]:
+    """
+    Creates several Blobs with a single authentication and transaction.
+
+    Args:
+        user_token: The token of the user creating the Blobs.
+        visibilities: The visibility of every Blob.
+
+    Returns:
+        list[str]: The IDs of the created Blobs, in the same order.
+
+    Raises:
+        UserNotExists: If the user token is invalid.
+    """
+    user = Client.fetch_user(user_token)
+
+    blob_ids = Blob.create_many(user.username, visibilities)
+
+    logger.debug("Created %d blobs for user %s", len(blob_ids), user.username)
+
+    return blob_ids
+
+def delete_blobs(user_token: str, blob_ids: list[str]) -> set[str]:
+    """
+    Deletes several Blobs with a single authentication and transaction.
+
+    Args:
+        user_token: The token of the Blobs owner.
+        blob_ids: The IDs of the Blobs.
+
+    Returns:
+        set[str]: The IDs of the deleted Blobs, the ones not found or not owned are skipped.
+
+    Raises:
+        UserNotExists: If the user token is invalid.
+    """
+    user = Client.fetch_user(user_token)
+
+    return Blob.delete_many(blob_ids, user.username)
+
+def update_blobs_visibility(
+        user_token: str, visibilities: list[tuple[str, Visibility]]) -> set[str]:
+    """
+    Updates the visibility of several Blobs with a single authentication and transaction.
+
+    Args:
+        user_token: The token of the Blobs owner.
+        visibilities: The ID and new visibility of every Blob.
+
+    Returns:
+        set[str]: The IDs of the updated Blobs, the ones not found or not owned are skipped.
+
+    Raises:
+        UserNotExists: If the user token is invalid.
+    """
+    user = Client.fetch_user(user_token)
+
+    return Blob.update_visibility_many(user.username, visibilities)
+
+def update_blobs_permissions(
+        user_token: str,
+        permissions: list[tuple[str, set[str]]],
+        replace: bool = True) -> set[str]:
+    """
+    Updates the users allowed to read several Blobs with a single authentication and transaction.
+
+    Args:
+        user_token: The token of the Blobs owner.
+        permissions: The ID of every Blob and the usernames to allow.
+        replace: Whether the usernames replace the allowed ones or are added to them.
+
+    Returns:
+        set[str]: The IDs of the updated Blobs, the ones not found or not owned are skipped.
+
+    Raises:
+        UserNotExists: If the user token is invalid.
+    """
+    user = Client.fetch_user(user_token)
+
+    return Blob.update_permissions_many(user.username, permissions, replace)
+
+def create_upload(blob_id: str, user_token: str) -> str:
+    """
+    Starts a resumable upload of the contents of a Blob, whose parts are uploaded separately.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of the Blob owner.
+
+    Returns:
+        str: The ID of the upload.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found or is not owned by the user.
+        UserNotExists: If the user token is invalid.
+    """
+    user = Client.fetch_user(user_token)
+
+    check_owned_blob(blob_id, user.username)
+
+    session = _UploadSession.create(blob_id)
+
+    logger.debug("Started upload %s of blob %s", session.upload_id, blob_id)
+
+    return session.upload_id
+
+def upload_part(
+        blob_id: str,
+        upload_id: str,
+        part_number: int,
+        user_token: str,
+        raw: io.BytesIO) -> int:
+    """
+    Uploads a part of a resumable upload, replacing the part with the same number if any.
+
+    Args:
+        blob_id: The ID of the Blob.
+        upload_id: The ID of the upload.
+        part_number: The number of the part, starting from 1.
+        user_token: The token of the Blob owner.
+        raw: The data of the part.
+
+    Returns:
+        int: The size of the part.
+
+    Raises:
+        ValueError: If the part number is out of range.
+        BlobNotFoundError: If the Blob was not found or is not owned by the user.
+        UploadNotFoundError: If the upload was not found.
+        UserNotExists: If the user token is invalid.
+    """
+    user = Client.fetch_user(user_token)
+
+    session = open_owned_upload(blob_id, upload_id, user.username)
+
+    size = 0
+
+    try:
+        with session.part_writer(part_number) as tmp:
+            while (chunk := raw.read(BUFF_SIZE)) != b'':
+                tmp.write(chunk)
+                size += len(chunk)
+    except FileNotFoundError as e:
+        raise exceptions.UploadNotFoundError(upload_id) from e
+
+    return size
+
+def get_upload_parts(blob_id: str, upload_id: str, user_token: str) -> dict[int, int]:
+    """
+    Gets the parts uploaded so far, to resume an interrupted upload.
+
+    Args:
+        blob_id: The ID of the Blob.
+        upload_id: The ID of the upload.
+        user_token: The token of the Blob owner.
+
+    Returns:
+        dict[int, int]: The size of every uploaded part by number.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found or is not owned by the user.
+        UploadNotFoundError: If the upload was not found.
+        UserNotExists: If the user token is invalid.
+    """
+    user = Client.fetch_user(user_token)
+
+    return open_owned_upload(blob_id, upload_id, user.username).parts()
+
+def complete_upload(
+        blob_id: str,
+        upload_id: str,
+        user_token: str,
+        parts: list[int] = None) -> _DBBlob:
+    """
+    Replaces the contents of a Blob with the concatenation of the parts of an upload.
+
+    Args:
+        blob_id: The ID of the Blob.
+        upload_id: The ID of the upload.
+        user_token: The token of the Blob owner.
+        parts: The numbers of the parts in ascending order, every uploaded part if None.
+
+    Returns:
+        Blob: The updated Blob object.
+
+    Raises:
+        ValueError: If the parts are not valid.
+        BlobNotFoundError: If the Blob was not found or is not owned by the user.
+        UploadNotFoundError: If the upload was not found.
+        UserNotExists: If the user token is invalid.
+    """
+    user = Client.fetch_user(user_token)
+
+    return complete_owned_upload(blob_id, upload_id, user.username, parts)
+
+def abort_upload(blob_id: str, upload_id: str, user_token: str) -> None:
+    """
+    Discards an upload and every part uploaded to it.
+
+    Args:
+        blob_id: The ID of the Blob.
+        upload_id: The ID of the upload.
+        user_token: The token of the Blob owner.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found or is not owned by the user.
+        UploadNotFoundError: If the upload was not found.
+        UserNotExists: If the user token is invalid.
+    """
+    user = Client.fetch_user(user_token)
+
+    open_owned_upload(blob_id, upload_id, user.username).remove()
+
+def check_owned_blob(blob_id: str, username: str) -> None:
+    """
+    Checks that a Blob is owned by a user without opening it.
+
+    Args:
+        blob_id: The ID of the Blob.
+        username: The name of the Blob owner.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found or is not owned by the user.
+    """
+    if blob_id not in Blob.fetch_user_blobs(username):
+        raise exceptions.BlobNotFoundError(blob_id)
+
+def open_owned_upload(blob_id: str, upload_id: str, username: str) -> _UploadSession:
+    """
+    Opens an upload of a Blob owned by a user.
+
+    Args:
+        blob_id: The ID of the Blob.
+        upload_id: The ID of the upload.
+        username: The name of the Blob owner.
+
+    Returns:
+        The upload session.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found or is not owned by the user.
+        UploadNotFoundError: If the upload was not found.
+    """
+    check_owned_blob(blob_id, username)
+
+    try:
+        return _UploadSession.open(blob_id, upload_id)
+    except FileNotFoundError as e:
+        raise exceptions.UploadNotFoundError(upload_id) from e
+
+def complete_owned_upload(
+        blob_id: str,
+        upload_id: str,
+        username: str,
+        parts: list[int] = None) -> _DBBlob:
+    """
+    Replaces the contents of a Blob owned by a user with the parts of an upload.
+
+    The parts are hashed as they are concatenated, so every part is read once and
+    the digests match the contents written even if a part is uploaded again meanwhile.
+
+    Args:
+        blob_id: The ID of the Blob.
+        upload_id: The ID of the upload.
+        username: The name of the Blob owner.
+        parts: The numbers of the parts to concatenate, None for every uploaded part.
+
+    Returns:
+        Blob: The Blob with the new contents.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found or is not owned by the user.
+        UploadNotFoundError: If the upload was not found.
+        ValueError: If any of the parts was not uploaded.
+    """
+    session = open_owned_upload(blob_id, upload_id, username)
+
+    # Fails on invalid parts before the Blob is opened
+    paths = session.paths(parts)
+
+    blob = get_owned_blob(blob_id, username)
+
+    logger.debug("Assembling upload %s into blob %s", upload_id, blob_id)
+
+    hasher = _MultiHasher(
+        AVAILABLE_HASHES,
+        parallel=sum(os.path.getsize(_p) for _p in paths) >= _PARALLEL_THRESHOLD)
+
+    try:
+        with blob.atomic_writer() as tmp:
+            session.assemble(tmp, parts, hasher)
+
+        blob.update_hashes(hasher.hexdigests())
+    except BaseException:
+        blob.close()
+        raise
+
+    session.remove()
+
+    return blob.reopen()
+
+def create_download_token(blob_id: str, user_token: str) -> tuple[str, int]:
+    """
+    Creates a short-lived token to download the current contents of a Blob without
+    authenticating again, for instance to fetch several ranges in parallel.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of a user allowed to read the Blob, None for public Blobs.
+
+    Returns:
+        tuple[str, int]: The token and the time it expires at, in seconds since the epoch.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the user token is invalid.
+    """
+    with get_blob(blob_id, user_token) as blob:
+        etag = blob.etag
+
+    return _Signer.from_env().sign("download", blob_id, etag)
+
+def get_blob_by_token(blob_id: str, token: str) -> _ReadOnlyBlob:
+    """
+    Opens a Blob to be read with a download token, without the authentication API
+    nor the permissions of the Blob.
+
+    Args:
+        blob_id: The ID of the Blob.
+        token: A token created by create_download_token.
+
+    Returns:
+        The read-only Blob, with the same contents the token was created for.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found.
+        InvalidTokenError: If the token is not valid for the Blob or its contents changed.
+    """
+    etag = Blob.fetch_etag(blob_id)
+
+    try:
+        _Signer.from_env().verify(token, "download", blob_id, str(etag))
+    except ValueError as e:
+        raise exceptions.InvalidTokenError(token) from e
+
+    blob = Blob.open_readonly(blob_id)
+
+    if blob.etag != etag:
+        # Replaced meanwhile, the token is only valid for the previous contents
+        blob.close()
+        raise exceptions.InvalidTokenError(token)
+
+    return blob
+
+def create_presigned_url(blob_id: str, user_token: str, ttl: int = _URL_TTL) -> tuple[int, str]:
+    """
+    Signs a URL to download a Blob without authenticating, until it expires.
+
+    Unlike download tokens, a signed URL is not bound to the current contents,
+    it keeps serving the Blob after it is updated, until it expires or the Blob is deleted.
+
+    Args:
+        blob_id: The ID of the Blob.
+        user_token: The token of a user allowed to read the Blob, None for public Blobs.
+        ttl: The number of seconds the URL is valid for.
+
+    Returns:
+        tuple[int, str]: The time the URL expires at, in seconds since the epoch,
+            and its signature.
+
+    Raises:
+        ValueError: If the ttl is out of range.
+        BlobNotFoundError: If the Blob was not found 
+            or the user does not have permission to access the Blob.
+        UserNotExists: If the user token is invalid.
+    """
+    if not 0 < ttl <= _MAX_URL_TTL:
+        raise ValueError(f"Expiration must be between 1 and {_MAX_URL_TTL} seconds")
+
+    get_blob(blob_id, user_token).close()
+
+    token, expires = _Signer.from_env().sign("url", blob_id, ttl=ttl)
+
+    return expires, token.partition(".")[2]
+
+def get_blob_by_signature(blob_id: str, expires: str, signature: str) -> _ReadOnlyBlob:
+    """
+    Opens a Blob to be read with a signed URL, without the authentication API
+    nor the permissions of the Blob.
+
+    Args:
+        blob_id: The ID of the Blob.
+        expires: The expiration time of the URL, as given in its query.
+        signature: The signature of the URL, as given in its query.
+
+    Returns:
+        The read-only Blob.
+
+    Raises:
+        BlobNotFoundError: If the Blob was not found.
+        InvalidTokenError: If the signature is not valid for the Blob or the URL expired.
+    """
+    try:
+        _Signer.from_env().verify(f"{expires}.{signature}", "url", blob_id)
+    except ValueError as e:
+        raise exceptions.InvalidTokenError(signature) from e
+
+    return Blob.open_readonly(blob_id)
@@ -0,0 +1,68 @@
+"""
+This package contains the storage backends that blob contents can be stored in,
+instead of the files of the STORAGE directory.
+
+The backend is selected by the STORAGE_BACKEND environment variable: 'local',
+'memory' or 'chunked', which stores contents in the object store at
+OBJECT_STORE_URL in chunks of OBJECT_CHUNK_SIZE bytes.
+"""
+
+import os
+
+from threading import Lock
+
+from blobsapdi.objects._content_store import _backend as _backend_name
+from blobsapdi.objects._layout import _fanout
+from blobsapdi.storage._backend import _BytesReader, _ObjectReader, _ObjectStat, _StorageBackend
+from blobsapdi.storage._chunked import _CHUNK_SIZE, _ChunkedBackend
+from blobsapdi.storage._local import _LocalBackend
+from blobsapdi.storage._memory import _MemoryBackend
+
+
+_OBJECT_BACKEND: tuple[tuple, _StorageBackend] = None
+_OBJECT_BACKEND_LOCK = Lock()
+
+def _object_backend() -> _StorageBackend | None:
+    """
+    Returns the storage backend shared by every blob of the process, None if
+    blobs are stored as files of the STORAGE directory.
+
+    The backend is built again whenever the environment variables it is built from change.
+    """
+    global _OBJECT_BACKEND # pylint: disable=global-statement
+
+    _name = _backend_name()
+
+    if _name in ('file', 'cas'):
+        return None
+
+    _key = (
+        _name,
+        os.getenv("STORAGE", "storage"),
+        _fanout(),
+        os.getenv("OBJECT_STORE_URL", "http://localhost:3003"),
+        int(os.getenv("OBJECT_CHUNK_SIZE", str(_CHUNK_SIZE))))
+
+    with _OBJECT_BACKEND_LOCK:
+        if _OBJECT_BACKEND is None or _OBJECT_BACKEND[0] != _key:
+            if _name == 'local':
+                _storage_backend = _LocalBackend(_key[1], _key[2])
+            elif _name == 'memory':
+                _storage_backend = _MemoryBackend()
+            else:
+                _storage_backend = _ChunkedBackend(_key[3], _key[4])
+
+            _OBJECT_BACKEND = (_key, _storage_backend)
+
+        return _OBJECT_BACKEND[1]
+
+__all__ = [
+    "_BytesReader",
+    "_ChunkedBackend",
+    "_LocalBackend",
+    "_MemoryBackend",
+    "_ObjectReader",
+    "_ObjectStat",
+    "_StorageBackend",
+    "_object_backend"
+]
@@ -0,0 +1,156 @@
+"""
+This module contains the interface every storage backend of blob contents implements.
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager
+from typing import BinaryIO, NamedTuple
+
+
+class _ObjectStat(NamedTuple):
+    """
+    The status of a stored object, named after the fields of os.stat_result.
+    """
+    st_size: int
+    st_mtime: float
+
+class _ObjectReader(ABC):
+    """
+    A consistent snapshot of the contents of an object, read by ranges.
+    """
+
+    @property
+    @abstractmethod
+    def stat(self) -> _ObjectStat:
+        """
+        Returns the status of the snapshot.
+        """
+
+    @abstractmethod
+    def read_range(self, offset: int, length: int) -> bytes:
+        """
+        Reads a range of the contents.
+
+        Args:
+            offset: The position of the first byte.
+            length: The maximum number of bytes to read.
+
+        Returns:
+            The bytes read, fewer than length only at the end of the contents.
+        """
+
+    def close(self) -> None:
+        """
+        Releases the resources held by the reader.
+        """
+
+class _BytesReader(_ObjectReader):
+    """
+    A reader of contents held in memory.
+    """
+
+    @property
+    def stat(self) -> _ObjectStat:
+        return _ObjectStat(len(self._data), self._mtime)
+
+    def __init__(self, data: bytes, mtime: float) -> None:
+        """
+        Initializes a new instance of the _BytesReader class.
+
+        Args:
+            data: The contents.
+            mtime: The modification time of the contents.
+        """
+        self._data = data
+        self._mtime = mtime
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        return self._data[offset:offset + length]
+
+class _StorageBackend(ABC):
+    """
+    A store of blob contents addressed by key.
+
+    Writes are atomic: readers opened before a write completes keep reading the
+    previous contents, and contents are never visible partially written.
+    """
+
+    @abstractmethod
+    def reader(self, key: str) -> _ObjectReader:
+        """
+        Opens the current contents of an object.
+
+        Args:
+            key: The key of the object.
+
+        Returns:
+            A reader of the contents.
+
+        Raises:
+            FileNotFoundError: If the object does not exist.
+        """
+
+    @abstractmethod
+    def writer(self, key: str) -> AbstractContextManager[BinaryIO]:
+        """
+        Opens a stream that replaces the contents of an object when the context exits cleanly.
+
+        Args:
+            key: The key of the object.
+
+        Returns:
+            A context manager yielding the stream to write the new contents to.
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Deletes an object, if it exists.
+
+        Args:
+            key: The key of the object.
+        """
+
+    def stat(self, key: str) -> _ObjectStat:
+        """
+        Gets the status of an object.
+
+        Args:
+            key: The key of the object.
+
+        Raises:
+            FileNotFoundError: If the object does not exist.
+        """
+        _reader = self.reader(key)
+
+        try:
+            return _reader.stat
+        finally:
+            _reader.close()
+
+    def read_range(self, key: str, offset: int, length: int) -> bytes:
+        """
+        Reads a range of the contents of an object.
+
+        Args:
+            key: The key of the object.
+            offset: The position of the first byte.
+            length: The maximum number of bytes to read.
+
+        Raises:
+            FileNotFoundError: If the object does not exist.
+        """
+        _reader = self.reader(key)
+
+        try:
+            return _reader.read_range(offset, length)
+        finally:
+            _reader.close()
+
+    def local_path(self, _key: str) -> str | None:
+        """
+        Returns the path of an object in the local filesystem, None if it is not stored locally.
+        """
+        return None
+
+__export__ = (_ObjectStat, _ObjectReader, _BytesReader, _StorageBackend)
@@ -0,0 +1,254 @@
+"""
+This module contains the _ChunkedBackend class, which stores every object as
+fixed-size chunks in an HTTP object store.
+"""
+
+import io
+import json
+import time
+import uuid
+
+from contextlib import contextmanager
+from threading import Lock
+from typing import BinaryIO, Iterator
+
+import requests
+
+from requests.adapters import HTTPAdapter
+
+from blobsapdi.storage._backend import _ObjectReader, _ObjectStat, _StorageBackend
+
+
+_CHUNK_SIZE = 4 * 1024 * 1024
+
+class _ChunkedReader(_ObjectReader):
+    """
+    A reader of the chunks listed by the manifest of an object.
+
+    Whole chunks are fetched and the last one is kept until its end is read, so
+    sequential reads of ranges smaller than a chunk fetch every chunk only once.
+    """
+
+    @property
+    def stat(self) -> _ObjectStat:
+        return _ObjectStat(self._manifest["size"], self._manifest["mtime"])
+
+    def __init__(self, backend: '_ChunkedBackend', key: str, manifest: dict) -> None:
+        """
+        Initializes a new instance of the _ChunkedReader class.
+
+        Args:
+            backend: The backend the object is stored in.
+            key: The key of the object.
+            manifest: The manifest of the version of the object to read.
+        """
+        self._backend = backend
+        self._key = key
+        self._manifest = manifest
+
+        self._last: tuple[int, bytes] | None = None
+
+    def _chunk(self, index: int) -> bytes:
+        # Swapped as a whole, so readers shared by several threads see a consistent pair
+        _last = self._last
+
+        if _last is not None and _last[0] == index:
+            return _last[1]
+
+        _data = self._backend._get(
+            self._backend._chunk_name(self._key, self._manifest["version"], index))
+
+        self._last = (index, _data)
+
+        return _data
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        _size = self._manifest["size"]
+        _chunk_size = self._manifest["chunk_size"]
+
+        _end = min(offset + length, _size)
+
+        if offset >= _end:
+            return b''
+
+        _parts = []
+
+        for _index in range(offset // _chunk_size, (_end - 1) // _chunk_size + 1):
+            _start = max(offset - _index * _chunk_size, 0)
+            _stop = min(_end - _index * _chunk_size, _chunk_size)
+
+            _chunk = self._chunk(_index)
+
+            _parts.append(_chunk[_start:_stop] if _stop - _start < len(_chunk) else _chunk)
+
+            if _stop >= len(_chunk):
+                # Sequential reads never come back to a chunk read to its end
+                self._last = None
+
+        return b''.join(_parts)
+
+    def close(self) -> None:
+        self._last = None
+
+class _ChunkWriter(io.RawIOBase):
+    """
+    A stream that uploads every chunk of the new version of an object as soon as it is full.
+    """
+
+    def __init__(self, backend: '_ChunkedBackend', key: str, version: str) -> None:
+        self._backend = backend
+        self._key = key
+        self._version = version
+
+        self._buffer = bytearray()
+
+        self.size = 0
+        self.chunks = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: bytes) -> int:
+        self._buffer += b
+        self.size += len(b)
+
+        while len(self._buffer) >= self._backend.chunk_size:
+            self._upload(self._buffer[:self._backend.chunk_size])
+            del self._buffer[:self._backend.chunk_size]
+
+        return len(b)
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._upload(self._buffer)
+            self._buffer.clear()
+
+    def _upload(self, chunk: bytes) -> None:
+        self._backend._put(
+            self._backend._chunk_name(self._key, self._version, self.chunks), bytes(chunk))
+        self.chunks += 1
+
+class _ChunkedBackend(_StorageBackend):
+    """
+    A backend that splits every object into chunks stored in an HTTP object store.
+
+    A manifest named after the key lists the chunks of the current version, and
+    is only replaced once every chunk of a new version is uploaded, so writes are
+    atomic and ranges are read by fetching only the chunks they span. Manifests
+    are swapped one at a time, so the chunks of every replaced version are deleted.
+    """
+
+    def __init__(
+            self,
+            url: str,
+            chunk_size: int = _CHUNK_SIZE,
+            pool_size: int = 10,
+            timeout: float = 30) -> None:
+        """
+        Initializes a new instance of the _ChunkedBackend class.
+
+        Args:
+            url: The root URL of the object store.
+            chunk_size: The size of the chunks new versions are split into.
+            pool_size: The maximum number of kept-alive connections to the store.
+            timeout: The number of seconds a request to the store may take.
+        """
+        self.url = url.rstrip("/")
+        self.chunk_size = chunk_size
+
+        self._timeout = timeout
+        self._manifest_lock = Lock()
+
+        _adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+
+        self._session = requests.Session()
+        self._session.mount("http://", _adapter)
+        self._session.mount("https://", _adapter)
+
+    @staticmethod
+    def _chunk_name(key: str, version: str, index: int) -> str:
+        return f"{key}.{version}.{index}"
+
+    def _get(self, name: str) -> bytes:
+        _response = self._session.get(f"{self.url}/{name}", timeout=self._timeout)
+
+        if _response.status_code == 404:
+            raise FileNotFoundError(name)
+
+        if _response.status_code != 200:
+            raise OSError(f"Object store answered {_response.status_code} for {name}")
+
+        return _response.content
+
+    def _put(self, name: str, data: bytes) -> None:
+        _response = self._session.put(f"{self.url}/{name}", data=data, timeout=self._timeout)
+
+        if _response.status_code not in (200, 201, 204):
+            raise OSError(f"Object store answered {_response.status_code} for {name}")
+
+    def _delete(self, name: str) -> None:
+        _response = self._session.delete(f"{self.url}/{name}", timeout=self._timeout)
+
+        if _response.status_code not in (200, 204, 404):
+            raise OSError(f"Object store answered {_response.status_code} for {name}")
+
+    def _manifest(self, key: str) -> dict:
+        return json.loads(self._get(key))
+
+    def _delete_chunks(self, key: str, manifest: dict) -> None:
+        for _index in range(manifest["chunks"]):
+            self._delete(self._chunk_name(key, manifest["version"], _index))
+
+    def reader(self, key: str) -> _ObjectReader:
+        return _ChunkedReader(self, key, self._manifest(key))
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[BinaryIO]:
+        _version = uuid.uuid4().hex
+        _writer = _ChunkWriter(self, key, _version)
+
+        try:
+            yield _writer
+
+            _writer.flush()
+
+            # The manifest read is the one replaced, not one written by a concurrent writer
+            with self._manifest_lock:
+                try:
+                    _previous = self._manifest(key)
+                except FileNotFoundError:
+                    _previous = None
+
+                self._put(key, json.dumps({
+                    "version": _version,
+                    "size": _writer.size,
+                    "chunk_size": self.chunk_size,
+                    "chunks": _writer.chunks,
+                    "mtime": time.time()
+                }).encode())
+        except BaseException:
+            self._delete_chunks(key, {"version": _version, "chunks": _writer.chunks})
+            raise
+
+        # Readers still holding the previous manifest fail from now on
+        if _previous is not None:
+            self._delete_chunks(key, _previous)
+
+    def delete(self, key: str) -> None:
+        with self._manifest_lock:
+            try:
+                _manifest = self._manifest(key)
+            except FileNotFoundError:
+                return
+
+            self._delete(key)
+
+        self._delete_chunks(key, _manifest)
+
+    def close(self) -> None:
+        """
+        Closes the connections to the object store.
+        """
+        self._session.close()
+
+__export__ = (_ChunkedBackend,)
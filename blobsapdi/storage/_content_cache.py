@@ -0,0 +1,186 @@
+"""
+This module contains the _ContentCache class, which keeps the contents of small blobs
+in memory so that hot ones are served without reading the storage again.
+
+The cache is bounded by the total bytes of the contents it holds, evicting the least
+recently used ones, and only holds contents up to a size threshold, so a few large
+blobs never push out every small one. It is local to each process.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Hashable
+
+from blobsapdi.storage._backend import _BytesReader, _ObjectReader
+
+
+class _CachedReader(_BytesReader):
+    """
+    A reader of contents held by a _ContentCache, which counts the bytes it serves.
+    """
+
+    def __init__(self, cache: '_ContentCache', data: bytes, mtime: float) -> None:
+        """
+        Initializes a new instance of the _CachedReader class.
+
+        Args:
+            cache: The cache holding the contents.
+            data: The contents.
+            mtime: The modification time of the contents.
+        """
+        super().__init__(data, mtime)
+
+        self._cache = cache
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        _data = super().read_range(offset, length)
+
+        self._cache.served(len(_data))
+
+        return _data
+
+class _ContentCache:
+    """
+    A cache of contents by key, bounded by their total size in bytes.
+
+    Keys are (name, generation) tuples, the generation changing whenever the contents
+    of the name do. Contents whose generation is None are never cached.
+    """
+
+    def __init__(self, maxbytes: int = 0, threshold: int = 64 * 1024) -> None:
+        """
+        Initializes a new instance of the _ContentCache class.
+
+        Args:
+            maxbytes: The maximum total size of the cached contents, 0 disables the cache.
+            threshold: The maximum size of the contents that are cached.
+        """
+        self.maxbytes = maxbytes
+        self.threshold = threshold
+
+        self._entries: OrderedDict[Hashable, tuple[bytes, float]] = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+
+        self._invalidations = 0
+        self._hits = 0
+        self._misses = 0
+        self._served = 0
+
+    def get(self, key: tuple[str, Hashable]) -> _CachedReader | None:
+        """
+        Opens a reader of the cached contents with a key, marking them as recently used.
+
+        Args:
+            key: The name and generation of the contents.
+
+        Returns:
+            The reader, None if the contents are not cached.
+        """
+        if self.maxbytes <= 0 or key[1] is None:
+            return None
+
+        with self._lock:
+            _entry = self._entries.get(key)
+
+            if _entry is None:
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+        return _CachedReader(self, *_entry)
+
+    def load(self, key: tuple[str, Hashable], reader: _ObjectReader) -> _BytesReader | None:
+        """
+        Reads contents into the cache, if they are small enough.
+
+        Args:
+            key: The name and generation of the contents.
+            reader: The reader of the contents, which is left open.
+
+        Returns:
+            A reader of the contents read, None if they are not cached.
+        """
+        if self.maxbytes <= 0 or key[1] is None or isinstance(reader, _BytesReader):
+            # Contents already held in memory are not copied
+            return None
+
+        _stat = reader.stat
+
+        if _stat.st_size > min(self.threshold, self.maxbytes):
+            return None
+
+        with self._lock:
+            self._misses += 1
+            _invalidations = self._invalidations
+
+        _data = reader.read_range(0, _stat.st_size)
+
+        with self._lock:
+            # Contents invalidated while being read may be older than the key says
+            if _invalidations == self._invalidations and key not in self._entries:
+                self._entries[key] = (_data, _stat.st_mtime)
+                self._bytes += len(_data)
+
+                while self._bytes > self.maxbytes:
+                    self._bytes -= len(self._entries.popitem(last=False)[1][0])
+
+        return _BytesReader(_data, _stat.st_mtime)
+
+    def served(self, size: int) -> None:
+        """
+        Counts bytes served from the cache.
+
+        Args:
+            size: The number of bytes.
+        """
+        with self._lock:
+            self._served += size
+
+    def invalidate(self, name: str) -> None:
+        """
+        Removes the cached contents of every generation of a name.
+
+        Args:
+            name: The name of the contents.
+        """
+        with self._lock:
+            self._invalidations += 1
+
+            for _key in [_k for _k in self._entries if _k[0] == name]:
+                self._bytes -= len(self._entries.pop(_key)[0])
+
+    def clear(self) -> None:
+        """
+        Removes every cached content and resets the counters.
+        """
+        with self._lock:
+            self._invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+
+            self._hits = 0
+            self._misses = 0
+            self._served = 0
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Returns the size of the cache, its hit/miss counters and hit ratio,
+        and the bytes served from it.
+        """
+        with self._lock:
+            _lookups = self._hits + self._misses
+
+            return {
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "maxbytes": self.maxbytes,
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / _lookups if _lookups else 0.0,
+                "bytes_served": self._served
+            }
+
+__export__ = (_CachedReader, _ContentCache)
@@ -0,0 +1,107 @@
+"""
+This module contains the _LocalBackend class, which stores every object in a local file.
+"""
+
+import os
+import tempfile
+
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+from blobsapdi.objects._layout import _blob_dir
+from blobsapdi.storage._backend import _ObjectReader, _ObjectStat, _StorageBackend
+
+
+class _FileReader(_ObjectReader):
+    """
+    A reader of an open file, which keeps reading the same contents if the file is replaced.
+    """
+
+    @property
+    def stat(self) -> _ObjectStat:
+        _stat = os.fstat(self._fd)
+        return _ObjectStat(_stat.st_size, _stat.st_mtime)
+
+    def __init__(self, path: str) -> None:
+        """
+        Initializes a new instance of the _FileReader class.
+
+        Args:
+            path: The path of the file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        self._fd = os.open(path, os.O_RDONLY)
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        return os.pread(self._fd, length, offset)
+
+    def same_file(self, fd: int) -> bool:
+        """
+        Checks whether a file descriptor refers to the file being read.
+
+        Args:
+            fd: The file descriptor.
+        """
+        return os.path.samestat(os.fstat(self._fd), os.fstat(fd))
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+class _LocalBackend(_StorageBackend):
+    """
+    A backend that stores every object in a file of a local directory,
+    with the same fan-out layout as the file blobs.
+    """
+
+    def __init__(self, root: str, fanout: int = 0) -> None:
+        """
+        Initializes a new instance of the _LocalBackend class.
+
+        Args:
+            root: The directory the objects are stored in.
+            fanout: The fan-out levels of the directory layout.
+        """
+        self.root = root
+        self.fanout = fanout
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(_blob_dir(self.root, key, self.fanout), key)
+
+    def reader(self, key: str) -> _ObjectReader:
+        return _FileReader(self.local_path(key))
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[BinaryIO]:
+        _path = self.local_path(key)
+        _dir = os.path.dirname(_path)
+
+        try:
+            _fd, _tmp_path = tempfile.mkstemp(prefix=f'.{key}.', suffix='.tmp', dir=_dir)
+        except FileNotFoundError:
+            os.makedirs(_dir, exist_ok=True)
+            _fd, _tmp_path = tempfile.mkstemp(prefix=f'.{key}.', suffix='.tmp', dir=_dir)
+
+        try:
+            with os.fdopen(_fd, 'wb') as _tmp:
+                yield _tmp
+
+                _tmp.flush()
+                os.fsync(_tmp.fileno())
+
+            os.replace(_tmp_path, _path)
+        except BaseException:
+            if os.path.isfile(_tmp_path):
+                os.remove(_tmp_path)
+            raise
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+__export__ = (_LocalBackend,)
@@ -0,0 +1,54 @@
+"""
+This module contains the _MemoryBackend class, which keeps every object in memory.
+"""
+
+import io
+import time
+
+from contextlib import contextmanager
+from threading import Lock
+from typing import BinaryIO, Iterator
+
+from blobsapdi.storage._backend import _BytesReader, _ObjectReader, _StorageBackend
+
+
+class _MemoryBackend(_StorageBackend):
+    """
+    A backend that keeps every object in a dictionary, meant for tests and benchmarks.
+
+    Contents are immutable bytes objects, so readers share them without copying.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes a new instance of the _MemoryBackend class.
+        """
+        self._objects = {}
+        self._lock = Lock()
+
+    def reader(self, key: str) -> _ObjectReader:
+        with self._lock:
+            _object = self._objects.get(key)
+
+        if _object is None:
+            raise FileNotFoundError(key)
+
+        return _BytesReader(*_object)
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[BinaryIO]:
+        _buffer = io.BytesIO()
+
+        yield _buffer
+
+        with self._lock:
+            self._objects[key] = (_buffer.getvalue(), time.time())
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._objects.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+__export__ = (_MemoryBackend,)
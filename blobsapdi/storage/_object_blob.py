@@ -0,0 +1,178 @@
+"""
+This module contains the _ObjectBlob class, which represents a blob whose contents
+are stored in a storage backend.
+"""
+
+import io
+
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+from blobsapdi.objects._file_blob import _SUFIX
+from blobsapdi.objects._hasher import _BUFF_SIZE, _PARALLEL_THRESHOLD, _MultiHasher
+from blobsapdi.storage import _object_backend
+from blobsapdi.storage._backend import _BytesReader, _ObjectReader, _ObjectStat
+
+
+class _ObjectBlob(io.RawIOBase):
+    """
+    A class representing a blob stored as an object of the storage backend,
+    read through a snapshot of the contents it had when opened.
+    """
+
+    @property
+    def id_(self) -> str:
+        """
+        Returns the ID of the object blob (read_only).
+        """
+        return self.__id
+
+    def __init__(self, _id: str, _content: str = None) -> None:
+        """
+        Initializes a new instance of the _ObjectBlob class.
+
+        Args:
+            _id: The ID of the object blob.
+            _content: Ignored, objects are always stored by the ID of their blob.
+        """
+        self.__id = _id
+
+        self._backend = _object_backend()
+
+        self.file_name = f'{_id}.{_SUFIX}'
+        self.file_path = self._backend.local_path(self.file_name)
+
+        self._reader = self._open_reader()
+        self._position = 0
+
+    def _open_reader(self) -> _ObjectReader:
+        """
+        Opens the current contents of the object, a blob that was never written is empty.
+        """
+        try:
+            return self._backend.reader(self.file_name)
+        except FileNotFoundError:
+            return _BytesReader(b'', 0.0)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:
+        _data = self._reader.read_range(self._position, len(buffer))
+
+        buffer[:len(_data)] = _data
+        self._position += len(_data)
+
+        return len(_data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._reader.stat.st_size
+        elif whence != io.SEEK_SET:
+            raise ValueError(f"Invalid whence: {whence}")
+
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+
+        self._position = offset
+
+        return offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def stat(self) -> _ObjectStat:
+        """
+        Returns the status of the object blob, such as its size and modification time.
+        """
+        return self._reader.stat
+
+    def digests(
+            self,
+            algorithms: Iterable[str],
+            buff_size: int = _BUFF_SIZE) -> dict[str, str]:
+        """
+        Computes several digests of the current contents of the object blob.
+
+        Args:
+            algorithms: The names of the hashlib algorithms to compute.
+            buff_size: The size of the ranges read from the storage backend.
+
+        Returns:
+            The hexadecimal digests of the contents by algorithm.
+        """
+        _reader = self._open_reader()
+
+        try:
+            _hasher = _MultiHasher(
+                algorithms, parallel=_reader.stat.st_size >= _PARALLEL_THRESHOLD)
+            _offset = 0
+
+            while _chunk := _reader.read_range(_offset, buff_size):
+                _hasher.update(_chunk)
+                _offset += len(_chunk)
+        finally:
+            _reader.close()
+
+        return _hasher.hexdigests()
+
+    @contextmanager
+    def atomic_writer(self) -> Iterator[BinaryIO]:
+        """
+        Opens a stream that atomically replaces the contents of the object blob
+        when the context exits cleanly.
+
+        Readers holding the object blob open keep reading the previous contents,
+        and if the context exits with an exception the new contents are discarded.
+
+        Yields:
+            The stream to write the new contents to.
+        """
+        with self._backend.writer(self.file_name) as _writer:
+            yield _writer
+
+    def commit_staged(self, _commit: Callable[[str], None]) -> bool:
+        """
+        Object blobs are never stored in the content store, so nothing is ever staged.
+        """
+        return False
+
+    def replace_staged(self, _commit: Callable[[Callable[[], None]], None]) -> bool:
+        """
+        Object blobs replace their contents when atomic_writer exits, so nothing is ever staged.
+        """
+        return False
+
+    def delete(self) -> None:
+        """
+        Deletes the object blob and its contents.
+        """
+        self.close()
+
+        self._backend.delete(self.file_name)
+
+    @staticmethod
+    def remove(_id: str) -> None:
+        """
+        Deletes the contents of a blob without opening it.
+
+        Args:
+            _id: The ID of the object blob.
+        """
+        _object_backend().delete(f'{_id}.{_SUFIX}')
+
+    def close(self) -> None:
+        if not self.closed:
+            self._reader.close()
+
+        super().close()
+
+    def __eq__(self, __value: object) -> bool:
+        return issubclass(type(__value), self.__class__) and self.id_ == __value.id_
+
+__export__ = (_ObjectBlob,)
@@ -0,0 +1,262 @@
+"""
+This module contains the _SharedReaders class, which shares the readers of the same
+contents among every request reading them at the same time.
+
+Readers are read by positional reads, so every request keeps its own position
+and parallel range requests never race over the offset of a shared descriptor.
+Readers no longer in use are kept open in a bounded least-recently-used cache,
+so hot contents are not opened and closed again on every request.
+"""
+
+import io
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Hashable
+
+from blobsapdi.storage._backend import _ObjectReader, _ObjectStat
+
+
+class _ReaderView(io.RawIOBase):
+    """
+    A read-only stream with its own position over a shared reader.
+    """
+    _reader: _ObjectReader = None
+
+    def __init__(self, readers: '_SharedReaders', key: Hashable, reader: _ObjectReader) -> None:
+        """
+        Initializes a new instance of the _ReaderView class.
+
+        Args:
+            readers: The registry the reader is released to when the view is closed.
+            key: The key of the reader in the registry.
+            reader: The shared reader.
+        """
+        self._readers = readers
+        self._key = key
+        self._reader = reader
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:
+        _data = self._reader.read_range(self._position, len(buffer))
+
+        buffer[:len(_data)] = _data
+        self._position += len(_data)
+
+        return len(_data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._reader.stat.st_size
+        elif whence != io.SEEK_SET:
+            raise ValueError(f"Invalid whence: {whence}")
+
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+
+        self._position = offset
+
+        return offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def stat(self) -> _ObjectStat:
+        """
+        Returns the status of the shared contents, such as their size and modification time.
+        """
+        return self._reader.stat
+
+    def close(self) -> None:
+        if not self.closed and self._reader is not None:
+            self._readers.release(self._key, self._reader)
+
+        super().close()
+
+class _SharedReaders:
+    """
+    A registry of the readers open by key, which keeps up to maxsize of the readers
+    no longer in use open until they are evicted or invalidated.
+
+    Keys are (name, generation) tuples, the generation changing whenever the contents
+    of the name do. Contents whose generation is None are neither shared nor cached.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        """
+        Initializes a new instance of the _SharedReaders class.
+
+        Args:
+            maxsize: The maximum number of idle readers kept open, 0 disables the cache.
+        """
+        self.maxsize = maxsize
+
+        self._readers: dict[Hashable, list] = {}
+        self._idle: OrderedDict[Hashable, _ObjectReader] = OrderedDict()
+        self._lock = Lock()
+
+        self._invalidations = 0
+        self._hits = 0
+        self._misses = 0
+
+    def acquire(
+            self,
+            key: tuple[str, Hashable],
+            opener: Callable[[], _ObjectReader]) -> _ObjectReader:
+        """
+        Acquires the reader with a key, opening it if it is neither in use nor cached.
+
+        Args:
+            key: The name and generation of the contents.
+            opener: A callable that opens the reader of the contents.
+
+        Returns:
+            The shared reader, which must be released once, usually by closing a view of it.
+        """
+        if key[1] is None:
+            return opener()
+
+        with self._lock:
+            _entry = self._readers.get(key)
+
+            if _entry is not None:
+                _entry[1] += 1
+                self._hits += 1
+                return _entry[0]
+
+            _reader = self._idle.pop(key, None)
+
+            if _reader is not None:
+                self._readers[key] = [_reader, 1, True]
+                self._hits += 1
+                return _reader
+
+            self._misses += 1
+            _invalidations = self._invalidations
+
+        # Opened outside of the lock, readers of remote backends may take a while
+        _reader = opener()
+
+        with self._lock:
+            _entry = self._readers.get(key)
+
+            if _entry is None:
+                # Contents invalidated while opening may be older than the key says
+                self._readers[key] = [_reader, 1, _invalidations == self._invalidations]
+                return _reader
+
+            _entry[1] += 1
+
+        _reader.close()
+
+        return _entry[0]
+
+    def open(self, key: tuple[str, Hashable], opener: Callable[[], _ObjectReader]) -> _ReaderView:
+        """
+        Opens a view of the reader with a key.
+
+        Args:
+            key: The name and generation of the contents.
+            opener: A callable that opens the reader of the contents.
+
+        Returns:
+            The view of the reader, which must be closed.
+        """
+        return _ReaderView(self, key, self.acquire(key, opener))
+
+    def release(self, key: Hashable, reader: _ObjectReader, cache: bool = True) -> None:
+        """
+        Releases a view of a reader, caching the reader if it was its last view.
+
+        Args:
+            key: The key of the reader.
+            reader: The reader.
+            cache: Whether the reader may be cached, instead of closed, if it was its last view.
+        """
+        _evicted = []
+
+        with self._lock:
+            _entry = self._readers.get(key)
+
+            if _entry is None or _entry[0] is not reader:
+                # Never shared, its contents have no generation
+                _evicted.append(reader)
+            elif _entry[1] > 1:
+                _entry[1] -= 1
+            else:
+                del self._readers[key]
+
+                if cache and _entry[2] and self.maxsize > 0:
+                    self._idle[key] = reader
+                else:
+                    _evicted.append(reader)
+
+                while len(self._idle) > self.maxsize:
+                    _evicted.append(self._idle.popitem(last=False)[1])
+
+        for _reader in _evicted:
+            _reader.close()
+
+    def invalidate(self, name: str) -> None:
+        """
+        Closes the cached readers of every generation of some contents, and keeps
+        the ones in use from being cached once released.
+
+        Args:
+            name: The name of the contents.
+        """
+        with self._lock:
+            self._invalidations += 1
+
+            for _key, _entry in self._readers.items():
+                if _key[0] == name:
+                    _entry[2] = False
+
+            _evicted = [self._idle.pop(_key) for _key in list(self._idle) if _key[0] == name]
+
+        for _reader in _evicted:
+            _reader.close()
+
+    def clear(self) -> None:
+        """
+        Closes every cached reader and resets the counters.
+        """
+        with self._lock:
+            _evicted = list(self._idle.values())
+            self._idle.clear()
+
+            for _entry in self._readers.values():
+                _entry[2] = False
+
+            self._hits = 0
+            self._misses = 0
+
+        for _reader in _evicted:
+            _reader.close()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the number of readers in use and cached, and the hit/miss counters.
+        """
+        with self._lock:
+            return {
+                "open": len(self._readers),
+                "size": len(self._idle),
+                "maxsize": self.maxsize,
+                "hits": self._hits,
+                "misses": self._misses
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._readers)
+
+__export__ = (_ReaderView, _SharedReaders)
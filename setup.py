@@ -8,7 +8,9 @@ setup(
     packages=find_packages(),
     entry_points={
         "console_scripts": [
-            "blob_server=blobsapdi.server:main"
+            "blob_server=blobsapdi.server:main",
+            "blob_storage_migrate=blobsapdi.migrate:main",
+            "blob_object_store=blobsapdi.object_store:main"
         ]
     }
 )
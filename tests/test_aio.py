@@ -0,0 +1,456 @@
+import os
+import shutil
+import hashlib
+import json
+import unittest
+
+import httpx
+
+from starlette.testclient import TestClient
+
+from blobsapdi import exceptions
+from blobsapdi.aio import services
+from blobsapdi.aio import server
+from blobsapdi.aio._client import _AsyncAuthClient
+from blobsapdi.db import _DAO
+from blobsapdi.entities import Blob, Client
+from blobsapdi.enums import Visibility
+
+
+def _auth_api(request: httpx.Request) -> httpx.Response:
+    if request.url.path == '/v1/status':
+        return httpx.Response(200)
+
+    if request.url.path == '/v1/token/user_token':
+        return httpx.Response(200, json={'user': 'testuser'})
+
+    return httpx.Response(401)
+
+def _mock_client() -> _AsyncAuthClient:
+    client = _AsyncAuthClient('http://auth')
+    client._http = httpx.AsyncClient(transport=httpx.MockTransport(_auth_api))
+    return client
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+class TestAsyncServices(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        os.environ['STORAGE'] = '.tests_storage'
+        _DAO.connect(':memory:')
+        Client.clear_cache()
+        services._CLIENT = _mock_client()
+
+    async def asyncTearDown(self) -> None:
+        await services.stop()
+        _st = os.getenv('STORAGE')
+        if _st and os.path.isdir(_st):
+            shutil.rmtree(_st)
+
+    async def test_create_blob_unauthorized(self):
+        with self.assertRaises(exceptions.adiauth.UserNotExists):
+            await services.create_blob('invalid_token')
+
+        self.assertEqual(Client.cache_stats()['size'], 1)
+
+    async def test_auth_server_error(self):
+        _responses = [httpx.Response(503), httpx.Response(200, json={'user': 'testuser'})]
+
+        client = _AsyncAuthClient('http://auth', failure_threshold=1)
+        client._http = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda _request: _responses.pop(0)))
+        await services._CLIENT.close()
+        services._CLIENT = client
+
+        with self.assertRaises(exceptions.adiauth.ServiceError):
+            await services.create_blob('user_token')
+
+        self.assertEqual(Client.cache_stats()['size'], 0)
+        self.assertEqual(services.auth_stats()['state'], 'open')
+
+        with self.assertRaises(exceptions.adiauth.ServiceError):
+            await services.create_blob('user_token')
+
+        client.breaker.reset_timeout = 0
+
+        (await services.create_blob('user_token')).close()
+        self.assertEqual(services.auth_stats()['state'], 'closed')
+
+    async def test_update_blob(self):
+        blob = await services.create_blob('user_token')
+        blob.close()
+
+        blob = await services.update_blob(blob.id_, 'user_token', _chunks(b'test', b' data'))
+
+        with blob:
+            self.assertEqual(blob.read(), b'test data')
+
+        _hashes = await services.get_hash_blob(blob.id_, 'user_token', ['md5', 'sha256'])
+
+        self.assertEqual(_hashes['md5'], hashlib.md5(b'test data').hexdigest())
+        self.assertEqual(_hashes['sha256'], hashlib.sha256(b'test data').hexdigest())
+
+    async def test_update_blob_failed(self):
+        blob = await services.create_blob('user_token')
+        blob.close()
+
+        async def _broken():
+            yield b'partial'
+            raise OSError('connection reset')
+
+        with self.assertRaises(OSError):
+            await services.update_blob(blob.id_, 'user_token', _broken())
+
+        self.assertEqual(os.listdir(os.getenv('STORAGE')), [f'{blob.id_}.blob'])
+
+    async def test_get_blob_private(self):
+        blob = await services.create_blob('user_token')
+        blob.close()
+
+        with self.assertRaises(exceptions.BlobNotFoundError):
+            await services.get_blob(blob.id_, None)
+
+        with self.assertRaises(exceptions.adiauth.UserNotExists):
+            await services.get_blob(blob.id_, 'invalid_token')
+
+        await services.update_blob_visibility(blob.id_, 'user_token', Visibility.PUBLIC)
+
+        with await services.get_blob(blob.id_, None) as public:
+            self.assertEqual(public.id_, blob.id_)
+
+        # Public Blobs are served without resolving the token
+        with await services.open_blob(blob.id_, 'invalid_token') as public:
+            self.assertEqual(public.id_, blob.id_)
+
+class TestAsyncServer(unittest.TestCase):
+
+    def setUp(self) -> None:
+        os.environ['STORAGE'] = '.tests_storage'
+        Client.clear_cache()
+
+        self.client = TestClient(server.create_app('http://auth', ':memory:'))
+        self.client.__enter__()
+
+        services._CLIENT = _mock_client()
+
+    def tearDown(self) -> None:
+        self.client.__exit__(None, None, None)
+        _st = os.getenv('STORAGE')
+        if _st and os.path.isdir(_st):
+            shutil.rmtree(_st)
+
+    def test_upload_download(self):
+        headers = {'AuthToken': 'user_token'}
+
+        res = self.client.post('/api/v1/blobs/', headers=headers, json={})
+        self.assertEqual(res.status_code, 201)
+
+        url = res.json()['URL']
+
+        res = self.client.put(url, headers=headers, content=b'test data')
+        self.assertEqual(res.status_code, 204)
+
+        res = self.client.get(url, headers=headers)
+        self.assertEqual(res.content, b'test data')
+        self.assertEqual(res.headers['etag'], f'"{hashlib.sha256(b"test data").hexdigest()}"')
+
+        res = self.client.get(url, headers=headers | {'If-None-Match': res.headers['etag']})
+        self.assertEqual(res.status_code, 304)
+
+        res = self.client.get(url, headers=headers | {'Range': 'bytes=5-'})
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(res.content, b'data')
+
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 404)
+
+        res = self.client.get('/api/v1/blobs/', headers={'AuthToken': 'invalid_token'})
+        self.assertEqual(res.status_code, 401)
+
+    def test_resumable_upload(self):
+        headers = {'AuthToken': 'user_token'}
+
+        url = self.client.post('/api/v1/blobs/', headers=headers, json={}).json()['URL']
+
+        res = self.client.post(f'{url}/uploads', headers=headers)
+        self.assertEqual(res.status_code, 201)
+        upload_url = res.json()['URL']
+
+        res = self.client.put(f'{upload_url}/parts/2', headers=headers, content=b'data')
+        self.assertEqual(res.json(), {'partNumber': 2, 'size': 4})
+        self.client.put(f'{upload_url}/parts/1', headers=headers, content=b'test ')
+
+        res = self.client.put(f'{upload_url}/parts/0', headers=headers, content=b'')
+        self.assertEqual(res.status_code, 400)
+
+        res = self.client.get(upload_url, headers=headers)
+        self.assertEqual(
+            res.json()['parts'], [{'partNumber': 1, 'size': 5}, {'partNumber': 2, 'size': 4}])
+
+        res = self.client.post(upload_url, headers=headers, json={'parts': [1, 3]})
+        self.assertEqual(res.status_code, 400)
+
+        res = self.client.post(upload_url, headers=headers, json={})
+        self.assertEqual(res.status_code, 204)
+        self.assertEqual(self.client.get(url, headers=headers).content, b'test data')
+
+        res = self.client.get(upload_url, headers=headers)
+        self.assertEqual(res.status_code, 404)
+
+        res = self.client.post(f'{url}/uploads', headers={'AuthToken': 'invalid_token'})
+        self.assertEqual(res.status_code, 401)
+
+    def test_list_blobs(self):
+        headers = {'AuthToken': 'user_token'}
+
+        res = self.client.post('/api/v1/batch/create', headers=headers, json={'blobs': [{}] * 3})
+        blob_ids = sorted(_r['blobId'] for _r in res.json()['results'])
+
+        res = self.client.get('/api/v1/blobs/', headers=headers)
+        self.assertEqual(sorted(_b['blobId'] for _b in res.json()['blobs']), blob_ids)
+
+        res = self.client.get('/api/v1/blobs/?limit=2', headers=headers)
+        self.assertEqual([_b['blobId'] for _b in res.json()['blobs']], blob_ids[:2])
+
+        res = self.client.get(
+            '/api/v1/blobs/', headers=headers,
+            params={'limit': 2, 'cursor': res.json()['nextCursor']})
+        self.assertEqual([_b['blobId'] for _b in res.json()['blobs']], blob_ids[2:])
+        self.assertIsNone(res.json()['nextCursor'])
+
+        res = self.client.get(
+            '/api/v1/blobs/', headers=headers | {'Accept': 'application/x-ndjson'})
+        self.assertEqual(res.headers['content-type'], 'application/x-ndjson')
+        self.assertEqual(
+            [json.loads(_l)['blobId'] for _l in res.text.splitlines()], blob_ids)
+
+        res = self.client.get('/api/v1/blobs/?limit=0', headers=headers)
+        self.assertEqual(res.status_code, 400)
+
+        res = self.client.get('/api/v1/blobs/?cursor=%25', headers=headers)
+        self.assertEqual(res.status_code, 400)
+
+    def test_batch(self):
+        headers = {'AuthToken': 'user_token'}
+
+        res = self.client.post('/api/v1/batch/create', headers=headers, json={
+            'blobs': [{}, {'visibility': 'public'}, {'visibility': 'invalid'}]
+        })
+        self.assertEqual(res.status_code, 200)
+        results = res.json()['results']
+        self.assertEqual([_r['status'] for _r in results], [201, 201, 400])
+
+        blob_ids = [_r['blobId'] for _r in results[:2]]
+
+        res = self.client.post('/api/v1/batch/acl', headers=headers, json={
+            'mode': 'patch', 'blobs': [{'blobId': blob_ids[0], 'acl': ['user']}]
+        })
+        self.assertEqual(res.json()['results'], [{'status': 204, 'blobId': blob_ids[0]}])
+
+        res = self.client.post('/api/v1/batch/acl', headers=headers, json={
+            'mode': 'post', 'blobs': []
+        })
+        self.assertEqual(res.status_code, 400)
+
+        res = self.client.post('/api/v1/batch/delete', headers=headers, json={
+            'blobs': [*blob_ids, 'unknown', 1]
+        })
+        self.assertEqual(
+            [_r['status'] for _r in res.json()['results']], [204, 204, 404, 400])
+
+        res = self.client.post('/api/v1/batch/delete', headers=headers, json={})
+        self.assertEqual(res.status_code, 400)
+
+    def test_download_object_backend(self):
+        headers = {'AuthToken': 'user_token'}
+
+        os.environ['STORAGE_BACKEND'] = 'memory'
+
+        try:
+            url = self.client.post('/api/v1/blobs/', headers=headers, json={}).json()['URL']
+
+            self.client.put(url, headers=headers, content=b'test data')
+
+            res = self.client.get(url, headers=headers)
+            self.assertEqual(res.content, b'test data')
+            self.assertEqual(res.headers['content-length'], str(len(b'test data')))
+
+            res = self.client.get(url, headers=headers | {'If-None-Match': res.headers['etag']})
+            self.assertEqual(res.status_code, 304)
+        finally:
+            del os.environ['STORAGE_BACKEND']
+
+    def test_download_compressed(self):
+        headers = {'AuthToken': 'user_token'}
+        data = b'log line\n' * 100000
+
+        os.environ['COMPRESSION'] = 'gzip'
+
+        try:
+            url = self.client.post('/api/v1/blobs/', headers=headers, json={}).json()['URL']
+
+            self.client.put(url, headers=headers, content=data)
+
+            res = self.client.get(url, headers=headers | {'Accept-Encoding': 'gzip'})
+            self.assertEqual(res.headers['content-encoding'], 'gzip')
+            self.assertLess(int(res.headers['content-length']), len(data))
+            self.assertEqual(res.content, data)
+
+            res = self.client.get(url, headers=headers | {'Accept-Encoding': 'identity'})
+            self.assertNotIn('content-encoding', res.headers)
+            self.assertEqual(res.headers['content-length'], str(len(data)))
+            self.assertEqual(res.content, data)
+        finally:
+            del os.environ['COMPRESSION']
+
+    def test_download_token(self):
+        headers = {'AuthToken': 'user_token'}
+        data = bytes(range(256)) * 64
+
+        os.environ['COMPRESSION'] = 'gzip'
+
+        try:
+            url = self.client.post('/api/v1/blobs/', headers=headers, json={}).json()['URL']
+            self.client.put(url, headers=headers, content=data)
+
+            res = self.client.post(f'{url}/download-token', headers=headers)
+            self.assertEqual(res.status_code, 201)
+            token = {'DownloadToken': res.json()['token'], 'Accept-Encoding': 'identity'}
+
+            _parts = []
+            for _start in range(0, len(data), 4096):
+                res = self.client.get(
+                    url, headers=token | {'Range': f'bytes={_start}-{_start + 4095}'})
+                self.assertEqual(res.status_code, 206)
+                _parts.append(res.content)
+
+            self.assertEqual(b''.join(_parts), data)
+
+            res = self.client.get(url, headers=token | {'Range': f'bytes={len(data)}-'})
+            self.assertEqual(res.status_code, 416)
+
+            res = self.client.get(url, headers={'DownloadToken': 'invalid_token'})
+            self.assertEqual(res.status_code, 403)
+
+            self.client.put(url, headers=headers, content=b'new data')
+
+            res = self.client.get(url, headers=token)
+            self.assertEqual(res.status_code, 403)
+        finally:
+            del os.environ['COMPRESSION']
+
+    def test_presigned_url(self):
+        headers = {'AuthToken': 'user_token'}
+
+        url = self.client.post('/api/v1/blobs/', headers=headers, json={}).json()['URL']
+        self.client.put(url, headers=headers, content=b'test data')
+
+        res = self.client.post(f'{url}/presigned-url', headers=headers, json={'expiresIn': 60})
+        self.assertEqual(res.status_code, 201)
+        signed_url = res.json()['URL']
+
+        services._CLIENT = None
+
+        res = self.client.get(signed_url, headers={'Range': 'bytes=5-'})
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(res.content, b'data')
+
+        res = self.client.get(signed_url.replace('signature=', 'signature=x'))
+        self.assertEqual(res.status_code, 403)
+
+        res = self.client.get(signed_url.replace(url, f'{url}x'))
+        self.assertEqual(res.status_code, 403)
+
+        services._CLIENT = _mock_client()
+
+        res = self.client.post(f'{url}/presigned-url', headers=headers, json={'expiresIn': 0})
+        self.assertEqual(res.status_code, 400)
+
+        res = self.client.post(f'{url}/presigned-url', headers={'AuthToken': 'invalid_token'})
+        self.assertEqual(res.status_code, 401)
+
+        self.client.delete(url, headers=headers)
+
+        res = self.client.get(signed_url)
+        self.assertEqual(res.status_code, 404)
+
+    def test_download_cached_reader(self):
+        headers = {'AuthToken': 'user_token'}
+
+        url = self.client.post('/api/v1/blobs/', headers=headers, json={}).json()['URL']
+        self.client.put(url, headers=headers, content=b'test data')
+
+        _hits = self.client.get('/api/v1/metrics/').json()['readers']['hits']
+
+        self.assertEqual(self.client.get(url, headers=headers).content, b'test data')
+        self.assertEqual(self.client.get(url, headers=headers).content, b'test data')
+
+        _stats = self.client.get('/api/v1/metrics/').json()['readers']
+        self.assertEqual(_stats['hits'], _hits + 1)
+        self.assertEqual(_stats['open'], 0)
+
+        self.client.put(url, headers=headers, content=b'new data')
+        self.assertEqual(self.client.get(url, headers=headers).content, b'new data')
+
+        self.client.delete(url, headers=headers)
+        self.assertEqual(self.client.get(url, headers=headers).status_code, 404)
+
+    def test_download_disconnected(self):
+        headers = {'AuthToken': 'user_token'}
+
+        url = self.client.post('/api/v1/blobs/', headers=headers, json={}).json()['URL']
+        self.client.put(url, headers=headers, content=b'test data')
+
+        path = url.removeprefix('http://testserver')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0', 'spec_version': '2.4'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'authtoken', b'user_token')],
+            'client': ('testclient', 50000),
+            'server': ('testserver', 80)
+        }
+
+        async def _receive():
+            return {'type': 'http.disconnect'}
+
+        async def _send(_message):
+            # The client is gone before the body of the response starts
+            raise OSError('Connection reset')
+
+        with self.assertRaises(Exception):
+            self.client.portal.call(self.client.app, scope, _receive, _send)
+
+        self.assertEqual(self.client.get('/api/v1/metrics/').json()['readers']['open'], 0)
+
+    def test_download_content_cache(self):
+        headers = {'AuthToken': 'user_token'}
+
+        Blob.configure_contents(1024, 16)
+
+        try:
+            url = self.client.post('/api/v1/blobs/', headers=headers, json={}).json()['URL']
+            self.client.put(url, headers=headers, content=b'test data')
+
+            for _ in range(3):
+                self.assertEqual(self.client.get(url, headers=headers).content, b'test data')
+
+            _stats = self.client.get('/api/v1/metrics/').json()['content_cache']
+            self.assertEqual((_stats['hits'], _stats['misses']), (2, 1))
+            self.assertEqual(_stats['bytes_served'], 2 * len(b'test data'))
+
+            self.client.put(url, headers=headers, content=b'new data')
+            self.assertEqual(self.client.get(url, headers=headers).content, b'new data')
+
+            self.client.delete(url, headers=headers)
+            self.assertEqual(self.client.get('/api/v1/metrics/').json()['content_cache']['bytes'], 0)
+        finally:
+            Blob.configure_contents(0, 64 * 1024)
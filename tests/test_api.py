@@ -1,16 +1,20 @@
 import os
 import io
+import hashlib
 import shutil
 import requests
 import unittest
 import json
 import flask
 
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
+from blobsapdi import server
 from blobsapdi import services
 from blobsapdi import exceptions
+from blobsapdi import storage
 from blobsapdi.db import _DAO
+from blobsapdi.entities import Client
 
 
 @staticmethod
@@ -25,8 +29,9 @@ class TestServices(unittest.TestCase):
     def setUp(self) -> None:
         os.environ['STORAGE'] = '.tests_storage'
         _DAO.connect(':memory:')
+        Client.clear_cache()
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_create_blob_unauthorized(self, mock_get):
         response = requests.Response()
 
@@ -37,7 +42,7 @@ class TestServices(unittest.TestCase):
         with self.assertRaises(exceptions.adiauth.UserNotExists):
             services.create_blob('user_token')
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_create_blob(self, mock_get):
         response = requests.Response()
 
@@ -52,7 +57,7 @@ class TestServices(unittest.TestCase):
         self.assertIsNotNone(blob)
         self.assertEqual(blob.visibility, services.Visibility.PRIVATE)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_update_blob_unauthorized(self, mock_get):
         response = requests.Response()
 
@@ -63,7 +68,7 @@ class TestServices(unittest.TestCase):
         with self.assertRaises(exceptions.adiauth.UserNotExists):
             services.update_blob('blob_id', 'user_token', io.BytesIO(b'blob data'))
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_update_blob(self, mock_get):
         response = requests.Response()
 
@@ -84,8 +89,9 @@ class TestServices(unittest.TestCase):
         blob.seek(0)
 
         self.assertEqual(blob.read(), raw.read())
+        self.assertEqual(blob.etag, hashlib.sha256(b'blob data').hexdigest())
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_update_blob_long(self, mock_get):
         response = requests.Response()
 
@@ -107,7 +113,56 @@ class TestServices(unittest.TestCase):
 
         self.assertEqual(blob.read(), raw.read())
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
+    def test_update_blob_failed(self, mock_get):
+        response = requests.Response()
+
+        response.status_code = 200
+        response._content = json.dumps({
+            'user': 'testuser'
+        }).encode()
+
+        mock_get.return_value = response
+
+        blob = services.create_blob('user_token')
+        blob = services.update_blob(blob.id_, 'user_token', io.BytesIO(b'blob data'))
+
+        raw = Mock()
+        raw.read.side_effect = [b'new data', IOError('Connection dropped')]
+
+        with self.assertRaises(IOError):
+            services.update_blob(blob.id_, 'user_token', raw)
+
+        with services.get_blob(blob.id_, 'user_token') as _b:
+            self.assertEqual(_b.read(), b'blob data')
+
+    @patch('requests.Session.get')
+    def test_update_blob_not_recorded(self, mock_get):
+        response = requests.Response()
+
+        response.status_code = 200
+        response._content = json.dumps({
+            'user': 'testuser'
+        }).encode()
+
+        mock_get.return_value = response
+
+        blob = services.create_blob('user_token')
+        blob = services.update_blob(blob.id_, 'user_token', io.BytesIO(b'blob data'))
+        blob.close()
+
+        with patch.object(_DAO, 'update_blob_contents', side_effect=OSError('database is locked')):
+            with self.assertRaises(OSError):
+                services.update_blob(blob.id_, 'user_token', io.BytesIO(b'new data'))
+
+        # The file is only replaced along the digests that describe it
+        with services.get_blob(blob.id_, 'user_token') as _b:
+            self.assertEqual(_b.read(), b'blob data')
+            self.assertEqual(_b.etag, hashlib.sha256(b'blob data').hexdigest())
+
+        self.assertFalse([_f for _r, _, _fs in os.walk('.tests_storage') for _f in _fs if _f.endswith('.tmp')])
+
+    @patch('requests.Session.get')
     def test_update_unknown_blob(self, mock_get):
         response = requests.Response()
 
@@ -121,7 +176,7 @@ class TestServices(unittest.TestCase):
         with self.assertRaises(exceptions.BlobNotFoundError):
             services.update_blob('blob_id', 'user_token', io.BytesIO(b'blob data'))
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_delete_blob_unauthorized(self, mock_get):
         response = requests.Response()
 
@@ -132,7 +187,7 @@ class TestServices(unittest.TestCase):
         with self.assertRaises(exceptions.adiauth.UserNotExists):
             services.delete_blob('blob_id', 'user_token')
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_delete_unknown_blob(self, mock_get):
         response = requests.Response()
 
@@ -146,7 +201,7 @@ class TestServices(unittest.TestCase):
         with self.assertRaises(exceptions.BlobNotFoundError):
             services.delete_blob('blob_id', 'user_token')
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_delete_blob(self, mock_get):
         response = requests.Response()
 
@@ -163,7 +218,33 @@ class TestServices(unittest.TestCase):
 
         services.delete_blob(blob.id_, 'user_token')
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
+    def test_batch_blobs(self, mock_get):
+        response = requests.Response()
+
+        response.status_code = 200
+        response._content = json.dumps({
+            'user': 'testuser'
+        }).encode()
+
+        mock_get.return_value = response
+
+        blob_ids = services.create_blobs('user_token', [services.Visibility.PRIVATE] * 3)
+        self.assertEqual(len(set(blob_ids)), 3)
+
+        self.assertEqual(
+            services.update_blobs_visibility(
+                'user_token', [(blob_ids[0], services.Visibility.PUBLIC), ('unknown', services.Visibility.PUBLIC)]),
+            {blob_ids[0]})
+        self.assertEqual(
+            services.update_blobs_permissions('user_token', [(blob_ids[1], {'user'})]),
+            {blob_ids[1]})
+        self.assertEqual(
+            services.delete_blobs('user_token', [*blob_ids, 'unknown']), set(blob_ids))
+
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('requests.Session.get')
     def test_get_user_blobs_unauthorized(self, mock_get):
         response = requests.Response()
 
@@ -174,7 +255,7 @@ class TestServices(unittest.TestCase):
         with self.assertRaises(exceptions.adiauth.UserNotExists):
             services.get_user_blobs('user_token')
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_user_blobs(self, mock_get):
         response = requests.Response()
 
@@ -192,6 +273,542 @@ class TestServices(unittest.TestCase):
         self.assertEqual(len(blobs), 1)
         self.assertEqual(blobs[0], blob.id_)
 
+    @patch('requests.Session.get')
+    def test_get_blob_private(self, mock_get):
+        response = requests.Response()
+
+        response.status_code = 200
+        response._content = json.dumps({
+            'user': 'testuser'
+        }).encode()
+
+        mock_get.return_value = response
+
+        _DAO.new_blob('granted', 'otheruser', services.Visibility.PRIVATE.value)
+        _DAO.new_blob('denied', 'otheruser', services.Visibility.PRIVATE.value)
+        _DAO.add_perms('granted', 'testuser')
+
+        with patch.object(_DAO, 'get_user_perms') as mock_perms:
+            with services.get_blob('granted', 'user_token') as blob:
+                self.assertEqual(blob.id_, 'granted')
+
+            with self.assertRaises(exceptions.BlobNotFoundError):
+                services.get_blob('denied', 'user_token')
+
+            mock_perms.assert_not_called()
+
+        with self.assertRaises(exceptions.BlobNotFoundError):
+            services.get_blob('granted', None)
+
+    @patch('requests.Session.get')
+    def test_get_blob_public_skips_auth(self, mock_get):
+        mock_get.side_effect = requests.ConnectionError('auth down')
+
+        _DAO.new_blob('public', 'otheruser', services.Visibility.PUBLIC.value)
+        _DAO.new_blob('private', 'otheruser', services.Visibility.PRIVATE.value)
+
+        with services.get_blob('public', 'user_token') as blob:
+            self.assertEqual(blob.id_, 'public')
+
+        with services.open_blob('public', 'user_token') as blob:
+            self.assertEqual(blob.id_, 'public')
+
+        mock_get.assert_not_called()
+
+        with self.assertRaises(exceptions.adiauth.ServiceError):
+            services.open_blob('private', 'user_token')
+
+    @patch('requests.Session.get')
+    def test_get_blob_single_lookup(self, mock_get):
+        response = requests.Response()
+
+        response.status_code = 200
+        response._content = json.dumps({
+            'user': 'testuser'
+        }).encode()
+
+        mock_get.return_value = response
+
+        _DAO.new_blob('granted', 'otheruser', services.Visibility.PRIVATE.value)
+        _DAO.add_perms('granted', 'testuser')
+        _DAO.update_blob_etag('granted', hashlib.sha256(b'').hexdigest())
+
+        # The metadata cache is cold for the first call and warm for the second
+        for _ in range(2):
+            for get in (services.get_blob, services.open_blob):
+                with patch.object(_DAO, '_read', wraps=_DAO._read) as mock_read:
+                    with get('granted', 'user_token') as blob:
+                        self.assertEqual(blob.id_, 'granted')
+
+                    self.assertEqual(mock_read.call_count, 1)
+
+    @patch('requests.Session.get')
+    def test_get_blob_by_signature(self, mock_get):
+        response = requests.Response()
+
+        response.status_code = 200
+        response._content = json.dumps({
+            'user': 'testuser'
+        }).encode()
+
+        mock_get.return_value = response
+
+        _DAO.new_blob('signed', 'testuser', services.Visibility.PRIVATE.value)
+
+        expires, signature = services.create_presigned_url('signed', 'user_token', 60)
+
+        with patch.object(_DAO, 'get_user_perms') as mock_perms:
+            with services.get_blob_by_signature('signed', str(expires), signature) as blob:
+                self.assertEqual(blob.id_, 'signed')
+
+            mock_perms.assert_not_called()
+
+        self.assertEqual(mock_get.call_count, 1)
+
+        with self.assertRaises(exceptions.InvalidTokenError):
+            services.get_blob_by_signature('signed', str(expires + 1), signature)
+
+        with self.assertRaises(exceptions.InvalidTokenError):
+            services.get_blob_by_signature('other', str(expires), signature)
+
+        with self.assertRaises(ValueError):
+            services.create_presigned_url('signed', 'user_token', 0)
+
+    @patch('requests.Session.get')
+    def test_get_hash_blob(self, mock_get):
+        response = requests.Response()
+
+        response.status_code = 200
+        response._content = json.dumps({
+            'user': 'testuser'
+        }).encode()
+
+        mock_get.return_value = response
+
+        blob = services.create_blob('user_token')
+        services.update_blob(blob.id_, 'user_token', io.BytesIO(b'blob data'))
+
+        with patch.object(services._MultiHasher, 'digest_file') as mock_digest:
+            hashes = services.get_hash_blob(blob.id_, 'user_token', ['md5', 'sha512'])
+            mock_digest.assert_not_called()
+
+        self.assertEqual(hashes, {
+            'md5': hashlib.md5(b'blob data').hexdigest(),
+            'sha512': hashlib.sha512(b'blob data').hexdigest()
+        })
+
+    @patch('requests.Session.get')
+    def test_get_hash_blob_not_stored(self, mock_get):
+        response = requests.Response()
+
+        response.status_code = 200
+        response._content = json.dumps({
+            'user': 'testuser'
+        }).encode()
+
+        mock_get.return_value = response
+
+        blob = services.create_blob('user_token')
+        blob.write(b'blob data')
+        blob.close()
+
+        hashes = services.get_hash_blob(blob.id_, 'user_token', ['sha1'])
+        self.assertEqual(hashes, {'sha1': hashlib.sha1(b'blob data').hexdigest()})
+        self.assertEqual(_DAO.get_blob_hashes(blob.id_), (0, hashes))
+
+        with self.assertRaises(ValueError):
+            services.get_hash_blob(blob.id_, 'user_token', ['crc32'])
+
+    @patch('requests.Session.get')
+    def test_fetch_user_cached(self, mock_get):
+        response = requests.Response()
+
+        response.status_code = 200
+        response._content = json.dumps({
+            'user': 'testuser'
+        }).encode()
+
+        mock_get.return_value = response
+
+        self.assertEqual(Client.fetch_user('user_token').username, 'testuser')
+        self.assertEqual(Client.fetch_user('user_token').username, 'testuser')
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(Client.cache_stats()['hits'], 1)
+
+    @patch('requests.Session.get')
+    def test_fetch_user_negative_cached(self, mock_get):
+        response = requests.Response()
+
+        response.status_code = 401
+
+        mock_get.return_value = response
+
+        errors = []
+
+        for _ in range(3):
+            with self.assertRaises(exceptions.adiauth.UserNotExists) as context:
+                Client.fetch_user('user_token')
+
+            errors.append(context.exception)
+
+        self.assertEqual(mock_get.call_count, 1)
+
+        # Every cached hit raises an error of its own
+        self.assertIsNot(errors[1], errors[2])
+
+    @patch('requests.Session.get')
+    def test_fetch_user_circuit_open(self, mock_get):
+        mock_get.side_effect = requests.ConnectionError('auth down')
+
+        Client.configure_http(1, 1, 1, failure_threshold=2, reset_timeout=30)
+
+        for _ in range(3):
+            with self.assertRaises(exceptions.adiauth.ServiceError):
+                Client.fetch_user('user_token')
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(Client.auth_stats()['state'], 'open')
+
+        Client.configure_http(10, 1, 5, 5, 30)
+
+    @patch('requests.Session.get')
+    def test_update_blob_deduplicated(self, mock_get):
+        response = requests.Response()
+
+        response.status_code = 200
+        response._content = json.dumps({
+            'user': 'testuser'
+        }).encode()
+
+        mock_get.return_value = response
+
+        os.environ['STORAGE_BACKEND'] = 'cas'
+
+        try:
+            first = services.create_blob('user_token')
+            second = services.create_blob('user_token')
+
+            self.assertEqual(first.read(), b'')
+
+            first = services.update_blob(first.id_, 'user_token', io.BytesIO(b'blob data'))
+            second = services.update_blob(second.id_, 'user_token', io.BytesIO(b'blob data'))
+
+            self.assertEqual(first.file_path, second.file_path)
+            self.assertEqual(second.read(), b'blob data')
+            self.assertEqual(_DAO.content_stats(), {'contents': 1, 'references': 2})
+
+            services.delete_blob(first.id_, 'user_token')
+            self.assertTrue(os.path.isfile(second.file_path))
+
+            services.delete_blob(second.id_, 'user_token')
+            self.assertFalse(os.path.isfile(second.file_path))
+            self.assertEqual(_DAO.content_stats(), {'contents': 0, 'references': 0})
+        finally:
+            del os.environ['STORAGE_BACKEND']
+
+    @patch('requests.Session.get')
+    def test_update_blob_object_backend(self, mock_get):
+        response = requests.Response()
+
+        response.status_code = 200
+        response._content = json.dumps({
+            'user': 'testuser'
+        }).encode()
+
+        mock_get.return_value = response
+
+        os.environ['STORAGE_BACKEND'] = 'memory'
+
+        try:
+            blob = services.create_blob('user_token')
+
+            self.assertIsNone(blob.file_path)
+            self.assertEqual(blob.read(), b'')
+
+            blob = services.update_blob(blob.id_, 'user_token', io.BytesIO(b'blob data'))
+
+            self.assertEqual(blob.read(), b'blob data')
+            self.assertEqual(blob.stat().st_size, len(b'blob data'))
+            self.assertEqual(blob.etag, hashlib.sha256(b'blob data').hexdigest())
+
+            _DAO.update_blob_etag(blob.id_, None)
+
+            self.assertEqual(blob.etag, hashlib.sha256(b'blob data').hexdigest())
+            self.assertEqual(
+                services.get_hash_blob(blob.id_, 'user_token', ['sha1']),
+                {'sha1': hashlib.sha1(b'blob data').hexdigest()})
+
+            services.delete_blob(blob.id_, 'user_token')
+
+            with self.assertRaises(FileNotFoundError):
+                storage._object_backend().reader(f'{blob.id_}.blob')
+
+            self.assertFalse(os.path.isdir(os.getenv('STORAGE')))
+        finally:
+            del os.environ['STORAGE_BACKEND']
+
+    @patch('requests.Session.get')
+    def test_complete_upload(self, mock_get):
+        response = requests.Response()
+
+        response.status_code = 200
+        response._content = json.dumps({
+            'user': 'testuser'
+        }).encode()
+
+        mock_get.return_value = response
+
+        parts = [b'{"part": 1}\n' * 50000, b'{"part": 2}\n' * 50000, b'tail']
+
+        for env in ({}, {'COMPRESSION': 'gzip'}, {'STORAGE_BACKEND': 'cas'}, {'STORAGE_BACKEND': 'memory'}):
+            with patch.dict(os.environ, env):
+                blob = services.create_blob('user_token')
+                blob.close()
+
+                upload_id = services.create_upload(blob.id_, 'user_token')
+
+                for number in (3, 1, 2):
+                    self.assertEqual(
+                        services.upload_part(
+                            blob.id_, upload_id, number, 'user_token', io.BytesIO(parts[number - 1])),
+                        len(parts[number - 1]))
+
+                self.assertEqual(
+                    services.get_upload_parts(blob.id_, upload_id, 'user_token'),
+                    {1: len(parts[0]), 2: len(parts[1]), 3: len(parts[2])})
+
+                with self.assertRaises(ValueError):
+                    services.complete_upload(blob.id_, upload_id, 'user_token', [1, 4])
+
+                blob = services.complete_upload(blob.id_, upload_id, 'user_token')
+
+                with blob, blob.decoded() as decoded:
+                    self.assertEqual(decoded.read(), b''.join(parts))
+
+                self.assertEqual(blob.etag, hashlib.sha256(b''.join(parts)).hexdigest())
+
+                with self.assertRaises(exceptions.UploadNotFoundError):
+                    services.upload_part(blob.id_, upload_id, 1, 'user_token', io.BytesIO(b''))
+
+                services.delete_blob(blob.id_, 'user_token')
+
+    @patch('requests.Session.get')
+    def test_update_blob_compressed(self, mock_get):
+        response = requests.Response()
+
+        response.status_code = 200
+        response._content = json.dumps({
+            'user': 'testuser'
+        }).encode()
+
+        mock_get.return_value = response
+
+        data = b'{"key": "value"}\n' * 100000
+
+        os.environ['COMPRESSION'] = 'gzip'
+
+        try:
+            blob = services.create_blob('user_token')
+            blob = services.update_blob(blob.id_, 'user_token', io.BytesIO(data))
+
+            self.assertEqual(blob.encoding, 'gzip')
+            self.assertLess(blob.stat().st_size, len(data) / 5)
+
+            with blob.decoded() as decoded:
+                self.assertEqual(decoded.stat().st_size, len(data))
+                self.assertEqual(decoded.read(), data)
+
+            _DAO.update_blob_etag(blob.id_, None)
+
+            with services.get_blob(blob.id_, 'user_token') as blob:
+                self.assertEqual(blob.etag, hashlib.sha256(data).hexdigest())
+
+            self.assertEqual(
+                services.get_hash_blob(blob.id_, 'user_token', ['md5']),
+                {'md5': hashlib.md5(data).hexdigest()})
+
+            blob = services.update_blob(blob.id_, 'user_token', io.BytesIO(b'blob data'))
+
+            self.assertIsNone(blob.encoding)
+            self.assertEqual(blob.read(), b'blob data')
+        finally:
+            del os.environ['COMPRESSION']
+
+    def tearDown(self) -> None:
+        _remove_test_dir()
+        _DAO.close()
+
+class TestRoutes(unittest.TestCase):
+
+    def setUp(self) -> None:
+        os.environ['STORAGE'] = '.tests_storage'
+        _DAO.connect(':memory:')
+        Client.clear_cache()
+
+        self.url = f'/api/{server.__version__}/blobs/public'
+
+    @patch('requests.Session.get')
+    def _public_blob(self, data, mock_get):
+        response = requests.Response()
+
+        response.status_code = 200
+        response._content = json.dumps({
+            'user': 'testuser'
+        }).encode()
+
+        mock_get.return_value = response
+
+        _DAO.new_blob('public', 'testuser', services.Visibility.PUBLIC.value)
+
+        return services.update_blob('public', 'user_token', io.BytesIO(data))
+
+    def test_get_blob_sendfile(self):
+        blob = self._public_blob(b'blob data')
+
+        with server.create_app('sendfile').test_client() as client:
+            response = client.get(self.url)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, b'blob data')
+            self.assertEqual(response.headers['ETag'], f'"{blob.etag}"')
+            self.assertNotIn('X-Sendfile', response.headers)
+
+    def test_get_blob_x_sendfile(self):
+        blob = self._public_blob(b'blob data')
+
+        with server.create_app('x-sendfile').test_client() as client:
+            response = client.get(self.url)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, b'')
+            self.assertEqual(response.headers['ETag'], f'"{blob.etag}"')
+            self.assertEqual(
+                response.headers['X-Sendfile'], os.path.abspath(blob.file_path))
+
+    def test_get_blob_sendfile_replaced(self):
+        blob = self._public_blob(b'blob data')
+        open_blob = services.open_blob
+
+        def _open_replaced(*args):
+            # The file is swapped once the blob is open, as a concurrent update would
+            _blob = open_blob(*args)
+
+            with open(blob.file_path + '.new', 'wb') as file:
+                file.write(b'new data')
+
+            os.replace(blob.file_path + '.new', blob.file_path)
+
+            return _blob
+
+        for mode in ('sendfile', 'x-sendfile'):
+            with self.subTest(mode=mode), \
+                    patch.object(services, 'open_blob', side_effect=_open_replaced), \
+                    server.create_app(mode).test_client() as client:
+                response = client.get(self.url)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data, b'blob data')
+                self.assertEqual(response.headers['ETag'], f'"{blob.etag}"')
+                self.assertNotIn('X-Sendfile', response.headers)
+
+            with open(blob.file_path, 'wb') as file:
+                file.write(b'blob data')
+
+    def test_get_blob_sendfile_removed(self):
+        blob = self._public_blob(b'blob data')
+        open_blob = services.open_blob
+
+        def _open_removed(*args):
+            _blob = open_blob(*args)
+
+            os.remove(blob.file_path)
+
+            return _blob
+
+        with patch.object(services, 'open_blob', side_effect=_open_removed), \
+                server.create_app('sendfile').test_client() as client:
+            response = client.get(self.url)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, b'blob data')
+
+    def test_get_blob_range(self):
+        self._public_blob(b'blob data')
+
+        for mode in ('stream', 'sendfile'):
+            with self.subTest(mode=mode), server.create_app(mode).test_client() as client:
+                response = client.get(self.url, headers={'Range': 'bytes=5-8'})
+
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response.data, b'data')
+                self.assertEqual(response.headers['Content-Range'], 'bytes 5-8/9')
+                self.assertEqual(response.headers['Accept-Ranges'], 'bytes')
+
+                response = client.get(self.url, headers={'Range': 'bytes=-4'})
+
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response.data, b'data')
+
+    def test_get_blob_multiple_ranges(self):
+        self._public_blob(b'blob data')
+
+        for mode in ('stream', 'sendfile', 'x-sendfile'):
+            with self.subTest(mode=mode), server.create_app(mode).test_client() as client:
+                response = client.get(self.url, headers={'Range': 'bytes=0-1,3-4'})
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.headers['Content-Length'], '9')
+                self.assertNotIn('Content-Range', response.headers)
+
+                if mode != 'x-sendfile':
+                    self.assertEqual(response.data, b'blob data')
+
+    def test_get_blob_range_not_satisfiable(self):
+        self._public_blob(b'blob data')
+
+        for mode in ('stream', 'sendfile'):
+            with self.subTest(mode=mode), server.create_app(mode).test_client() as client:
+                response = client.get(self.url, headers={'Range': 'bytes=100-200'})
+
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response.headers['Content-Range'], 'bytes */9')
+
+    def test_get_blob_if_none_match(self):
+        blob = self._public_blob(b'blob data')
+
+        for mode in ('stream', 'sendfile'):
+            with self.subTest(mode=mode), server.create_app(mode).test_client() as client:
+                response = client.get(self.url, headers={'If-None-Match': f'"{blob.etag}"'})
+
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.data, b'')
+                self.assertEqual(response.headers['ETag'], f'"{blob.etag}"')
+
+                response = client.get(self.url, headers={'If-None-Match': '"other"'})
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data, b'blob data')
+
+    def test_get_blob_if_modified_since(self):
+        self._public_blob(b'blob data')
+
+        for mode in ('stream', 'sendfile'):
+            with self.subTest(mode=mode), server.create_app(mode).test_client() as client:
+                response = client.get(self.url)
+                last_modified = response.headers['Last-Modified']
+
+                response = client.get(self.url, headers={'If-Modified-Since': last_modified})
+
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.data, b'')
+
+                response = client.get(
+                    self.url, headers={'If-Modified-Since': 'Thu, 01 Jan 1970 00:00:00 GMT'})
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data, b'blob data')
+
     def tearDown(self) -> None:
         _remove_test_dir()
         _DAO.close()
@@ -1,8 +1,20 @@
 import unittest
 import os
+import gzip
+import hashlib
+import io
 import shutil
+import tempfile
+import time
 
+from blobsapdi.objects._compression import _CompressingWriter, _DecompressingReader
 from blobsapdi.objects._file_blob import _FileBlob
+from blobsapdi.objects._hasher import _MultiHasher
+from blobsapdi.objects._multipart import _UploadSession
+from blobsapdi import exceptions
+from blobsapdi.objects._auth_protocol import _AuthProtocol
+from blobsapdi.objects._circuit_breaker import _CircuitBreaker
+from blobsapdi.objects._layout import _migrate_layout
 
 
 
@@ -56,6 +68,159 @@ class TestBlob(unittest.TestCase):
         self.default_blob.delete()
         assert os.path.isfile(self.default_blob.file_path) == False
 
+    def test_atomic_write(self):
+        self.default_blob.write(b'old')
+        with self.default_blob.atomic_writer() as _tmp:
+            _tmp.write(b'new')
+        self.default_blob.seek(0)
+        assert self.default_blob.read() == b'old'
+        with _FileBlob('123456') as _blob:
+            _blob.seek(0)
+            assert _blob.read() == b'new'
+
+    def test_atomic_write_failed(self):
+        self.default_blob.write(b'old')
+        try:
+            with self.default_blob.atomic_writer() as _tmp:
+                _tmp.write(b'new')
+                raise IOError('Connection dropped')
+        except IOError:
+            pass
+        with _FileBlob('123456') as _blob:
+            _blob.seek(0)
+            assert _blob.read() == b'old'
+        assert os.listdir(self.default_blob._dir) == [self.default_blob.file_name]
+
+    def test_digest_file(self):
+        _bytes = b'123456' * 1000
+        self.default_blob.write(_bytes)
+        _digests = _MultiHasher.digest_file(self.default_blob.file_path, ['md5', 'sha256'], 1000)
+        assert _digests == {
+            'md5': hashlib.md5(_bytes).hexdigest(),
+            'sha256': hashlib.sha256(_bytes).hexdigest()
+        }
+
+    def test_parallel_hasher(self):
+        os.environ['HASH_THREADS'] = '2'
+        _hasher = _MultiHasher(['sha1', 'sha512'], parallel=True)
+        assert _hasher._executor is not None
+        _hasher.update(b'123456' * 1000)
+        _hasher.update(b'abcd')
+        assert _hasher.hexdigests()['sha512'] == hashlib.sha512(b'123456' * 1000 + b'abcd').hexdigest()
+        del os.environ['HASH_THREADS']
+
+    def test_circuit_breaker(self):
+        _breaker = _CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        _breaker.record_failure()
+        assert _breaker.allow()
+        _breaker.record_failure()
+        assert _breaker.state == _CircuitBreaker.OPEN
+        assert not _breaker.allow()
+        time.sleep(0.05)
+        assert _breaker.allow()
+        assert not _breaker.allow()
+        _breaker.record_success()
+        assert _breaker.state == _CircuitBreaker.CLOSED
+        assert _breaker.stats()['rejected'] == 2
+
+    def test_auth_protocol(self):
+        _protocol = _AuthProtocol('http://auth', failure_threshold=1)
+        assert _protocol.url(_AuthProtocol.token_path('t')) == 'http://auth/v1/token/t'
+        assert _AuthProtocol.token_owner('t', 200, lambda: {'user': 'testuser'}) == 'testuser'
+        with self.assertRaises(exceptions.adiauth.UserNotExists):
+            _AuthProtocol.token_owner('t', 401, dict)
+        _protocol.answered(404)
+        assert _protocol.breaker.state == _CircuitBreaker.CLOSED
+        with self.assertRaises(exceptions.adiauth.ServiceError):
+            _protocol.answered(502)
+        with self.assertRaises(exceptions.adiauth.ServiceError):
+            _protocol.url(_AuthProtocol.STATUS_PATH)
+
+    def test_fanout_layout(self):
+        os.environ['STORAGE_FANOUT'] = '2'
+        _blob = _FileBlob('fanout_blob')
+        _blob.write(b'123456')
+        _blob.close()
+        assert os.path.relpath(_blob.file_path, os.getenv('STORAGE')).count(os.sep) == 2
+        assert os.path.isfile(_blob.file_path)
+        _FileBlob('fanout_blob').delete()
+        assert not os.path.exists(_blob.file_path)
+        del os.environ['STORAGE_FANOUT']
+
+    def test_migrate_layout(self):
+        self.default_blob.write(b'123456')
+        self.default_blob.close()
+        os.environ['STORAGE_FANOUT'] = '2'
+        with _FileBlob(self.default_blob.id_) as _blob:
+            assert _blob.file_path == self.default_blob.file_path
+            _blob.seek(0)
+            assert _blob.read() == b'123456'
+        _moved = list(_migrate_layout(os.getenv('STORAGE'), 2, 'blob'))
+        assert _moved == [self.default_blob.id_]
+        assert not os.path.exists(self.default_blob.file_path)
+        with _FileBlob(self.default_blob.id_) as _blob:
+            assert _blob.file_path != self.default_blob.file_path
+            _blob.seek(0)
+            assert _blob.read() == b'123456'
+        del os.environ['STORAGE_FANOUT']
+
+    def test_compressed_frames(self):
+        _bytes = b''.join(b'line %d\n' % i for i in range(1000))
+        _raw = io.BytesIO()
+        _writer = _CompressingWriter(_raw, frame_size=1000)
+        _writer.write(_bytes[:2500])
+        _writer.write(_bytes[2500:])
+        _index = _writer.finish()
+        assert _index.size == len(_bytes)
+        assert len(_index.offsets) == -(-len(_bytes) // 1000)
+        assert len(_raw.getvalue()) < len(_bytes) / 2
+        assert gzip.decompress(_raw.getvalue()) == _bytes
+        _raw.stat = lambda: os.stat_result((0,) * 10)
+        _reader = _DecompressingReader(_raw, _index)
+        assert _reader.stat().st_size == len(_bytes)
+        _reader.seek(2995)
+        assert _reader.read(10) == _bytes[2995:3005]
+        _reader.seek(0)
+        assert _reader.read() == _bytes
+
+    def test_incompressible_stored_raw(self):
+        _bytes = os.urandom(3000)
+        _raw = io.BytesIO()
+        _writer = _CompressingWriter(_raw, frame_size=1000)
+        _writer.write(_bytes)
+        assert _writer.finish() is None
+        assert _raw.getvalue() == _bytes
+
+    def test_upload_session(self):
+        _session = _UploadSession.create('123456')
+        for _n, _data in ((2, b'world'), (1, b'hello '), (3, b'!!'), (3, b'!')):
+            with _session.part_writer(_n) as _tmp:
+                _tmp.write(_data)
+        assert _session.parts() == {1: 6, 2: 5, 3: 1}
+        self.assertRaises(ValueError, _session.paths, [2, 1])
+        self.assertRaises(ValueError, _session.paths, [1, 4])
+        self.assertRaises(ValueError, _session.part_writer(0).__enter__)
+        with self.default_blob.atomic_writer() as _tmp:
+            _session.assemble(_tmp)
+        assert _MultiHasher.digest_files(_session.paths(), ['md5']) == {
+            'md5': hashlib.md5(b'hello world!').hexdigest()}
+        _raw = io.BytesIO()
+        _session.assemble(_raw, [1, 3])
+        assert _raw.getvalue() == b'hello !'
+        _hasher = _MultiHasher(['md5'])
+        with tempfile.TemporaryFile() as _tmp:
+            _session.assemble(_tmp, [1, 2], _hasher)
+            _tmp.seek(0)
+            assert _tmp.read() == b'hello world'
+        assert _hasher.hexdigests() == {'md5': hashlib.md5(b'hello world').hexdigest()}
+        assert _UploadSession.open('123456', _session.upload_id).path == _session.path
+        self.assertRaises(FileNotFoundError, _UploadSession.open, '123456', '../123456')
+        _UploadSession.expire(ttl=-1)
+        self.assertRaises(FileNotFoundError, _UploadSession.open, '123456', _session.upload_id)
+        with _FileBlob('123456') as _blob:
+            _blob.seek(0)
+            assert _blob.read() == b'hello world!'
+
     def tearDown(self):
         self.default_blob.delete()
         _remove_test_dir()
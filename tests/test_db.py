@@ -1,13 +1,22 @@
 import os
 import shutil
+import tempfile
 import unittest
 
+from contextlib import contextmanager
+
+from concurrent.futures import ThreadPoolExecutor
+
+import sqlite3
+
 from sqlite3 import ProgrammingError, IntegrityError
+from unittest.mock import patch
 
 from blobsapdi import exceptions
 from blobsapdi.db import _DAO
 from blobsapdi.entities import Blob
 from blobsapdi.enums import Visibility
+from blobsapdi.objects._file_blob import _FileBlob
 
 
 @staticmethod
@@ -17,7 +26,8 @@ def _raw_select_blob(id):
     
 @staticmethod
 def _raw_insert_blob(id, owner, visibility):
-    _DAO._cursor.execute('INSERT INTO blobs VALUES (?, ?, ?)', (id, owner, visibility))
+    _DAO._cursor.execute(
+        'INSERT INTO blobs (id, owner, visibility) VALUES (?, ?, ?)', (id, owner, visibility))
 
 @staticmethod
 def _exists_in_db_blob(id):
@@ -75,6 +85,69 @@ class TestDB(unittest.TestCase):
         with Blob.create(self.default_owner) as _blob:
             self.assertIn(_blob.id_, Blob.fetch_user_blobs(self.default_owner))
 
+    def test_get_blobs_lazy(self):
+        _blobs = Blob.fetch_user_blobs(self.default_owner)
+        self.assertEqual(len(_blobs), 1)
+        self.assertEqual(list(_blobs), [self.default_id])
+        with _blobs[self.default_id] as _b:
+            self.assertEqual(_b.owner, self.default_owner)
+
+    def test_get_blobs_pages(self):
+        for _id in ('a', 'c', 'b'):
+            _raw_insert_blob(_id, self.default_owner, 0)
+        _raw_insert_blob('x', 'other', 0)
+
+        _blobs = Blob.fetch_user_blobs(self.default_owner)
+        self.assertEqual(_blobs.page(2), (['123456', 'a'], 'a'))
+        self.assertEqual(_blobs.page(2, 'a'), (['b', 'c'], None))
+        self.assertEqual(list(_blobs.iter_after('a')), ['b', 'c'])
+
+        with patch('blobsapdi.entities.blob._PAGE_SIZE', 1):
+            self.assertEqual(list(_blobs), ['123456', 'a', 'b', 'c'])
+
+    def test_fetch_not_owned_blob(self):
+        self.assertIsNone(Blob.fetch_user_blobs('other').get(self.default_id))
+        self.assertRaises(exceptions.BlobNotFoundError, Blob.fetch_owned, self.default_id, 'other')
+
+    def test_stale_hashes(self):
+        _generation = _DAO.update_blob_contents(self.default_id, {'sha256': 'a', 'md5': 'b'})
+        self.assertEqual(_DAO.get_blob_hashes(self.default_id), (_generation, {'sha256': 'a', 'md5': 'b'}))
+
+        _DAO.update_blob_contents(self.default_id, {'sha256': 'c'})
+        _DAO.add_blob_hashes(self.default_id, _generation, {'md5': 'b'})
+        self.assertEqual(_DAO.get_blob_hashes(self.default_id), (_generation + 1, {'sha256': 'c'}))
+        self.assertEqual(_DAO.get_blob_etag(self.default_id), 'c')
+
+    def test_readonly_missing_contents(self):
+        # Never written, so it is empty
+        with Blob.open_readonly(self.default_id) as _blob:
+            self.assertEqual(_blob.read(), b'')
+
+        _DAO.update_blob_contents(self.default_id, {'sha256': 'a'})
+        os.remove(_FileBlob.locate(self.default_id))
+
+        self.assertRaises(exceptions.BlobNotFoundError, Blob.open_readonly, self.default_id)
+
+    def test_discard_after_commit(self):
+        _discarded = []
+
+        def _discard(digest):
+            self.assertFalse(_DAO._conn.in_transaction)
+            _discarded.append(digest)
+
+        _DAO.update_blob_contents(self.default_id, {'sha256': 'a'}, store=lambda: None)
+
+        def _store():
+            raise OSError('disk full')
+
+        self.assertRaises(
+            OSError, _DAO.update_blob_contents,
+            self.default_id, {'sha256': 'b'}, store=_store, discard=_discard)
+        self.assertEqual(_discarded, [])
+
+        _DAO.delete_blob(self.default_id, discard=_discard)
+        self.assertEqual(_discarded, ['a'])
+
     def test_close(self):
         _DAO.close()
         self.assertRaises(ProgrammingError, _DAO.get_blob, 'x')
@@ -100,12 +173,169 @@ class TestPerms(unittest.TestCase):
             _blob.add_permissions('user')
             self.assertTrue(_blob.has_permissions('user'))
 
+    def test_perms_many_blobs(self):
+        with Blob.create(self.default_owner) as _blob1, Blob.create(self.default_owner) as _blob2:
+            _blob1.add_permissions('user')
+            _blob2.add_permissions('user')
+            self.assertTrue(_blob1.has_permissions('user'))
+            self.assertTrue(_blob2.has_permissions('user'))
+
     def test_remove_perms(self):
         with Blob.create(self.default_owner) as _blob:
             _blob.add_permissions('user')
             _blob.remove_permissions('user')
             self.assertIsNone(_DAO.get_user_perms(_blob.id_, 'user'))
 
+    def test_cached_contents_only(self):
+        _DAO.new_blob('public', self.default_owner, Visibility.PUBLIC.value)
+        _DAO.update_blob_etag('public', 'etag')
+        _DAO.get_blob_etag('public')
+
+        with patch.object(_DAO, '_read') as mock_read:
+            for _ in range(3):
+                self.assertEqual(_DAO.get_blob_etag('public'), 'etag')
+            mock_read.assert_not_called()
+
+        self.assertEqual(_DAO.get_blob_access('public', None)[2], Visibility.PUBLIC.value)
+
+        # Access changes made by another process are never hidden by the cache
+        with _DAO._write() as _cursor:
+            _cursor.execute('UPDATE blobs SET visibility=? WHERE id=?',
+                            (Visibility.PRIVATE.value, 'public'))
+
+        self.assertEqual(_DAO.get_blob_access('public', None)[2], Visibility.PRIVATE.value)
+        self.assertEqual(_DAO.get_blob_visibility('public'), Visibility.PRIVATE.value)
+
+    def test_cache_invalidation(self):
+        with Blob.create(self.default_owner) as _blob:
+            self.assertEqual(_blob.allowed_users, set())
+            _blob.add_permissions('user')
+            self.assertEqual(_blob.allowed_users, {'user'})
+            _blob.allowed_users = {'other'}
+            self.assertEqual(_blob.allowed_users, {'other'})
+            _blob.remove_permissions('other')
+            self.assertEqual(_blob.allowed_users, set())
+            _blob.visibility = Visibility.PUBLIC
+            self.assertEqual(_DAO.get_blob_visibility(_blob.id_), Visibility.PUBLIC.value)
+            _blob.delete()
+            self.assertRaises(exceptions.BlobNotFoundError, _DAO.get_blob_visibility, _blob.id_)
+
+    def test_stale_fill_dropped(self):
+        _DAO.new_blob('raced', self.default_owner, Visibility.PRIVATE.value)
+        _read = _DAO._read
+
+        @contextmanager
+        def _racing_read():
+            with _read() as _cursor:
+                yield _cursor
+            # A write committed after the rows were read but before they are cached
+            _DAO.update_blob_etag('raced', 'new')
+
+        with patch.object(_DAO, '_read', _racing_read):
+            self.assertIsNone(_DAO.get_blob_etag('raced'))
+
+        self.assertEqual(_DAO.get_blob_etag('raced'), 'new')
+
+    def test_batch_operations(self):
+        _PUBLIC, _PRIVATE = Visibility.PUBLIC.value, Visibility.PRIVATE.value
+
+        _DAO.new_blobs(self.default_owner, [('b1', _PRIVATE), ('b2', _PRIVATE)])
+        _DAO.new_blob('other', 'someone', _PRIVATE)
+        self.assertRaises(
+            exceptions.BlobAlreadyExistsError, _DAO.new_blobs, self.default_owner, [('b1', _PRIVATE)])
+
+        self.assertEqual(
+            _DAO.update_blobs_visibility(self.default_owner, [('b1', _PUBLIC), ('other', _PUBLIC)]), {'b1'})
+        self.assertEqual(_DAO.get_blob_visibility('b1'), _PUBLIC)
+        self.assertEqual(_DAO.get_blob_visibility('other'), _PRIVATE)
+
+        self.assertEqual(
+            _DAO.update_blobs_perms(self.default_owner, [('b2', {'user'}), ('other', {'user'})]),
+            {'b2'})
+        self.assertIsNotNone(_DAO.get_user_perms('b2', 'user'))
+        self.assertIsNone(_DAO.get_user_perms('other', 'user'))
+
+        self.assertEqual(_DAO.delete_blobs(['b1', 'other', 'missing'], self.default_owner), {'b1'})
+        self.assertRaises(exceptions.BlobNotFoundError, _DAO.get_blob_visibility, 'b1')
+        self.assertEqual(_DAO.get_blob_visibility('other'), _PRIVATE)
+
+    def tearDown(self):
+        _remove_test_dir()
+        _DAO.close()
+
+class TestPool(unittest.TestCase):
+
+    def setUp(self):
+        os.environ['STORAGE'] = '.tests_storage'
+        self._dir = tempfile.mkdtemp()
+        _DAO.connect(os.path.join(self._dir, 'pool.db'), pool_size=4, synchronous='normal')
+        self.default_owner = 'me'
+
+    def test_pooled_queries(self):
+        _ids = [str(i) for i in range(20)]
+        for _id in _ids:
+            _DAO.new_blob(_id, self.default_owner, 0)
+
+        with ThreadPoolExecutor(8) as _executor:
+            _results = list(_executor.map(lambda _id: _DAO.get_blob(_id)[0], _ids))
+
+        self.assertEqual(_results, _ids)
+        self.assertLessEqual(_DAO.stats()['pool']['open'], 4)
+
+    def test_pooled_rollback(self):
+        _DAO.new_blob('1', self.default_owner, 0)
+        self.assertRaises(exceptions.BlobAlreadyExistsError, _DAO.new_blob, '1', None, 0)
+        self.assertEqual(_DAO.get_blobs(self.default_owner), ['1'])
+
+    def test_invalid_synchronous(self):
+        self.assertRaises(ValueError, _DAO.connect, ':memory:', synchronous='sometimes')
+
     def tearDown(self):
+        _DAO.close()
+        shutil.rmtree(self._dir)
         _remove_test_dir()
+
+class TestMigrations(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._db = os.path.join(self._dir, 'old.db')
+
+        with sqlite3.connect(self._db) as _conn:
+            _conn.execute('''CREATE TABLE blobs (
+                id TEXT, owner TEXT, visibility TEXT, PRIMARY KEY (id))''')
+            _conn.execute('''CREATE TABLE perms (
+                id TEXT, user TEXT UNIQUE, perms INTEGER DEFAULT 0 NOT NULL,
+                PRIMARY KEY (id, user), FOREIGN KEY (id) REFERENCES blobs(id))''')
+            _conn.execute("INSERT INTO blobs VALUES ('1', 'me', 'private')")
+            _conn.execute("INSERT INTO perms VALUES ('1', 'user', 0)")
+        _conn.close()
+
+        _DAO.connect(self._db)
+
+    def test_upgrade_in_place(self):
+        self.assertEqual(
+            _DAO._cursor.execute('PRAGMA user_version').fetchone()[0], len(_DAO._migrations()))
+        self.assertIsNotNone(_DAO.get_user_perms('1', 'user'))
+
+        _DAO.new_blob('2', 'me', 'private')
+        _DAO.add_perms('2', 'user')
+        self.assertIsNotNone(_DAO.get_user_perms('2', 'user'))
+
+    def test_upgrade_idempotent(self):
+        _DAO.close()
+        _DAO.connect(self._db)
+        self.assertEqual(_DAO.get_blobs('me'), ['1'])
+
+    def test_index_only(self):
+        _plan = _DAO._cursor.execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM blobs WHERE owner=?', ('me',)).fetchall()
+        self.assertIn('COVERING INDEX', _plan[0][-1])
+
+        _plan = _DAO._cursor.execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM perms WHERE user=?', ('user',)).fetchall()
+        self.assertIn('COVERING INDEX', _plan[0][-1])
+
+    def tearDown(self):
         _DAO.close()
+        shutil.rmtree(self._dir)
@@ -0,0 +1,287 @@
+import os
+import shutil
+import threading
+import unittest
+
+from blobsapdi.object_store import _ObjectServer
+from blobsapdi.storage import _BytesReader, _ChunkedBackend, _LocalBackend, _MemoryBackend
+from blobsapdi.storage._backend import _ObjectReader, _ObjectStat
+from blobsapdi.storage._content_cache import _ContentCache
+from blobsapdi.storage._shared import _SharedReaders
+
+
+@staticmethod
+def _remove_test_dir():
+    _st = os.getenv('STORAGE')
+    if _st and os.path.isdir(_st):
+        shutil.rmtree(_st)
+
+class _BackendTests:
+
+    def test_missing(self):
+        with self.assertRaises(FileNotFoundError):
+            self.backend.reader('missing')
+
+        with self.assertRaises(FileNotFoundError):
+            self.backend.stat('missing')
+
+        self.backend.delete('missing')
+
+    def test_write_read(self):
+        _bytes = b'0123456789' * 1000
+
+        with self.backend.writer('key') as _w:
+            _w.write(_bytes[:5000])
+            _w.write(_bytes[5000:])
+
+        self.assertEqual(self.backend.stat('key').st_size, len(_bytes))
+        self.assertEqual(self.backend.read_range('key', 0, len(_bytes) + 1), _bytes)
+        self.assertEqual(self.backend.read_range('key', 1020, 10), _bytes[1020:1030])
+        self.assertEqual(self.backend.read_range('key', len(_bytes) - 5, 10), _bytes[-5:])
+        self.assertEqual(self.backend.read_range('key', len(_bytes), 10), b'')
+
+    def test_write_empty(self):
+        with self.backend.writer('key'):
+            pass
+
+        self.assertEqual(self.backend.stat('key').st_size, 0)
+        self.assertEqual(self.backend.read_range('key', 0, 10), b'')
+
+    def test_write_failed(self):
+        with self.backend.writer('key') as _w:
+            _w.write(b'old data')
+
+        with self.assertRaises(IOError):
+            with self.backend.writer('key') as _w:
+                _w.write(b'new data' * 1000)
+                raise IOError('Connection dropped')
+
+        self.assertEqual(self.backend.read_range('key', 0, 100), b'old data')
+
+    def test_reader_snapshot(self):
+        with self.backend.writer('key') as _w:
+            _w.write(b'old data')
+
+        _reader = self.backend.reader('key')
+
+        try:
+            with self.backend.writer('key') as _w:
+                _w.write(b'new data!')
+
+            self.assertEqual(_reader.stat.st_size, len(b'old data'))
+        finally:
+            _reader.close()
+
+        self.assertEqual(self.backend.read_range('key', 0, 100), b'new data!')
+
+    def test_delete(self):
+        with self.backend.writer('key') as _w:
+            _w.write(b'data')
+
+        self.backend.delete('key')
+
+        with self.assertRaises(FileNotFoundError):
+            self.backend.reader('key')
+
+class TestLocalBackend(_BackendTests, unittest.TestCase):
+
+    def setUp(self):
+        os.environ['STORAGE'] = '.tests_storage'
+        self.backend = _LocalBackend('.tests_storage', 2)
+
+    def test_layout(self):
+        with self.backend.writer('key') as _w:
+            _w.write(b'data')
+
+        _path = self.backend.local_path('key')
+
+        self.assertTrue(os.path.isfile(_path))
+        self.assertEqual(len(os.path.relpath(_path, '.tests_storage').split(os.sep)), 3)
+
+    def tearDown(self):
+        _remove_test_dir()
+
+class TestMemoryBackend(_BackendTests, unittest.TestCase):
+
+    def setUp(self):
+        self.backend = _MemoryBackend()
+
+    def test_len(self):
+        with self.backend.writer('key') as _w:
+            _w.write(b'data')
+
+        self.assertEqual(len(self.backend), 1)
+
+class TestChunkedBackend(_BackendTests, unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        os.environ['STORAGE'] = '.tests_storage'
+
+        cls.server = _ObjectServer(('127.0.0.1', 0), '.tests_storage')
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    def setUp(self):
+        self.backend = _ChunkedBackend(
+            f'http://127.0.0.1:{self.server.server_address[1]}', chunk_size=1024)
+
+    def test_chunks(self):
+        with self.backend.writer('key') as _w:
+            _w.write(b'a' * 2500)
+
+        with self.backend.writer('key') as _w:
+            _w.write(b'b' * 2048)
+
+        # The chunks of the previous version are deleted once replaced
+        self.assertEqual(len(os.listdir('.tests_storage')), 3)
+
+        with self.backend.writer('other') as _w:
+            _w.write(b'data')
+
+        self.backend.delete('key')
+
+        self.assertEqual(len(os.listdir('.tests_storage')), 2)
+
+    def test_sequential_reads(self):
+        _bytes = bytes(range(256)) * 10
+
+        with self.backend.writer('key') as _w:
+            _w.write(_bytes)
+
+        _get = self.backend._get
+        _names = []
+
+        def _counted(name):
+            _names.append(name)
+            return _get(name)
+
+        self.backend._get = _counted
+        _reader = self.backend.reader('key')
+
+        try:
+            _read = b''.join(_reader.read_range(_o, 100) for _o in range(0, len(_bytes), 100))
+        finally:
+            _reader.close()
+
+        self.assertEqual(_read, _bytes)
+        # The manifest and each of the 3 chunks once
+        self.assertEqual(len(_names), 4)
+
+    def test_concurrent_writers(self):
+        def _write(data):
+            for _ in range(5):
+                with self.backend.writer('key') as _w:
+                    _w.write(data * 1500)
+
+        _threads = [threading.Thread(target=_write, args=(_b,)) for _b in (b'a', b'b', b'c')]
+
+        for _thread in _threads:
+            _thread.start()
+
+        for _thread in _threads:
+            _thread.join()
+
+        # Only the manifest and the chunks of the current version are left
+        self.assertEqual(len(os.listdir('.tests_storage')), 3)
+
+    def tearDown(self):
+        self.backend.close()
+
+        for _name in os.listdir('.tests_storage'):
+            os.remove(os.path.join('.tests_storage', _name))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+        _remove_test_dir()
+
+class TestSharedReaders(unittest.TestCase):
+
+    def setUp(self):
+        self.readers = _SharedReaders(maxsize=1)
+        self.opened = []
+
+    def _open(self):
+        self.opened.append(_BytesReader(b'test data', 0.0))
+        return self.opened[-1]
+
+    def test_shared(self):
+        with self.readers.open(('blob', 1), self._open) as _a, \
+                self.readers.open(('blob', 1), self._open) as _b:
+            self.assertEqual(len(self.opened), 1)
+
+            _a.seek(5)
+            self.assertEqual(_b.read(4), b'test')
+            self.assertEqual(_a.read(), b'data')
+
+            self.assertEqual(_b.seek(0, os.SEEK_END), 9)
+
+        self.assertEqual(len(self.readers), 0)
+
+    def test_cached(self):
+        self.readers.open(('blob', 1), self._open).close()
+        self.readers.open(('blob', 1), self._open).close()
+
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(self.readers.stats()['hits'], 1)
+
+        self.readers.open(('other', 1), self._open).close()
+
+        # Evicted, only one idle reader is kept
+        self.readers.open(('blob', 1), self._open).close()
+        self.assertEqual(len(self.opened), 3)
+
+        with self.readers.open(('blob', 1), self._open):
+            self.readers.invalidate('blob')
+
+        self.readers.open(('blob', 1), self._open).close()
+        self.assertEqual(len(self.opened), 4)
+
+        self.readers.open(('blob', None), self._open).close()
+        self.readers.open(('blob', None), self._open).close()
+        self.assertEqual(len(self.opened), 6)
+
+class _StoredReader(_ObjectReader):
+
+    @property
+    def stat(self):
+        return _ObjectStat(len(self._data), 0.0)
+
+    def __init__(self, data):
+        self._data = data
+
+    def read_range(self, offset, length):
+        return self._data[offset:offset + length]
+
+class TestContentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = _ContentCache(maxbytes=8, threshold=4)
+
+    def test_cached(self):
+        self.assertIsNone(self.cache.get(('blob', 1)))
+
+        _reader = _StoredReader(b'data')
+        self.assertEqual(self.cache.load(('blob', 1), _reader).read_range(0, 4), b'data')
+        self.assertIsNone(self.cache.load(('large', 1), _StoredReader(b'large')))
+
+        self.assertEqual(self.cache.get(('blob', 1)).read_range(1, 2), b'at')
+        self.assertIsNone(self.cache.get(('blob', 2)))
+
+        _stats = self.cache.stats()
+        self.assertEqual((_stats['hits'], _stats['misses'], _stats['bytes_served']), (1, 1, 2))
+
+    def test_evict(self):
+        for _name in ('a', 'b', 'c'):
+            self.cache.load((_name, 1), _StoredReader(b'data'))
+
+        self.assertIsNone(self.cache.get(('a', 1)))
+        self.assertEqual(self.cache.stats()['bytes'], 8)
+
+        self.cache.invalidate('b')
+        self.assertIsNone(self.cache.get(('b', 1)))
+        self.assertIsNotNone(self.cache.get(('c', 1)))
+        self.assertEqual(self.cache.stats()['bytes'], 4)